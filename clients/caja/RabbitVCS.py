@@ -80,7 +80,8 @@ from rabbitvcs.util.helper import pretty_timedelta
 
 from rabbitvcs.util.decorators import timeit, disable
 
-from rabbitvcs.util.contextmenu import MenuBuilder, MainContextMenu, SEPARATOR, ContextMenuConditions
+from rabbitvcs.util.contextmenu import MenuBuilder, MainContextMenu, SEPARATOR, ContextMenuConditions, \
+    MenuConditionsCache, EvaluatedPathDict
 
 import rabbitvcs.ui
 import rabbitvcs.ui.property_page
@@ -203,7 +204,7 @@ class RabbitVCS(Caja.InfoProvider, Caja.MenuProvider,
         
         self.status_checker.assert_version(EXT_VERSION)
         
-        self.items_cache = {}
+        self.items_cache = MenuConditionsCache(self.status_checker)
         
     def get_columns(self):
         """
@@ -389,19 +390,15 @@ class RabbitVCS(Caja.InfoProvider, Caja.MenuProvider,
         
         # log.debug("get_file_items_full() called")
 
-        paths_str = "-".join(paths)
+        conditions_dict = self.items_cache.get(paths)
+        if conditions_dict and conditions_dict != MenuConditionsCache.IN_PROGRESS:
+            conditions = CajaMenuConditions(conditions_dict)
+            menu = CajaMainContextMenu(self, window.base_dir, paths, conditions).get_menu()
+            return menu
         
-        conditions_dict = None
-        if paths_str in self.items_cache:
-            conditions_dict = self.items_cache[paths_str]
-            if conditions_dict and conditions_dict != "in-progress":
-                conditions = CajaMenuConditions(conditions_dict)
-                menu = CajaMainContextMenu(self, window.base_dir, paths, conditions).get_menu()
-                return menu
-        
-        if conditions_dict != "in-progress":
-            self.status_checker.generate_menu_conditions_async(provider, window.base_dir, paths, self.update_file_items)        
-            self.items_cache[path] = "in-progress"
+        if conditions_dict != MenuConditionsCache.IN_PROGRESS:
+            self.status_checker.generate_menu_conditions_async(provider, window.base_dir, paths, self.update_file_items)
+            self.items_cache.set_in_progress(paths)
             
         return ()
 
@@ -420,8 +417,7 @@ class RabbitVCS(Caja.InfoProvider, Caja.MenuProvider,
         return CajaMainContextMenu(self, window.base_dir, paths).get_menu()
 
     def update_file_items(self, provider, base_dir, paths, conditions_dict):
-        paths_str = "-".join(paths)
-        self.items_cache[paths_str] =  conditions_dict
+        self.items_cache.set(paths, conditions_dict)
         Caja.MenuProvider.emit_items_updated_signal(provider)
 
     #~ @disable
@@ -466,19 +462,17 @@ class RabbitVCS(Caja.InfoProvider, Caja.MenuProvider,
 
         # log.debug("get_background_items_full() called")
 
-        conditions_dict = None
-        if path in self.items_cache:
-            conditions_dict = self.items_cache[path]
-            if conditions_dict and conditions_dict != "in-progress":
-                conditions = CajaMenuConditions(conditions_dict)
-                menu = CajaMainContextMenu(self, path, [path], conditions).get_menu()                
-                return menu
+        conditions_dict = self.items_cache.get([path])
+        if conditions_dict and conditions_dict != MenuConditionsCache.IN_PROGRESS:
+            conditions = CajaMenuConditions(conditions_dict)
+            menu = CajaMainContextMenu(self, path, [path], conditions).get_menu()
+            return menu
 
         window.base_dir = path
 
-        if conditions_dict != "in-progress":
+        if conditions_dict != MenuConditionsCache.IN_PROGRESS:
             self.status_checker.generate_menu_conditions_async(provider, path, [path], self.update_background_items)
-            self.items_cache[path] = "in-progress"
+            self.items_cache.set_in_progress([path])
                     
         return ()
 
@@ -494,9 +488,7 @@ class RabbitVCS(Caja.InfoProvider, Caja.MenuProvider,
         return CajaMainContextMenu(self, path, [path]).get_menu()
 
     def update_background_items(self, provider, base_dir, paths, conditions_dict):
-        paths_str = "-".join(paths)
-        conditions = CajaMenuConditions(conditions_dict)
-        self.items_cache[paths_str] =  conditions_dict
+        self.items_cache.set(paths, conditions_dict)
         Caja.MenuProvider.emit_items_updated_signal(provider)
 
     #
@@ -610,8 +602,6 @@ class RabbitVCS(Caja.InfoProvider, Caja.MenuProvider,
             # NOTE! There is a call to "update_file_info" WITHIN the call to
             # invalidate_extension_info() - beware recursion!
             item.invalidate_extension_info()
-            if status.path in self.items_cache:
-                del self.items_cache[status.path]
         else:
             log.debug("Path [%s] not found in file table" % status.path)
 
@@ -672,7 +662,7 @@ class CajaContextMenu(MenuBuilder):
 
 class CajaMenuConditions(ContextMenuConditions):
     def __init__(self, path_dict):
-        self.path_dict = path_dict
+        self.path_dict = EvaluatedPathDict(path_dict)
 
 class CajaMainContextMenu(MainContextMenu):
     def get_menu(self):
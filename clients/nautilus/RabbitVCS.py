@@ -72,7 +72,8 @@ from rabbitvcs.util.helper import launch_ui_window, launch_diff_tool
 from rabbitvcs.util.helper import get_file_extension, get_common_directory
 from rabbitvcs.util.helper import pretty_timedelta
 from rabbitvcs.util.decorators import timeit, disable
-from rabbitvcs.util.contextmenu import MenuBuilder, MainContextMenu, SEPARATOR, ContextMenuConditions
+from rabbitvcs.util.contextmenu import MenuBuilder, MainContextMenu, SEPARATOR, ContextMenuConditions, \
+    MenuConditionsCache, EvaluatedPathDict
 
 import rabbitvcs.ui
 import rabbitvcs.ui.property_page
@@ -130,7 +131,7 @@ class RabbitVCS(nautilus.InfoProvider, nautilus.MenuProvider,
         
         self.status_checker.assert_version(EXT_VERSION)
         
-        self.items_cache = {}
+        self.items_cache = MenuConditionsCache(self.status_checker)
         
     def get_columns(self):
         """
@@ -317,19 +318,15 @@ class RabbitVCS(nautilus.InfoProvider, nautilus.MenuProvider,
         
         # log.debug("get_file_items_full() called")
 
-        paths_str = "-".join(paths)
+        conditions_dict = self.items_cache.get(paths)
+        if conditions_dict and conditions_dict != MenuConditionsCache.IN_PROGRESS:
+            conditions = NautilusMenuConditions(conditions_dict)
+            menu = NautilusMainContextMenu(self, window.get_data("base_dir"), paths, conditions).get_menu()
+            return menu
         
-        conditions_dict = None
-        if paths_str in self.items_cache:
-            conditions_dict = self.items_cache[paths_str]
-            if conditions_dict and conditions_dict != "in-progress":
-                conditions = NautilusMenuConditions(conditions_dict)
-                menu = NautilusMainContextMenu(self, window.get_data("base_dir"), paths, conditions).get_menu()
-                return menu
-        
-        if conditions_dict != "in-progress":
-            self.status_checker.generate_menu_conditions_async(provider, window.get_data("base_dir"), paths, self.update_file_items)        
-            self.items_cache[path] = "in-progress"
+        if conditions_dict != MenuConditionsCache.IN_PROGRESS:
+            self.status_checker.generate_menu_conditions_async(provider, window.get_data("base_dir"), paths, self.update_file_items)
+            self.items_cache.set_in_progress(paths)
             
         return ()
 
@@ -348,8 +345,7 @@ class RabbitVCS(nautilus.InfoProvider, nautilus.MenuProvider,
         return NautilusMainContextMenu(self, window.get_data("base_dir"), paths).get_menu()
 
     def update_file_items(self, provider, base_dir, paths, conditions_dict):
-        paths_str = "-".join(paths)
-        self.items_cache[paths_str] =  conditions_dict
+        self.items_cache.set(paths, conditions_dict)
         self.emit_items_updated_signal(provider)
 
     #~ @disable
@@ -394,19 +390,17 @@ class RabbitVCS(nautilus.InfoProvider, nautilus.MenuProvider,
 
         # log.debug("get_background_items_full() called")
 
-        conditions_dict = None
-        if path in self.items_cache:
-            conditions_dict = self.items_cache[path]
-            if conditions_dict and conditions_dict != "in-progress":
-                conditions = NautilusMenuConditions(conditions_dict)
-                menu = NautilusMainContextMenu(self, path, [path], conditions).get_menu()                
-                return menu
+        conditions_dict = self.items_cache.get([path])
+        if conditions_dict and conditions_dict != MenuConditionsCache.IN_PROGRESS:
+            conditions = NautilusMenuConditions(conditions_dict)
+            menu = NautilusMainContextMenu(self, path, [path], conditions).get_menu()
+            return menu
 
         window.set_data("base_dir", path)
 
-        if conditions_dict != "in-progress":
+        if conditions_dict != MenuConditionsCache.IN_PROGRESS:
             self.status_checker.generate_menu_conditions_async(provider, path, [path], self.update_background_items)
-            self.items_cache[path] = "in-progress"
+            self.items_cache.set_in_progress([path])
                     
         return ()
 
@@ -422,9 +416,7 @@ class RabbitVCS(nautilus.InfoProvider, nautilus.MenuProvider,
         return NautilusMainContextMenu(self, path, [path]).get_menu()
 
     def update_background_items(self, provider, base_dir, paths, conditions_dict):
-        paths_str = "-".join(paths)
-        conditions = NautilusMenuConditions(conditions_dict)
-        self.items_cache[paths_str] =  conditions_dict
+        self.items_cache.set(paths, conditions_dict)
         self.emit_items_updated_signal(provider)
 
     #
@@ -538,8 +530,6 @@ class RabbitVCS(nautilus.InfoProvider, nautilus.MenuProvider,
             # NOTE! There is a call to "update_file_info" WITHIN the call to
             # invalidate_extension_info() - beware recursion!
             item.invalidate_extension_info()
-            if status.path in self.items_cache:
-                del self.items_cache[status.path]
         else:
             log.debug("Path [%s] not found in file table" % status.path)
 
@@ -590,7 +580,7 @@ class NautilusContextMenu(MenuBuilder):
 
 class NautilusMenuConditions(ContextMenuConditions):
     def __init__(self, path_dict):
-        self.path_dict = path_dict
+        self.path_dict = EvaluatedPathDict(path_dict)
 
 class NautilusMainContextMenu(MainContextMenu):
     def get_menu(self):
@@ -85,7 +85,8 @@ from rabbitvcs.util.helper import pretty_timedelta
 
 from rabbitvcs.util.decorators import timeit, disable
 
-from rabbitvcs.util.contextmenu import MenuBuilder, MainContextMenu, SEPARATOR, ContextMenuConditions
+from rabbitvcs.util.contextmenu import MenuBuilder, MainContextMenu, SEPARATOR, ContextMenuConditions, \
+    MenuConditionsCache, EvaluatedPathDict
 
 import rabbitvcs.ui
 import rabbitvcs.ui.property_page
@@ -208,7 +209,7 @@ class RabbitVCS(Nemo.InfoProvider, Nemo.MenuProvider,
 
         self.status_checker.assert_version(EXT_VERSION)
 
-        self.items_cache = {}
+        self.items_cache = MenuConditionsCache(self.status_checker)
 
     def get_columns(self):
         """
@@ -394,19 +395,15 @@ class RabbitVCS(Nemo.InfoProvider, Nemo.MenuProvider,
 
         # log.debug("get_file_items_full() called")
 
-        paths_str = "-".join(paths)
+        conditions_dict = self.items_cache.get(paths)
+        if conditions_dict and conditions_dict != MenuConditionsCache.IN_PROGRESS and hasattr(window, 'base_dir'):
+            conditions = NemoMenuConditions(conditions_dict)
+            menu = NemoMainContextMenu(self, window.base_dir, paths, conditions).get_menu()
+            return menu
 
-        conditions_dict = None
-        if paths_str in self.items_cache:
-            conditions_dict = self.items_cache[paths_str]
-            if conditions_dict and conditions_dict != "in-progress" and hasattr(window, 'base_dir'):
-                conditions = NemoMenuConditions(conditions_dict)
-                menu = NemoMainContextMenu(self, window.base_dir, paths, conditions).get_menu()
-                return menu
-
-        if conditions_dict != "in-progress" and hasattr(window, 'base_dir'):
+        if conditions_dict != MenuConditionsCache.IN_PROGRESS and hasattr(window, 'base_dir'):
             self.status_checker.generate_menu_conditions_async(provider, window.base_dir, paths, self.update_file_items)
-            self.items_cache[path] = "in-progress"
+            self.items_cache.set_in_progress(paths)
 
         return ()
 
@@ -425,8 +422,7 @@ class RabbitVCS(Nemo.InfoProvider, Nemo.MenuProvider,
         return NemoMainContextMenu(self, window.base_dir, paths).get_menu()
 
     def update_file_items(self, provider, base_dir, paths, conditions_dict):
-        paths_str = "-".join(paths)
-        self.items_cache[paths_str] =  conditions_dict
+        self.items_cache.set(paths, conditions_dict)
         Nemo.MenuProvider.emit_items_updated_signal(provider)
 
     #~ @disable
@@ -471,19 +467,17 @@ class RabbitVCS(Nemo.InfoProvider, Nemo.MenuProvider,
 
         # log.debug("get_background_items_full() called")
 
-        conditions_dict = None
-        if path in self.items_cache:
-            conditions_dict = self.items_cache[path]
-            if conditions_dict and conditions_dict != "in-progress":
-                conditions = NemoMenuConditions(conditions_dict)
-                menu = NemoMainContextMenu(self, path, [path], conditions).get_menu()
-                return menu
+        conditions_dict = self.items_cache.get([path])
+        if conditions_dict and conditions_dict != MenuConditionsCache.IN_PROGRESS:
+            conditions = NemoMenuConditions(conditions_dict)
+            menu = NemoMainContextMenu(self, path, [path], conditions).get_menu()
+            return menu
 
         window.base_dir = path
 
-        if conditions_dict != "in-progress":
+        if conditions_dict != MenuConditionsCache.IN_PROGRESS:
             self.status_checker.generate_menu_conditions_async(provider, path, [path], self.update_background_items)
-            self.items_cache[path] = "in-progress"
+            self.items_cache.set_in_progress([path])
 
         return ()
 
@@ -499,9 +493,7 @@ class RabbitVCS(Nemo.InfoProvider, Nemo.MenuProvider,
         return NemoMainContextMenu(self, path, [path]).get_menu()
 
     def update_background_items(self, provider, base_dir, paths, conditions_dict):
-        paths_str = "-".join(paths)
-        conditions = NemoMenuConditions(conditions_dict)
-        self.items_cache[paths_str] =  conditions_dict
+        self.items_cache.set(paths, conditions_dict)
         Nemo.MenuProvider.emit_items_updated_signal(provider)
 
     #
@@ -615,8 +607,6 @@ class RabbitVCS(Nemo.InfoProvider, Nemo.MenuProvider,
             # NOTE! There is a call to "update_file_info" WITHIN the call to
             # invalidate_extension_info() - beware recursion!
             item.invalidate_extension_info()
-            if status.path in self.items_cache:
-                del self.items_cache[status.path]
         else:
             log.debug("Path [%s] not found in file table" % status.path)
 
@@ -675,7 +665,7 @@ class NemoContextMenu(MenuBuilder):
 
 class NemoMenuConditions(ContextMenuConditions):
     def __init__(self, path_dict):
-        self.path_dict = path_dict
+        self.path_dict = EvaluatedPathDict(path_dict)
 
 class NemoMainContextMenu(MainContextMenu):
     def get_menu(self):
@@ -46,6 +46,7 @@ from __future__ import absolute_import
 
 import os, os.path
 import sys
+import threading
 import simplejson
 import six
 
@@ -79,6 +80,9 @@ OBJECT_PATH = "/org/google/code/rabbitvcs/StatusChecker"
 SERVICE = "org.google.code.rabbitvcs.RabbitVCS.Checker"
 TIMEOUT = 60*15*100 # seconds
 
+# Number of paths whose last status is remembered to notice changes
+MAX_REMEMBERED_STATUSES = 10000
+
 def find_class(module, name):
     """ Given a module name and a class name, return the actual type object.
     """
@@ -144,6 +148,11 @@ class StatusCheckerService(dbus.service.Object):
         # background
         self.status_checker = StatusChecker()
 
+        # Hashes of the last status returned for each path, and the working
+        # copies to send a StatusesChanged signal for
+        self.last_statuses = {}
+        self.changed_repositories = set()
+
     @dbus.service.method(INTERFACE)
     def ExtraInformation(self):
         return self.status_checker.extra_info()
@@ -173,7 +182,43 @@ class StatusCheckerService(dbus.service.Object):
                                                   summary=summary,
                                                   invalidate=invalidate)
         
-        return self.encoder.encode(status)
+        json_status = self.encoder.encode(status)
+        self.note_status(six.text_type(path), json_status, invalidate)
+        return json_status
+
+    def note_status(self, path, json_status, invalidate):
+        """ Remembers the status returned for path, and schedules a
+        StatusesChanged signal for its working copy if the status changed. A
+        path checked again with invalidate set that was not seen before
+        counts as changed.
+        """
+        previous = self.last_statuses.get(path)
+        current = hash(json_status)
+
+        if len(self.last_statuses) >= MAX_REMEMBERED_STATUSES:
+            self.last_statuses.clear()
+        self.last_statuses[path] = current
+
+        if previous == current or (previous is None and not invalidate):
+            return
+
+        # Send one signal per working copy for a burst of changes
+        if not self.changed_repositories:
+            gobject.idle_add(self.emit_statuses_changed)
+        self.changed_repositories.add(rabbitvcs.vcs.guess(path)["repo_path"])
+
+    def emit_statuses_changed(self):
+        for repo_path in self.changed_repositories:
+            self.StatusesChanged(repo_path)
+        self.changed_repositories.clear()
+        return False
+
+    @dbus.service.signal(INTERFACE, signature='s')
+    def StatusesChanged(self, repo_path):
+        """ Sent when the statuses of the working copy at repo_path changed.
+        Extensions use it to drop menu conditions they cached for it.
+        """
+        pass
 
     @dbus.service.method(INTERFACE, in_signature='as', out_signature='s')
     def GenerateMenuConditions(self, paths):
@@ -184,6 +229,33 @@ class StatusCheckerService(dbus.service.Object):
         path_dict = self.status_checker.generate_menu_conditions(upaths)
         return simplejson.dumps(path_dict)
 
+    @dbus.service.method(INTERFACE, in_signature='ss', out_signature='s',
+                         async_callbacks=('reply_handler', 'error_handler'))
+    def SVNClientCall(self, method, json_args, reply_handler, error_handler):
+        """ Runs a read-only pysvn call (see rabbitvcs.vcs.svn.broker) on the
+        long-lived clients of this service, so that short-lived UI processes
+        can reuse its repository connections and cached credentials.
+
+        The call runs in its own thread so that status checks are not held up
+        by a slow server.
+        """
+        def run():
+            try:
+                import rabbitvcs.vcs.svn.broker
+                svn = self.status_checker.vcs_client.svn()
+                result = rabbitvcs.vcs.svn.broker.execute(svn.client,
+                                                          str(method),
+                                                          six.text_type(json_args))
+            except Exception as ex:
+                log.debug("SVN client call %s failed: %s" % (method, ex))
+                gobject.idle_add(error_handler, ex)
+            else:
+                gobject.idle_add(reply_handler, result)
+
+        thread = threading.Thread(target=run, name="SVNClientCall")
+        thread.daemon = True
+        thread.start()
+
     @dbus.service.method(INTERFACE)
     def CheckVersionOrDie(self, version):
         """
@@ -249,6 +321,15 @@ class StatusCheckerStub:
         self.session_bus = dbus.SessionBus()
         self.decoder = simplejson.JSONDecoder(object_hook=decode_status)
         self.status_checker = None
+
+        # Incremented for a working copy whenever the service reports that
+        # its statuses changed
+        self.status_epochs = {}
+        self.session_bus.add_signal_receiver(self._on_statuses_changed,
+                                             signal_name="StatusesChanged",
+                                             dbus_interface=INTERFACE,
+                                             path=OBJECT_PATH)
+
         self._connect_to_checker()
 
     def _connect_to_checker(self):
@@ -296,6 +377,16 @@ class StatusCheckerStub:
                     self._connect_to_checker()
                     
 
+    def _on_statuses_changed(self, repo_path):
+        repo_path = six.text_type(repo_path)
+        self.status_epochs[repo_path] = self.status_epochs.get(repo_path, 0) + 1
+
+    def get_status_epoch(self, repo_path):
+        """ Returns a number that changes whenever the checker service reports
+        that statuses in the working copy at repo_path changed.
+        """
+        return self.status_epochs.get(repo_path, 0)
+
     def check_status_now(self, path, recurse=False, invalidate=False,
                        summary=False):
         
@@ -372,6 +463,24 @@ class StatusCheckerStub:
         else:
             return self.check_status_now(path, recurse, invalidate, summary)
 
+    def call_svn_client(self, method, json_args):
+        """ Runs a pysvn call in the checker service and returns its encoded
+        result.  Errors are raised so the caller can run the call itself.
+        """
+        if self.status_checker is None:
+            self._connect_to_checker()
+
+        try:
+            return self.status_checker.SVNClientCall(method, json_args,
+                                                     dbus_interface=INTERFACE,
+                                                     timeout=TIMEOUT)
+        except dbus.DBusException as ex:
+            if not (ex.get_dbus_name() or "").startswith(
+                    "org.freedesktop.DBus.Python."):
+                # Not an error raised by the call itself, try to reconnect
+                self._connect_to_checker()
+            raise
+
     def generate_menu_conditions(self, provider, base_dir, paths, callback):
     
         def real_reply_handler(json):
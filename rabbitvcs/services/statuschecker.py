@@ -26,6 +26,9 @@ import rabbitvcs.vcs.status
 
 import simplejson
 
+from rabbitvcs.util.settings import SettingsManager
+settings = SettingsManager()
+
 from rabbitvcs import gettext
 _ = gettext.gettext
 
@@ -43,18 +46,28 @@ class StatusChecker:
         """ Initialises status checker. Obviously. """
         self.vcs_client = rabbitvcs.vcs.create_vcs_instance()
         self.conditions_dict_cache = {}
+        self.fast_status = settings.get("general", "fast_status")
 
     def check_status(self, path, recurse, summary, invalidate):
         """ Performs a status check, blocking until the check is done.
         """
+        if invalidate:
+            rabbitvcs.vcs.invalidate_guess_cache(path)
+
+        if self.fast_status:
+            return self.vcs_client.fast_status(path, summary, invalidate)
+
         path_status = self.vcs_client.status(path, summary, invalidate)
         return path_status
     
     def generate_menu_conditions(self, paths, invalidate=False):
-        from rabbitvcs.util.contextmenu import MainContextMenuConditions
+        from rabbitvcs.util.contextmenu import MainContextMenu, \
+            MainContextMenuConditions, MainContextMenuCallbacks
         
         conditions = MainContextMenuConditions(self.vcs_client, paths)
-        return conditions.path_dict
+        callbacks = MainContextMenuCallbacks(None, None, self.vcs_client, paths)
+        menu = MainContextMenu(None, None, paths, conditions, callbacks)
+        return menu.evaluate_conditions()
     
     def extra_info(self):
         return None
@@ -0,0 +1,151 @@
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Unit tests for the encoding of brokered pysvn calls.
+
+"""
+from __future__ import absolute_import
+
+# make sure the current working copy is in sys.path before anything else
+from os.path import abspath, dirname, join, normpath
+import sys
+toplevel = normpath(join(dirname(abspath(__file__)), '..', '..'))
+sys.path.insert(0, toplevel)
+
+from unittest import TestCase, main
+
+import pysvn
+import simplejson
+
+from rabbitvcs.vcs.svn.broker import encode, decode
+
+
+class FakeDictBase(object):
+    """
+    Shaped like pysvn.PysvnDictBase, the base of the PysvnLog, PysvnList
+    and PysvnInfo results: not a dict, but keeps its values in .data.
+
+    """
+    def __init__(self, value_dict):
+        self.__dict__["data"] = value_dict
+
+    def __getattr__(self, name):
+        try:
+            return self.data[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+    def keys(self):
+        return self.data.keys()
+
+
+def round_trip(value):
+    return decode(simplejson.loads(simplejson.dumps(encode(value))))
+
+
+class BrokerEncodingTest(TestCase):
+    """
+    Tests for encode() and decode().
+
+    """
+    def test_log_entry(self):
+        changed_path = FakeDictBase({
+            "action": u"M",
+            "path": u"/trunk/file",
+            "copyfrom_path": None,
+            "copyfrom_revision": None
+        })
+        entry = FakeDictBase({
+            "revision": pysvn.Revision(pysvn.opt_revision_kind.number, 12),
+            "author": u"someone",
+            "date": 1234567890.5,
+            "message": u"A change",
+            "changed_paths": [changed_path]
+        })
+
+        (result, ) = round_trip([entry])
+        self.assertEqual(result.revision.kind, pysvn.opt_revision_kind.number)
+        self.assertEqual(result.revision.number, 12)
+        self.assertEqual(result.author, u"someone")
+        self.assertEqual(result["date"], 1234567890.5)
+        self.assertEqual(result.data["message"], u"A change")
+        self.assertEqual(result.changed_paths[0].path, u"/trunk/file")
+        self.assertEqual(result.changed_paths[0].copyfrom_path, None)
+
+    def test_list_entry(self):
+        entry = FakeDictBase({
+            "path": u"http://example.com/repo/trunk/file",
+            "kind": pysvn.node_kind.file,
+            "size": 42,
+            "created_rev": pysvn.Revision(pysvn.opt_revision_kind.number, 3)
+        })
+
+        ((result, lock), ) = round_trip([(entry, None)])
+        self.assertEqual(result.kind, pysvn.node_kind.file)
+        self.assertEqual(result.size, 42)
+        self.assertEqual(result.created_rev.number, 3)
+        self.assertEqual(lock, None)
+
+    def test_info(self):
+        info = FakeDictBase({
+            "URL": u"http://example.com/repo/trunk",
+            "rev": pysvn.Revision(pysvn.opt_revision_kind.number, 7),
+            "kind": pysvn.node_kind.dir,
+            "wc_info": None
+        })
+
+        ((path, result), ) = round_trip([(u"trunk", info)])
+        self.assertEqual(path, u"trunk")
+        self.assertEqual(result.URL, u"http://example.com/repo/trunk")
+        self.assertEqual(result.kind, pysvn.node_kind.dir)
+
+    def test_file_contents(self):
+        contents = b"\xff\xfe not UTF-8 \x00\x80"
+        self.assertEqual(round_trip(contents), contents)
+
+    def test_arguments(self):
+        args = [u"http://example.com/repo", {
+            "revision_start": pysvn.Revision(pysvn.opt_revision_kind.head),
+            "depth": pysvn.depth.immediates,
+            "limit": 10,
+            "discover_changed_paths": True
+        }]
+
+        (url, kwargs) = round_trip(args)
+        self.assertEqual(url, u"http://example.com/repo")
+        self.assertEqual(kwargs["revision_start"].kind,
+            pysvn.opt_revision_kind.head)
+        self.assertEqual(kwargs["depth"], pysvn.depth.immediates)
+        self.assertEqual(kwargs["limit"], 10)
+        self.assertEqual(kwargs["discover_changed_paths"], True)
+
+    def test_unknown_type(self):
+        self.assertRaises(TypeError, encode, object())
+
+
+if __name__ == "__main__":
+    main()
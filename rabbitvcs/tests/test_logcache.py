@@ -0,0 +1,141 @@
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Unit tests for the persistent SVN log cache.
+
+"""
+from __future__ import absolute_import
+
+# make sure the current working copy is in sys.path before anything else
+from os.path import abspath, dirname, join, normpath
+import sys
+toplevel = normpath(join(dirname(abspath(__file__)), '..', '..'))
+sys.path.insert(0, toplevel)
+
+import shutil
+import tempfile
+from unittest import TestCase, main
+
+import rabbitvcs.util.helper
+from rabbitvcs.vcs.svn.logcache import RepositoryLogCache
+
+
+def make_entry(revision, changed_paths=None):
+    if changed_paths is None:
+        changed_paths = [("/trunk/file%d" % revision, "M", None, None)]
+    return (revision, "author%d" % revision, 1000.0 + revision,
+        "message %d" % revision, changed_paths)
+
+
+class RepositoryLogCacheTest(TestCase):
+    """
+    Tests for RepositoryLogCache.
+
+    """
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.old_get_cache_folder = rabbitvcs.util.helper.get_cache_folder
+        rabbitvcs.util.helper.get_cache_folder = lambda: self.folder
+        self.cache = RepositoryLogCache("test-uuid")
+
+    def tearDown(self):
+        self.cache.connection.close()
+        rabbitvcs.util.helper.get_cache_folder = self.old_get_cache_folder
+        shutil.rmtree(self.folder)
+
+    def test_empty(self):
+        self.assertEqual(self.cache.get_range("/trunk"), None)
+        self.assertEqual(self.cache.get_entries("/trunk", 10, 1), [])
+        self.assertEqual(self.cache.get_revision_numbers("/trunk", 10, 1), [])
+
+    def test_add_and_get(self):
+        entries = [make_entry(5), make_entry(3)]
+        self.cache.add("/trunk", entries, 6, 1)
+
+        self.assertEqual(self.cache.get_range("/trunk"), (6, 1))
+        self.assertEqual(self.cache.get_revision_numbers("/trunk", 6, 1), [5, 3])
+
+        cached = self.cache.get_entries("/trunk", 6, 1)
+        self.assertEqual(len(cached), 2)
+        self.assertEqual(cached[0][0], 5)
+        self.assertEqual(cached[0][1], "author5")
+        self.assertEqual(cached[0][3], "message 5")
+        self.assertEqual(cached[0][4], [("/trunk/file5", "M", None, None)])
+
+    def test_entries_between_revisions(self):
+        self.cache.add("/trunk", [make_entry(r) for r in (9, 7, 4, 2)], 10, 1)
+        self.assertEqual(
+            [entry[0] for entry in self.cache.get_entries("/trunk", 8, 3)],
+            [7, 4])
+        self.assertEqual(
+            [entry[0] for entry in self.cache.get_entries("/trunk", 10, 1, limit=3)],
+            [9, 7, 4])
+
+    def test_copies_are_kept(self):
+        changed_paths = [("/branches/b", "A", "/trunk", 3)]
+        self.cache.add("/branches/b", [make_entry(4, changed_paths)], 4, 4)
+        self.assertEqual(self.cache.get_entries("/branches/b", 4, 4)[0][4],
+            changed_paths)
+
+    def test_paths_share_revisions(self):
+        self.cache.add("/trunk", [make_entry(5), make_entry(3)], 5, 1)
+        self.cache.add("/trunk/file5", [make_entry(5)], 5, 1)
+        self.assertEqual(self.cache.get_revision_numbers("/trunk/file5", 5, 1), [5])
+
+        # The revision is only stored once
+        (count, ) = self.cache.connection.execute(
+            "SELECT COUNT(*) FROM changed_paths WHERE revision = 5").fetchone()
+        self.assertEqual(count, 1)
+
+    def test_adjacent_ranges_are_merged(self):
+        self.cache.add("/trunk", [make_entry(10)], 12, 8)
+        self.cache.add("/trunk", [make_entry(6)], 7, 3)
+        self.assertEqual(self.cache.get_range("/trunk"), (12, 3))
+
+        self.cache.add("/trunk", [make_entry(14)], 15, 13)
+        self.assertEqual(self.cache.get_range("/trunk"), (15, 3))
+
+    def test_separate_ranges_start_over(self):
+        self.cache.add("/trunk", [make_entry(10)], 12, 8)
+        self.cache.add("/trunk", [make_entry(30)], 31, 25)
+        self.assertEqual(self.cache.get_range("/trunk"), (31, 25))
+
+    def test_update_revision(self):
+        self.cache.add("/trunk", [make_entry(5)], 5, 5)
+        self.cache.update_revision(5, author="someone", message="changed")
+        entry = self.cache.get_entries("/trunk", 5, 5)[0]
+        self.assertEqual(entry[1], "someone")
+        self.assertEqual(entry[3], "changed")
+
+    def test_persistence(self):
+        self.cache.add("/trunk", [make_entry(5)], 5, 1)
+        self.cache.connection.close()
+
+        self.cache = RepositoryLogCache("test-uuid")
+        self.assertEqual(self.cache.get_range("/trunk"), (5, 1))
+        self.assertEqual(self.cache.get_revision_numbers("/trunk", 5, 1), [5])
+
+
+if __name__ == "__main__":
+    main()
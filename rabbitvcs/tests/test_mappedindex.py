@@ -0,0 +1,147 @@
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Unit tests for the memory-mapped git index reader.
+
+"""
+from __future__ import absolute_import
+
+# make sure the current working copy is in sys.path before anything else
+from os.path import abspath, dirname, join, normpath
+import sys
+toplevel = normpath(join(dirname(abspath(__file__)), '..', '..'))
+sys.path.insert(0, toplevel)
+
+import os
+import shutil
+import struct
+import tempfile
+from binascii import hexlify
+from unittest import TestCase, main
+
+from rabbitvcs.vcs.git.gittyup.exceptions import IndexFormatError
+from rabbitvcs.vcs.git.gittyup.mappedindex import (MappedIndex,
+    open_mapped_index, ENTRY_FORMAT)
+
+
+def make_entry(name, number):
+    """Packs an index entry whose fields are all derived from number."""
+    sha = struct.pack(">L", number) * 5
+    flags = len(name) & 0xfff
+    data = struct.pack(ENTRY_FORMAT, number, 1, number + 1, 2, 3, number + 4,
+        0o100644, 5, 6, number * 10, sha, flags) + name
+    # NUL terminated and padded to a multiple of eight bytes
+    return data + b"\0" * (8 - len(data) % 8)
+
+
+def write_index(path, names, version=2):
+    data = b"DIRC" + struct.pack(">LL", version, len(names))
+    for (number, name) in enumerate(names):
+        data += make_entry(name, number + 1)
+    with open(path, "wb") as index_file:
+        index_file.write(data)
+
+
+class MappedIndexTest(TestCase):
+    """
+    Tests for MappedIndex and open_mapped_index().
+
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "index")
+        self.names = [b"README", b"src/a.py", b"src/b.py", b"src/sub/longer_name.txt"]
+        write_index(self.path, self.names)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_names(self):
+        index = MappedIndex(self.path)
+        self.assertEqual(list(index), self.names)
+        self.assertEqual(list(index.paths()), self.names)
+        self.assertEqual(len(index), len(self.names))
+
+    def test_lookup(self):
+        index = MappedIndex(self.path)
+        entry = index[b"src/a.py"]
+        self.assertEqual(entry[0], (2, 1))
+        self.assertEqual(entry[1], (3, 2))
+        self.assertEqual(entry[4], 0o100644)
+        self.assertEqual(entry[7], 20)
+        self.assertEqual(entry[8], hexlify(struct.pack(">L", 2) * 5))
+        self.assertEqual(index.get_sha1(b"src/a.py"), entry[8])
+        self.assertEqual(index.get_mode(b"src/a.py"), 0o100644)
+
+    def test_text_names(self):
+        index = MappedIndex(self.path)
+        self.assertTrue(u"src/b.py" in index)
+        self.assertEqual(index[u"src/b.py"], index[b"src/b.py"])
+
+    def test_missing(self):
+        index = MappedIndex(self.path)
+        self.assertFalse(b"src" in index)
+        self.assertFalse(b"zzz" in index)
+        self.assertRaises(KeyError, index.__getitem__, b"src/c.py")
+
+    def test_iterblobs(self):
+        index = MappedIndex(self.path)
+        blobs = list(index.iterblobs())
+        self.assertEqual([name for (name, sha, mode) in blobs], self.names)
+        self.assertEqual(blobs[0][1], index.get_sha1(b"README"))
+
+    def test_empty_file(self):
+        open(self.path, "wb").close()
+        index = MappedIndex(self.path)
+        self.assertEqual(len(index), 0)
+        self.assertFalse(b"README" in index)
+
+    def test_unsupported_version(self):
+        write_index(self.path, self.names, version=4)
+        self.assertRaises(IndexFormatError, MappedIndex, self.path)
+
+    def test_bad_signature(self):
+        with open(self.path, "wb") as index_file:
+            index_file.write(b"XXXX" + struct.pack(">LL", 2, 0))
+        self.assertRaises(IndexFormatError, MappedIndex, self.path)
+
+    def test_open_reuses_view(self):
+        index = open_mapped_index(self.path)
+        self.assertTrue(open_mapped_index(self.path) is index)
+
+    def test_open_rereads_rewritten_file(self):
+        index = open_mapped_index(self.path)
+
+        # Git renames a new file over the index, like this
+        new_path = self.path + ".lock"
+        write_index(new_path, self.names + [b"zz_new"])
+        os.rename(new_path, self.path)
+
+        reopened = open_mapped_index(self.path)
+        self.assertFalse(reopened is index)
+        self.assertTrue(b"zz_new" in reopened)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Unit tests for rabbitvcs.util.paths.
+
+"""
+from __future__ import absolute_import
+
+# make sure the current working copy is in sys.path before anything else
+from os.path import abspath, dirname, join, normpath
+import sys
+toplevel = normpath(join(dirname(abspath(__file__)), '..', '..'))
+sys.path.insert(0, toplevel)
+
+import os
+import tempfile
+from unittest import TestCase, main
+
+from rabbitvcs.util.paths import get_relative_path
+
+
+class GetRelativePathTest(TestCase):
+    """
+    Tests for get_relative_path().
+
+    """
+    def test_under_base(self):
+        self.assertEqual(get_relative_path("/repo", "/repo/a/b.txt"), "a/b.txt")
+        self.assertEqual(get_relative_path("/repo/", "/repo/a"), "a")
+
+    def test_same_path(self):
+        self.assertEqual(get_relative_path("/repo", "/repo"), "")
+        self.assertEqual(get_relative_path("/repo", "/repo/"), "")
+
+    def test_outside_base(self):
+        self.assertEqual(get_relative_path("/repo/a/b", "/repo/c"), "../../c")
+        self.assertEqual(get_relative_path("/repo", "/other/file"),
+            "../other/file")
+
+    def test_prefix_is_not_parent(self):
+        """A sibling sharing the base's name as a prefix is not under it."""
+        self.assertEqual(get_relative_path("/repo", "/repository/a"),
+            "../repository/a")
+
+    def test_root_base(self):
+        self.assertEqual(get_relative_path("/", "/a/b"), "a/b")
+        self.assertEqual(get_relative_path("/", "/"), "")
+        self.assertEqual(get_relative_path("/a", "/"), "..")
+
+    def test_absolute_paths_are_normalized(self):
+        self.assertEqual(get_relative_path("/repo/./a/..", "/repo//b"), "b")
+        self.assertEqual(get_relative_path("/repo", "/repo/a/../b"), "b")
+
+    def test_relative_paths_are_not_resolved(self):
+        """Relative paths are compared as given, whatever the cwd is."""
+        self.assertEqual(get_relative_path("a/b", "a/b/c"), "c")
+        self.assertEqual(get_relative_path("a/b", "a/d"), "../d")
+        self.assertEqual(get_relative_path("a", "a"), "")
+
+    def test_results_do_not_depend_on_cwd(self):
+        cwd = os.getcwd()
+        directory = tempfile.mkdtemp()
+        try:
+            first = get_relative_path("repo", "repo/a")
+            absolute = get_relative_path("/repo", "/repo/a")
+            os.chdir(directory)
+            self.assertEqual(get_relative_path("repo", "repo/a"), first)
+            self.assertEqual(get_relative_path("/repo", "/repo/a"), absolute)
+        finally:
+            os.chdir(cwd)
+            os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Unit tests for the git tree cache.
+
+"""
+from __future__ import absolute_import
+
+# make sure the current working copy is in sys.path before anything else
+from os.path import abspath, dirname, join, normpath
+import sys
+toplevel = normpath(join(dirname(abspath(__file__)), '..', '..'))
+sys.path.insert(0, toplevel)
+
+from unittest import TestCase, main
+
+from dulwich.objects import Blob, Tree
+from dulwich.object_store import MemoryObjectStore
+
+from rabbitvcs.vcs.git.gittyup.treecache import TreeIndexCache
+
+
+class CountingObjectStore(MemoryObjectStore):
+    """
+    An in-memory object store that counts how often each object is read.
+
+    """
+    def __init__(self):
+        MemoryObjectStore.__init__(self)
+        self.reads = {}
+
+    def __getitem__(self, sha):
+        self.reads[sha] = self.reads.get(sha, 0) + 1
+        return MemoryObjectStore.__getitem__(self, sha)
+
+
+class TreeIndexCacheTest(TestCase):
+    """
+    Tests for TreeIndexCache.
+
+    """
+    def setUp(self):
+        self.store = CountingObjectStore()
+        self.blob = self._add(Blob.from_string(b"contents"))
+        self.other_blob = self._add(Blob.from_string(b"other"))
+
+        self.sub = self._tree([(b"f.txt", 0o100644, self.blob.id)])
+        self.lib = self._tree([
+            (b"sub", 0o40000, self.sub.id),
+            (b"g.txt", 0o100644, self.blob.id)
+        ])
+        self.root = self._tree([
+            (b"lib", 0o40000, self.lib.id),
+            (b"README", 0o100644, self.other_blob.id)
+        ])
+
+    def _add(self, obj):
+        self.store.add_object(obj)
+        return obj
+
+    def _tree(self, entries):
+        tree = Tree()
+        for (name, mode, sha) in entries:
+            tree.add(name, mode, sha)
+        return self._add(tree)
+
+    def test_flatten(self):
+        flattened = TreeIndexCache().flatten(self.store, self.root.id)
+        self.assertEqual(flattened, {
+            b"README": (0o100644, self.other_blob.id),
+            b"lib/g.txt": (0o100644, self.blob.id),
+            b"lib/sub/f.txt": (0o100644, self.blob.id)
+        })
+
+    def test_lookup(self):
+        flattened = TreeIndexCache().flatten(self.store, self.root.id)
+        self.assertEqual(flattened[b"lib/g.txt"], (0o100644, self.blob.id))
+        self.assertTrue(b"README" in flattened)
+        self.assertEqual(flattened.get(b"missing", "default"), "default")
+
+    def test_directories_are_not_entries(self):
+        flattened = TreeIndexCache().flatten(self.store, self.root.id)
+        self.assertFalse(b"lib" in flattened)
+        self.assertFalse(b"lib/sub" in flattened)
+        self.assertFalse(b"README/x" in flattened)
+        self.assertRaises(KeyError, flattened.__getitem__, b"lib/sub")
+
+    def test_empty_tree(self):
+        empty = self._tree([])
+        self.assertEqual(TreeIndexCache().flatten(self.store, empty.id), {})
+
+    def test_trees_are_read_once(self):
+        cache = TreeIndexCache()
+        first = cache.flatten(self.store, self.root.id)
+        self.assertTrue(cache.flatten(self.store, self.root.id) is first)
+        self.assertEqual(self.store.reads[self.root.id], 1)
+        self.assertEqual(self.store.reads[self.sub.id], 1)
+
+    def test_unchanged_subtrees_are_shared(self):
+        cache = TreeIndexCache()
+        cache.flatten(self.store, self.root.id)
+
+        # A new commit that only changes README
+        new_root = self._tree([
+            (b"lib", 0o40000, self.lib.id),
+            (b"README", 0o100644, self.blob.id)
+        ])
+        flattened = cache.flatten(self.store, new_root.id)
+        self.assertEqual(flattened[b"README"], (0o100644, self.blob.id))
+        self.assertEqual(len(flattened), 3)
+        self.assertEqual(self.store.reads[self.lib.id], 1)
+        self.assertEqual(self.store.reads[self.sub.id], 1)
+
+    def test_size(self):
+        cache = TreeIndexCache()
+        cache.flatten(self.store, self.root.id)
+        self.assertEqual(len(cache.trees), 3)
+        self.assertEqual(cache.size, 1 + 2 + 3)
+
+    def test_eviction(self):
+        cache = TreeIndexCache(max_entries=4)
+        cache.flatten(self.store, self.root.id)
+
+        # The whole tree is kept until it is done, then the oldest go
+        self.assertEqual(list(cache.trees.keys()), [self.root.id])
+
+        new_root = self._tree([(b"lib", 0o40000, self.lib.id)])
+        flattened = cache.flatten(self.store, new_root.id)
+        self.assertEqual(sorted(flattened), [b"lib/g.txt", b"lib/sub/f.txt"])
+        self.assertTrue(new_root.id in cache.trees)
+        self.assertFalse(self.root.id in cache.trees)
+        self.assertTrue(cache.size <= 4)
+
+    def test_clear(self):
+        cache = TreeIndexCache()
+        cache.flatten(self.store, self.root.id)
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(len(cache.trees), 0)
+
+
+if __name__ == "__main__":
+    main()
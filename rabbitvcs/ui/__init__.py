@@ -261,5 +261,11 @@ def main(allowed_options=None, description=None, usage=None):
         
     if parser.has_option("--base-dir") and not options.base_dir: 
         options.base_dir = get_common_directory(paths)
+
+    # Dialogs are short-lived, so let the checker service keep the
+    # repository sessions
+    from rabbitvcs.util.settings import SettingsManager
+    if SettingsManager().get("general", "share_svn_sessions"):
+        rabbitvcs.vcs.use_session_broker = True
         
     return (options, paths)
@@ -44,6 +44,9 @@ _ = gettext.gettext
 
 DATETIME_FORMAT = rabbitvcs.util.helper.LOCAL_DATETIME_FORMAT
 
+# Number of annotated lines to add to the table at a time while loading
+STREAM_CHUNK_SIZE = 500
+
 class Annotate(InterfaceView):
     """
     Provides a UI interface to annotate items in the repository or
@@ -163,28 +166,38 @@ class SVNAnnotate(Annotate):
         self.action.append(self.enable_saveas)
         self.action.start()
 
+    def format_date(self, datestr):
+        # Every line of a revision carries the same date string, so only
+        # parse each one once
+        try:
+            return self.dates[datestr]
+        except KeyError:
+            pass
+
+        # remove fractional seconds and timezone information from 
+        # the end of the string provided by pysvn:
+        # * timezone should be always "Z" (for UTC), "%Z" is not yet
+        #   yet supported by strptime
+        # * fractional could be parsed with "%f" since python 2.6 
+        #   but this precision is not needed anyway 
+        # * the datetime module does not include strptime until python 2.4
+        #   so this workaround is required for now
+        date = datetime(*time.strptime(datestr[0:-8],"%Y-%m-%dT%H:%M:%S")[:-2])
+        self.dates[datestr] = rabbitvcs.util.helper.format_datetime(date)
+        return self.dates[datestr]
+
     @gtk_unsafe
     def populate_table(self):
         blamedict = self.action.get_result(0)
 
+        self.dates = {}
         self.table.clear()
         for item in blamedict:            
-            # remove fractional seconds and timezone information from 
-            # the end of the string provided by pysvn:
-            # * timezone should be always "Z" (for UTC), "%Z" is not yet
-            #   yet supported by strptime
-            # * fractional could be parsed with "%f" since python 2.6 
-            #   but this precision is not needed anyway 
-            # * the datetime module does not include strptime until python 2.4
-            #   so this workaround is required for now
-            datestr = item["date"][0:-8]
-            date = datetime(*time.strptime(datestr,"%Y-%m-%dT%H:%M:%S")[:-2])
-                
             self.table.append([
                 item["number"],
                 item["revision"].number,
                 item["author"],
-                rabbitvcs.util.helper.format_datetime(date),
+                self.format_date(item["date"]),
                 item["line"]
             ])
             
@@ -193,14 +206,11 @@ class SVNAnnotate(Annotate):
         
         text = ""
         for item in blamedict:
-            datestr = item["date"][0:-8]
-            date = datetime(*time.strptime(datestr,"%Y-%m-%dT%H:%M:%S")[:-2])
-            
             text += "%s\t%s\t%s\t%s\t%s\n" % (
                 item["number"],
                 item["revision"].number,
                 item["author"],
-                rabbitvcs.util.helper.format_datetime(date),
+                self.format_date(item["date"]),
                 item["line"]
             )
         
@@ -243,34 +253,54 @@ class GitAnnotate(Annotate):
             notification=False
         )    
 
-        self.action.append(
-            self.git.annotate,
-            self.path,
-            to_rev
-        )
-        self.action.append(self.populate_table)
+        self.action.append(self.clear_table)
+        self.action.append(self.populate_table, to_rev)
         self.action.append(self.enable_saveas)
         self.action.start()
 
     @gtk_unsafe
-    def populate_table(self):
-        blamedict = self.action.get_result(0)
-
+    def clear_table(self):
+        self.blamedict = []
+        self.dates = {}
         self.table.clear()
-        for item in blamedict:
+
+    def populate_table(self, revision):
+        """
+        Adds rows to the table in chunks while git blame is still running,
+        so large files show up progressively.
+
+        """
+
+        chunk = []
+        for item in self.git.annotate_iter(self.path, revision):
+            self.blamedict.append(item)
+            chunk.append(item)
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                self.append_rows(chunk)
+                chunk = []
+
+        if chunk:
+            self.append_rows(chunk)
+
+    @gtk_unsafe
+    def append_rows(self, items):
+        for item in items:
+            # Only format the date once per commit
+            revision = item["revision"]
+            if revision not in self.dates:
+                self.dates[revision] = rabbitvcs.util.helper.format_datetime(item["date"])
+
             self.table.append([
                 item["number"],
-                item["revision"][:7],
+                revision[:7],
                 item["author"],
-                rabbitvcs.util.helper.format_datetime(item["date"]),
+                self.dates[revision],
                 item["line"]
             ])
             
     def generate_string_from_result(self):
-        blamedict = self.action.get_result(0)
-        
         text = ""
-        for item in blamedict:
+        for item in self.blamedict:
             text += "%s\t%s\t%s\t%s\t%s\n" % (
                 item["number"],
                 item["revision"][:7],
@@ -83,6 +83,7 @@ class SVNBrowser(InterfaceView, GtkContextMenuCaller):
         )
 
         self.items = []
+        self.item_kinds = {}
         self.list_table = rabbitvcs.ui.widget.Table(
             self.get_widget("list"), 
             [rabbitvcs.ui.widget.TYPE_PATH, gobject.TYPE_INT, 
@@ -129,29 +130,56 @@ class SVNBrowser(InterfaceView, GtkContextMenuCaller):
             rabbitvcs.util.helper.save_repository_path(url)
             self.load()
 
-    def load(self):
+    def load(self, invalidate=False):
         self.url = self.urls.get_active_text()
         self.action = rabbitvcs.ui.action.SVNAction(
             self.svn,
             notification=False
         )
         revision = self.revision_selector.get_revision_object()
-        self.action.append(
-                        self.svn.list,
-                        rabbitvcs.util.helper.quote_url(self.url), 
-                        revision=revision, recurse=False)
         self.action.append(self.init_repo_root_url)
-        self.action.append(self.populate_table, 0)
+        self.action.append(
+            self.populate_table,
+            rabbitvcs.util.helper.quote_url(self.url),
+            revision,
+            invalidate
+        )
         self.action.start()
 
+    def populate_table(self, url, revision, invalidate=False):
+        """
+        Fills the table a page at a time so large directories stay
+        responsive while they are being shown.  This runs in the action's
+        thread, so the revision has to be read from the revision selector
+        beforehand, on the main thread.
+
+        """
+
+        self.clear_table()
+        first_page = True
+        for page in self.svn.list_pages(url, revision=revision,
+                invalidate=invalidate):
+            # The first item is the listed directory itself
+            self.append_rows(page, skip_first=first_page)
+            first_page = False
+
     @gtk_unsafe
-    def populate_table(self, item_index=0):
+    def clear_table(self):
         self.list_table.clear()
-        self.items = self.action.get_result(item_index)
-        self.items.sort(self.sort_files)
-        
+        self.items = []
+        self.item_kinds = {}
         self.list_table.append(["..", 0, 0, "", 0])
-        for item,locked in self.items[1:]:
+
+    @gtk_unsafe
+    def append_rows(self, items, skip_first=False):
+        for item,locked in items:
+            self.items.append((item, locked))
+            self.item_kinds[item.path] = self.svn.NODE_KINDS_REVERSE[item.kind]
+
+        if skip_first:
+            items = items[1:]
+
+        for item,locked in items:
             self.list_table.append([
                 item.path,
                 item.created_rev.number,
@@ -167,7 +195,7 @@ class SVNBrowser(InterfaceView, GtkContextMenuCaller):
 
     def on_refresh_clicked(self, widget):
         rabbitvcs.util.helper.save_repository_path(self.urls.get_active_text())
-        self.load()
+        self.load(invalidate=True)
 
     def on_row_activated(self, treeview, data, col):
         path = self.list_table.get_selected_row_items(0)[0]
@@ -196,25 +224,7 @@ class SVNBrowser(InterfaceView, GtkContextMenuCaller):
         if filename == "..":
             return "dir"
 
-        for item,locked in self.items:
-            if item.path == filename:
-                return self.svn.NODE_KINDS_REVERSE[item.kind]
-        return None
-
-    def sort_files(self, x, y):
-        """
-        Sort the browser listing so that folders are on top and then sort
-        alphabetically.
-
-        """
-        xkind = self.svn.NODE_KINDS_REVERSE[x[0].kind]
-        ykind = self.svn.NODE_KINDS_REVERSE[y[0].kind]
-        if xkind == "dir" and ykind == "dir":
-            return cmp(x[0].repos_path, y[0].repos_path)
-        elif xkind == "dir" and ykind == "file":
-            return -1
-        else:
-            return 1
+        return self.item_kinds.get(filename)
 
     def file_filter(self, row, column, user_data=None):
         """
@@ -485,8 +495,8 @@ class BrowserContextMenuCallbacks:
             notification=False
         )
         self.caller.action.append(self.svn.move, self.paths[0], new_url)
-        self.caller.action.append(self.svn.list, path_to_refresh, recurse=False)
-        self.caller.action.append(self.caller.populate_table, 1)
+        self.caller.action.append(self.caller.populate_table, path_to_refresh,
+            self.__get_browser_revision(), invalidate=True)
         self.caller.action.start()
     
     def delete(self, data=None, user_data=None):
@@ -503,8 +513,8 @@ class BrowserContextMenuCallbacks:
             notification=False
         )
         self.caller.action.append(self.svn.remove, self.paths)
-        self.caller.action.append(self.svn.list, path_to_refresh, recurse=False)
-        self.caller.action.append(self.caller.populate_table, 1)
+        self.caller.action.append(self.caller.populate_table, path_to_refresh,
+            self.__get_browser_revision(), invalidate=True)
         self.caller.action.start()  
 
     def create_repository_folder(self, data=None, user_data=None):
@@ -522,8 +532,8 @@ class BrowserContextMenuCallbacks:
             notification=False
         )
         self.caller.action.append(self.svn.mkdir, new_url, log_message)
-        self.caller.action.append(self.svn.list, self.paths[0], recurse=False)
-        self.caller.action.append(self.caller.populate_table, 1)
+        self.caller.action.append(self.caller.populate_table, self.paths[0],
+            self.__get_browser_revision(), invalidate=True)
         self.caller.action.start()        
 
     def browser_copy_to(self, data=None, user_data=None):
@@ -548,8 +558,8 @@ class BrowserContextMenuCallbacks:
             notification=False
         )
         self.caller.action.append(self.svn.copy_all, sources, new_url, copy_as_child=True)
-        self.caller.action.append(self.svn.list, self.caller.get_url(), recurse=False)
-        self.caller.action.append(self.caller.populate_table, 1)
+        self.caller.action.append(self.caller.populate_table, self.caller.get_url(),
+            self.__get_browser_revision(), invalidate=True)
         self.caller.action.start()
 
     def browser_copy_url_to_clipboard(self, data=None, user_data=None):
@@ -575,8 +585,8 @@ class BrowserContextMenuCallbacks:
             notification=False
         )
         self.caller.action.append(self.svn.move_all, self.paths, new_url, move_as_child=True)
-        self.caller.action.append(self.svn.list, self.caller.get_url(), recurse=False)
-        self.caller.action.append(self.caller.populate_table, 1)
+        self.caller.action.append(self.caller.populate_table, self.caller.get_url(),
+            self.__get_browser_revision(), invalidate=True)
         self.caller.action.start()
 
 class BrowserContextMenu:
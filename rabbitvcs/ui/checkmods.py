@@ -80,7 +80,8 @@ class SVNCheckForModifications(InterfaceView):
         if self.notebook.get_current_page() == 0:
             self.local_mods.refresh()
         else:
-            self.remote_mods.refresh()
+            # An explicit refresh asks the repository again
+            self.remote_mods.refresh(invalidate=True)
 
     def on_notebook_switch_page(self, page, data, page_num):
         if page_num == 1 and self.remote_refreshed == False:
@@ -194,20 +195,29 @@ class SVNCheckRemoteModifications(GtkContextMenuCaller):
             paths = self.files_table.get_selected_row_items(0)
             CheckRemoteModsContextMenu(self, data, self.base_dir, self.vcs, paths).show()
 
-    def refresh(self):
+    def refresh(self, invalidate=False):
         self.action = rabbitvcs.ui.action.SVNAction(
             self.svn,
             notification=False
         )
-        self.action.append(self.svn.get_remote_updates, self.paths)
-        self.action.append(self.populate_files_table)
+        self.action.append(self.clear_files_table)
+        self.action.append(self.load_remote_updates, invalidate)
         self.action.start()
 
     @gtk_unsafe
-    def populate_files_table(self):
+    def clear_files_table(self):
         self.files_table.clear()
-        self.items = self.action.get_result(0)
-        for item in self.items:
+        self.items = []
+
+    def load_remote_updates(self, invalidate):
+        # Each working copy's results are shown as soon as they arrive
+        for items in self.svn.iter_remote_updates(self.paths, invalidate):
+            self.populate_files_table(items)
+
+    @gtk_unsafe
+    def populate_files_table(self, items):
+        self.items += items
+        for item in items:
             revision = -1
             author = ""
 
@@ -245,7 +255,8 @@ class SVNCheckRemoteModifications(GtkContextMenuCaller):
         self.action.start()
 
     def on_context_menu_command_finished(self):
-        self.refresh()
+        # The command (e.g. an update) changed what is out of date
+        self.refresh(invalidate=True)
 
 class MenuViewDiff(MenuItem):
     identifier = "RabbitVCS::View_Diff"
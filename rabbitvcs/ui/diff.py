@@ -176,7 +176,7 @@ class SVNDiff(Diff):
         else:
             dest1 = self._build_export_path(1, self.revision1, self.path1)
             action.run_single(
-                self.svn.export, 
+                self.svn.export_file, 
                 self.path1, 
                 dest1, 
                 self.revision1
@@ -188,7 +188,7 @@ class SVNDiff(Diff):
         else:
             dest2 = self._build_export_path(2, self.revision2, self.path2)
             action.run_single(
-                self.svn.export, 
+                self.svn.export_file, 
                 self.path2, 
                 dest2, 
                 self.revision2
@@ -135,6 +135,7 @@ class Log(InterfaceView):
         self.rev_end = None
         self.rev_max = 1
         self.previous_starts = []
+        self.revision_items = []
         self.initialize_revision_labels()
         self.revision_number_column = 0
         self.head_row = 0
@@ -363,7 +364,11 @@ class SVNLog(Log):
         Log.__init__(self, path)
                 
         self.svn = self.vcs.svn()
-        self.merge_candidate_revisions = merge_candidate_revisions
+
+        # Looked up once for every row shown
+        self.merge_candidate_revisions = None
+        if merge_candidate_revisions is not None:
+            self.merge_candidate_revisions = set(merge_candidate_revisions)
 
         self.revisions_table = rabbitvcs.ui.widget.Table(
             self.get_widget("revisions_table"),
@@ -424,20 +429,28 @@ class SVNLog(Log):
         
         """
         
-        self.revision_items = []
         self.revisions_table.clear()
         self.message.set_text("")
         self.paths_table.clear()
         
         if self.rev_start and self.cache.has(self.rev_start):
             self.revision_items = self.cache.get(self.rev_start)
-        else:
-            # Make sure the int passed is the order the log call was made
-            self.revision_items = self.action.get_result(0)
 
         if not self.revision_items or len(self.revision_items) == 0:
             return
         
+        self.update_revision_range()
+        self.cache.set(self.rev_start, self.revision_items)
+
+        self.display_items = []
+        self.stopped_on_copy = False
+        self.display_revision_items(self.revision_items)
+
+        self.check_previous_sensitive()
+        self.check_next_sensitive()
+        self.set_loading(False)
+
+    def update_revision_range(self):
         # Get the starting/ending point from the actual returned revisions
         self.rev_start = six.text_type(self.revision_items[0].revision)
         self.rev_end = six.text_type(self.revision_items[-1].revision)
@@ -445,16 +458,25 @@ class SVNLog(Log):
         if not self.rev_first:
             self.rev_first = self.rev_start
         
-        self.cache.set(self.rev_start, self.revision_items)
-        
         # The first time the log items return, the rev_start will be as large
         # as it will ever be.  So set this to our maximum revision.
         if self.rev_start > self.rev_max:
             self.rev_max = self.rev_start
-        
-        self.display_items = []
 
-        for item in self.revision_items:
+        self.set_start_revision(self.rev_start)
+        self.set_end_revision(self.rev_end)
+
+    def display_revision_items(self, items):
+        """
+        Adds the items that match the filter to the table, up to the first
+        copy when stopping on copies.
+
+        """
+
+        for item in items:
+            if self.stopped_on_copy:
+                return
+
             msg = cgi.escape(item.message).lower()
 
             should_add = not self.filter_text
@@ -463,16 +485,11 @@ class SVNLog(Log):
             should_add = should_add or str(item.revision).lower().find(self.filter_text) > -1
             should_add = should_add or str(item.date).lower().find(self.filter_text) > -1
 
-            if should_add:
-                self.display_items.append(item)
+            if not should_add:
+                continue
 
-        self.set_start_revision(self.rev_start)
-        self.set_end_revision(self.rev_end)
-
-        self.check_previous_sensitive()
-        self.check_next_sensitive()
+            self.display_items.append(item)
 
-        for item in self.display_items:
             msg = cgi.escape(rabbitvcs.util.helper.format_long_text(item.message, 80))
             rev = item.revision
             color = "#000000"
@@ -487,10 +504,8 @@ class SVNLog(Log):
             if self.stop_on_copy:
                 for path in item.changed_paths:
                     if path.copy_from_path or path.copy_from_revision:
-                        self.set_loading(False)
-                        return
-
-        self.set_loading(False)
+                        self.stopped_on_copy = True
+                        break
 
     def populate_table(self, revision, author, date, msg, color):
         self.revisions_table.append([
@@ -514,16 +529,46 @@ class SVNLog(Log):
         if self.rev_start:
             start = self.svn.revision("number", number=self.rev_start)
 
-        self.action.append(
-            self.svn.log, 
-            self.path,
-            revision_start=start,
-            limit=self.limit,
-            discover_changed_paths=True
-        )
-        self.action.append(self.refresh)
+        self.action.append(self.clear_revisions)
+        self.action.append(self.stream_log, start)
+        self.action.append(self.finish_loading)
         self.action.start()
 
+    @gtk_unsafe
+    def clear_revisions(self):
+        self.revision_items = []
+        self.display_items = []
+        self.stopped_on_copy = False
+        self.revisions_table.clear()
+        self.message.set_text("")
+        self.paths_table.clear()
+
+    def stream_log(self, start):
+        """
+        Shows each page of log items as soon as it arrives.  Pages already
+        in the log cache come back without waiting on the server.
+
+        """
+
+        for page in self.svn.log_pages(self.path, revision_start=start,
+                limit=self.limit, discover_changed_paths=True):
+            self.show_log_page(page)
+
+    @gtk_unsafe
+    def show_log_page(self, items):
+        self.revision_items += items
+        self.update_revision_range()
+        self.display_revision_items(items)
+
+    @gtk_unsafe
+    def finish_loading(self):
+        if self.revision_items:
+            self.cache.set(self.rev_start, self.revision_items)
+
+        self.check_previous_sensitive()
+        self.check_next_sensitive()
+        self.set_loading(False)
+
     def edit_revprop(self, prop_name, prop_value, callback=None):
 
         failure = False
@@ -0,0 +1,303 @@
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+
+Size-bounded on-disk caches.
+
+"""
+from __future__ import absolute_import
+
+import os
+import os.path
+import shutil
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+
+import simplejson
+
+import rabbitvcs.util.helper
+
+from rabbitvcs.util.log import Log
+log = Log("rabbitvcs.util.cache")
+
+# 50MB
+DEFAULT_MAX_SIZE = 50 * 1024 * 1024
+
+def encode_value(value):
+    """
+    Encodes the values JSON has no type for.  Only datetimes are supported,
+    for the dates in annotations.
+
+    """
+
+    if isinstance(value, datetime):
+        return {"__datetime__": [value.year, value.month, value.day,
+            value.hour, value.minute, value.second, value.microsecond]}
+
+    raise TypeError("Cannot store %r in the cache" % value)
+
+def decode_value(json_dict):
+    if "__datetime__" in json_dict:
+        return datetime(*json_dict["__datetime__"])
+    return json_dict
+
+class DiskCache:
+    """
+    Stores values on disk as JSON, one file per key, under the RabbitVCS
+    cache folder.  Values can be anything JSON can hold, plus datetimes;
+    tuples come back as lists.  Nothing is ever unpickled, so a tampered
+    cache file can at worst give a wrong value.  When the total size goes over max_size, the least recently
+    used entries are removed until the cache is back down to 3/4 of it.
+
+    Keys can be anything with a stable repr(), typically tuples of strings
+    and numbers.  The repr() of the key is stored with the value so a hash
+    collision can never return the wrong entry.
+
+    Usage:
+        cache = DiskCache("blame")
+        cache.set(("/repo", "file.py", "1a2b3c"), value)
+        value = cache.get(("/repo", "file.py", "1a2b3c"))
+
+    """
+
+    def __init__(self, name, max_size=DEFAULT_MAX_SIZE, folder=None):
+        if folder is None:
+            folder = rabbitvcs.util.helper.get_cache_folder()
+
+        self.name = name
+        self.max_size = max_size
+        self.path = os.path.join(folder, name)
+        self.size = None
+        self.lock = threading.Lock()
+
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path, 0o700)
+
+    def _get_key_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.path, digest)
+
+    def get(self, key, default=None):
+        path = self._get_key_path(key)
+        try:
+            fh = open(path, "rb")
+            try:
+                (stored_key, value) = simplejson.loads(fh.read().decode("utf-8"),
+                    object_hook=decode_value)
+            finally:
+                fh.close()
+        except (IOError, OSError):
+            return default
+        except Exception as e:
+            # A corrupt or incompatible entry, just drop it
+            log.debug("Removing unreadable cache entry %s: %s" % (path, e))
+            self._remove(path)
+            return default
+
+        if stored_key != repr(key):
+            return default
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return value
+
+    def set(self, key, value):
+        path = self._get_key_path(key)
+        try:
+            data = simplejson.dumps((repr(key), value),
+                default=encode_value).encode("utf-8")
+            (fd, tmp_path) = tempfile.mkstemp(dir=self.path, prefix=".tmp")
+            fh = os.fdopen(fd, "wb")
+            try:
+                fh.write(data)
+            finally:
+                fh.close()
+            os.rename(tmp_path, path)
+            written = os.path.getsize(path)
+        except Exception as e:
+            log.debug("Unable to write cache entry %s: %s" % (path, e))
+            return
+
+        self._added(written)
+
+    def _added(self, written):
+        with self.lock:
+            if self.size is None:
+                self.size = self._get_total_size()
+            else:
+                self.size += written
+
+            if self.size > self.max_size:
+                self._evict()
+
+    def remove(self, key):
+        self._remove(self._get_key_path(key))
+
+    def clear(self):
+        with self.lock:
+            for name in os.listdir(self.path):
+                self._remove(os.path.join(self.path, name))
+            self.size = 0
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _list_entries(self):
+        entries = []
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _get_total_size(self):
+        return sum([entry[1] for entry in self._list_entries()])
+
+    def _evict(self):
+        entries = sorted(self._list_entries())
+        size = sum([entry[1] for entry in entries])
+        target = self.max_size * 3 // 4
+        for (mtime, entry_size, path) in entries:
+            if size <= target:
+                break
+            self._remove(path)
+            size -= entry_size
+
+        self.size = size
+
+class FileCache(DiskCache):
+    """
+    Keeps plain files, such as exported file revisions, so they can be handed
+    straight to other programs.  Entries are named by a hash of their key,
+    which should identify the file contents exactly (a repository URL and the
+    revision it last changed in, for example).
+
+    Usage:
+        cache = FileCache("exports")
+        if not cache.get_file(key, dest_path):
+            export(url, dest_path)
+            cache.add_file(key, dest_path)
+
+    """
+
+    def get_file(self, key, dest_path):
+        """
+        Copies the cached file for key to dest_path.
+
+        @rtype  boolean
+        @return Whether the file was in the cache
+
+        """
+
+        path = self._get_key_path(key)
+        try:
+            shutil.copyfile(path, dest_path)
+        except (IOError, OSError):
+            return False
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return True
+
+    def get_data(self, key):
+        """
+        Returns the contents of the cached file for key, or None if there is
+        none.  Unlike DiskCache.get(), nothing is decoded.
+
+        @rtype  bytes
+        @return The cached contents
+
+        """
+
+        path = self._get_key_path(key)
+        try:
+            fh = open(path, "rb")
+            try:
+                data = fh.read()
+            finally:
+                fh.close()
+        except (IOError, OSError):
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return data
+
+    def set_data(self, key, data):
+        """
+        Stores data (bytes) as the cached file for key
+        """
+
+        path = self._get_key_path(key)
+        try:
+            (fd, tmp_path) = tempfile.mkstemp(dir=self.path, prefix=".tmp")
+            fh = os.fdopen(fd, "wb")
+            try:
+                fh.write(data)
+            finally:
+                fh.close()
+            os.rename(tmp_path, path)
+            written = os.path.getsize(path)
+        except Exception as e:
+            log.debug("Unable to write cache entry %s: %s" % (path, e))
+            return
+
+        self._added(written)
+
+    def add_file(self, key, source_path):
+        """
+        Stores a copy of source_path as the cached file for key
+        """
+
+        path = self._get_key_path(key)
+        try:
+            (fd, tmp_path) = tempfile.mkstemp(dir=self.path, prefix=".tmp")
+            os.close(fd)
+            shutil.copyfile(source_path, tmp_path)
+            os.rename(tmp_path, path)
+            written = os.path.getsize(path)
+        except Exception as e:
+            log.debug("Unable to write cache entry %s: %s" % (path, e))
+            return
+
+        self._added(written)
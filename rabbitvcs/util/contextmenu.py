@@ -25,7 +25,7 @@ from __future__ import print_function
 import os
 import os.path
 from time import sleep
-from collections import deque
+from collections import deque, OrderedDict
 from six.moves import range
 
 # Yes, * imports are bad. You write it out then.
@@ -597,6 +597,43 @@ class ContextMenuCallbacks:
         proc = rabbitvcs.util.helper.launch_ui_window("editconflicts", [self.paths[0]])
         self.caller.rescan_after_process_exit(proc, [self.paths[0]])
 
+class PathDict(dict):
+    """
+    The conditions of a selection of paths, as a dict from condition names
+    to booleans.  Each condition is only computed the first time it is read,
+    so a menu only pays for the checks its items actually use.
+
+    """
+
+    def __init__(self, length, checks):
+        """
+        @param  length: The number of selected paths
+        @type   length: int
+
+        @param  checks: Functions computing each condition, by name
+        @type   checks: dict
+
+        """
+
+        dict.__init__(self, length=length)
+        self.checks = checks
+
+    def __missing__(self, key):
+        value = self.checks[key]()
+        self[key] = value
+        return value
+
+class EvaluatedPathDict(dict):
+    """
+    The conditions sent back by the checker service.  Only the ones read
+    while it built the menu were computed, and any other condition is taken
+    to be false.
+
+    """
+
+    def __missing__(self, key):
+        return False
+
 class ContextMenuConditions:
     """
     Provides a standard interface to checking conditions for menu items.
@@ -609,51 +646,120 @@ class ContextMenuConditions:
     def __init__(self):
         pass
 
+    def get_status_paths(self, paths):
+        """
+        Returns the selected paths that are not under another selected path.
+        Recursive statuses of these cover the whole selection.
+
+        """
+
+        status_paths = []
+        prefix = None
+        # Sorting by parts keeps every path right after its ancestors
+        for path in sorted(set([path for path in paths if path]),
+                key=lambda path: path.split(os.sep)):
+            if prefix is not None and path.startswith(prefix):
+                continue
+
+            status_paths.append(path)
+            prefix = path.rstrip(os.sep) + os.sep
+
+        return status_paths
+
+    def get_statuses(self):
+        """
+        Returns the statuses of the selected paths by path.  They are only
+        looked up the first time a condition needs them.
+
+        """
+
+        if self.statuses is None:
+            self.generate_statuses(self.paths)
+
+        return self.statuses
+
     def generate_path_dict(self, paths):
-        self.path_dict = {
-            "length": len(paths)
-        }
+        """
+        Sets up self.path_dict for the selected paths.  Per path conditions
+        are true if they hold for any of the paths.  VCS detection is done
+        once per path, and working copy information and statuses are looked
+        up for all paths at once the first time a condition needs them.
 
-        checks = {
-            "is_svn"                        : lambda path: (self.vcs_client.guess(path)["vcs"] == VCS_SVN),
-            "is_git"                        : lambda path: (self.vcs_client.guess(path)["vcs"] == VCS_GIT),
-            "is_mercurial"                  : lambda path: (self.vcs_client.guess(path)["vcs"] == VCS_MERCURIAL),
+        """
+
+        guesses = {}
+        def guess_vcs(path):
+            try:
+                return guesses[path]
+            except KeyError:
+                vcs = self.vcs_client.guess(path)["vcs"]
+                guesses[path] = vcs
+                return vcs
+
+        info_cached = []
+        def with_info(func):
+            def check(path):
+                if not info_cached:
+                    info_cached.append(True)
+                    self.vcs_client.cache_info([path for path in paths if path])
+                return func(path)
+            return check
+
+        def text_statuses():
+            self.get_statuses()
+            return self.text_statuses
+
+        def prop_statuses():
+            self.get_statuses()
+            return self.prop_statuses
+
+        def any_path(func):
+            def check():
+                for path in paths:
+                    try:
+                        if func(path):
+                            return True
+                    except KeyError as e:
+                        pass
+                return False
+            return check
+
+        path_checks = {
+            "is_svn"                        : lambda path: (guess_vcs(path) == VCS_SVN),
+            "is_git"                        : lambda path: (guess_vcs(path) == VCS_GIT),
+            "is_mercurial"                  : lambda path: (guess_vcs(path) == VCS_MERCURIAL),
             "is_dir"                        : os.path.isdir,
             "is_file"                       : os.path.isfile,
             "exists"                        : os.path.exists,
-            "is_working_copy"               : self.vcs_client.is_working_copy,
+            "is_working_copy"               : with_info(self.vcs_client.is_working_copy),
             "is_in_a_or_a_working_copy"     : self.vcs_client.is_in_a_or_a_working_copy,
-            "is_versioned"                  : self.vcs_client.is_versioned,
-            "is_normal"                     : lambda path: self.statuses[path].simple_content_status() == "unchanged" and self.statuses[path].simple_metadata_status() == "normal",
-            "is_added"                      : lambda path: self.statuses[path].simple_content_status() == "added",
-            "is_modified"                   : lambda path: self.statuses[path].simple_content_status() == "modified" or self.statuses[path].simple_metadata_status() == "modified",
-            "is_deleted"                    : lambda path: self.statuses[path].simple_content_status() == "deleted",
-            "is_ignored"                    : lambda path: self.statuses[path].simple_content_status() == "ignored",
-            "is_locked"                     : self.vcs_client.is_locked,
-            "is_missing"                    : lambda path: self.statuses[path].simple_content_status() == "missing",
-            "is_conflicted"                 : lambda path: self.statuses[path].simple_content_status() == "complicated",
-            "is_obstructed"                 : lambda path: self.statuses[path].simple_content_status() == "obstructed",
-            "has_unversioned"               : lambda path: "unversioned" in self.text_statuses,
-            "has_added"                     : lambda path: "added" in self.text_statuses,
-            "has_modified"                  : lambda path: "modified" in self.text_statuses or "modified" in self.prop_statuses,
-            "has_deleted"                   : lambda path: "deleted" in self.text_statuses,
-            "has_ignored"                   : lambda path: "ignored" in self.text_statuses,
-            "has_missing"                   : lambda path: "missing" in self.text_statuses,
-            "has_conflicted"                : lambda path: "complicated" in self.text_statuses,
-            "has_obstructed"                : lambda path: "obstructed" in self.text_statuses
+            "is_versioned"                  : with_info(self.vcs_client.is_versioned),
+            "is_normal"                     : lambda path: self.get_statuses()[path].simple_content_status() == "unchanged" and self.get_statuses()[path].simple_metadata_status() == "normal",
+            "is_added"                      : lambda path: self.get_statuses()[path].simple_content_status() == "added",
+            "is_modified"                   : lambda path: self.get_statuses()[path].simple_content_status() == "modified" or self.get_statuses()[path].simple_metadata_status() == "modified",
+            "is_deleted"                    : lambda path: self.get_statuses()[path].simple_content_status() == "deleted",
+            "is_ignored"                    : lambda path: self.get_statuses()[path].simple_content_status() == "ignored",
+            "is_locked"                     : with_info(self.vcs_client.is_locked),
+            "is_missing"                    : lambda path: self.get_statuses()[path].simple_content_status() == "missing",
+            "is_conflicted"                 : lambda path: self.get_statuses()[path].simple_content_status() == "complicated",
+            "is_obstructed"                 : lambda path: self.get_statuses()[path].simple_content_status() == "obstructed"
         }
-        
-        for key,func in list(checks.items()):
-            self.path_dict[key] = False
-
-        # Each path gets tested for each check
-        # If a check has returned True for any path, skip it for remaining paths
-        for path in paths:
-            for key, func in list(checks.items()):
-                try:
-                    self.path_dict[key] = func(path)
-                except KeyError as e:
-                    self.path_dict[key] = False
+
+        checks = {
+            "has_unversioned"               : lambda: "unversioned" in text_statuses(),
+            "has_added"                     : lambda: "added" in text_statuses(),
+            "has_modified"                  : lambda: "modified" in text_statuses() or "modified" in prop_statuses(),
+            "has_deleted"                   : lambda: "deleted" in text_statuses(),
+            "has_ignored"                   : lambda: "ignored" in text_statuses(),
+            "has_missing"                   : lambda: "missing" in text_statuses(),
+            "has_conflicted"                : lambda: "complicated" in text_statuses(),
+            "has_obstructed"                : lambda: "obstructed" in text_statuses()
+        }
+
+        for key, func in list(path_checks.items()):
+            checks[key] = any_path(func)
+
+        self.path_dict = PathDict(len(paths), checks)
 
     def checkout(self, data=None):
         if self.path_dict["length"] == 1:
@@ -1067,18 +1173,14 @@ class GtkFilesContextMenuConditions(ContextMenuConditions):
         """
         self.vcs_client = vcs_client
         self.paths = paths
-        self.statuses = {}
+        self.statuses = None
 
-        self.generate_statuses(self.paths)
         self.generate_path_dict(self.paths)
 
     def generate_statuses(self, paths):
         self.statuses = {}
-        for path in paths:
-            if not path:
-                continue
-                
-            statuses_tmp = self.vcs_client.statuses(path, invalidate=True)
+        for path in self.get_status_paths(paths):
+            statuses_tmp = self.vcs_client.cached_statuses(path)
             for status in statuses_tmp:
                 self.statuses[status.path] = status
 
@@ -1205,25 +1307,98 @@ class MainContextMenuConditions(ContextMenuConditions):
 
         self.vcs_client = vcs_client
         self.paths = paths
-        self.statuses = {}
+        self.statuses = None
         
-        self.generate_statuses(paths)
         self.generate_path_dict(paths)
         
-    # FIXME: major bottleneck
     def generate_statuses(self, paths):
         self.statuses = {}
-        for path in paths:
-            if not path:
-                continue
-                
-            statuses_tmp = self.vcs_client.statuses(path)
+        for path in self.get_status_paths(paths):
+            statuses_tmp = self.vcs_client.cached_statuses(path)
             for status in statuses_tmp:
                 self.statuses[status.path] = status
 
         self.text_statuses = [self.statuses[key].simple_content_status() for key in list(self.statuses.keys())]
         self.prop_statuses = [self.statuses[key].simple_metadata_status() for key in list(self.statuses.keys())]
 
+class MenuConditionsCache:
+    """
+    The menu conditions of recent selections, for the file manager
+    extensions.  Entries are keyed by the selected paths and by the status
+    epochs of their working copies, so a change reported by the checker
+    service makes the old entries unreachable and they age out.  Only the
+    most recently used entries are kept.
+
+    """
+
+    #: Stored while the checker service is generating the conditions
+    IN_PROGRESS = "in-progress"
+
+    MAX_ENTRIES = 100
+
+    def __init__(self, status_checker):
+        """
+        @param  status_checker: The stub used to talk to the checker service
+        @type   status_checker: StatusCheckerStub
+
+        """
+
+        self.status_checker = status_checker
+        self.entries = OrderedDict()
+
+        # The keys requests were made under, by selection
+        self.pending = {}
+
+    def get_key(self, paths):
+        selection = tuple(paths)
+        repo_paths = sorted(set([rabbitvcs.vcs.guess(path)["repo_path"]
+            for path in paths]))
+        epochs = tuple([self.status_checker.get_status_epoch(repo_path)
+            for repo_path in repo_paths])
+        return (selection, epochs)
+
+    def get(self, paths):
+        """
+        Returns the conditions of the selection, IN_PROGRESS, or None if
+        they have to be generated.
+
+        """
+
+        key = self.get_key(paths)
+        value = self.entries.pop(key, None)
+        if value is not None:
+            self.entries[key] = value
+        return value
+
+    def set_in_progress(self, paths):
+        """
+        Marks the conditions of the selection as being generated.  The
+        result is stored under the status epochs of this moment, so changes
+        reported in the meantime are not hidden.
+
+        """
+
+        key = self.get_key(paths)
+        if len(self.pending) >= self.MAX_ENTRIES:
+            self.pending.clear()
+        self.pending[key[0]] = key
+        self._store(key, self.IN_PROGRESS)
+
+    def set(self, paths, conditions_dict):
+        key = self.pending.pop(tuple(paths), None)
+        if key is None:
+            key = self.get_key(paths)
+
+        self.entries.pop(key, None)
+        if conditions_dict:
+            self._store(key, conditions_dict)
+
+    def _store(self, key, value):
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        while len(self.entries) > self.MAX_ENTRIES:
+            self.entries.popitem(last=False)
+
 class MainContextMenu:
     """
     Defines and composes the main context menu.
@@ -1375,6 +1550,26 @@ class MainContextMenu:
             ])
         ]
         self.structure = [_f for _f in self.structure if _f]
+
+    def evaluate_conditions(self):
+        """
+        Goes through the menu the way a menu builder does, without creating
+        anything, so that only the conditions of the items that would be
+        checked are computed.  Submenus of hidden items are skipped.
+
+        @rtype  dict
+        @return The conditions that were read, by name
+
+        """
+
+        for item in rabbitvcs.util.helper.walk_tree_depth_first(
+                self.structure,
+                preprocess=lambda x: x(self.conditions, self.callbacks),
+                filter=lambda x: x.show()):
+            pass
+
+        return dict(self.conditions.path_dict)
+
     def get_menu(self):
         pass
 
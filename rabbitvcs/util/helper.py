@@ -56,6 +56,7 @@ except ImportError:
     import gobject
 
 import rabbitvcs.util.settings
+import rabbitvcs.util.paths
 
 from rabbitvcs.util.log import Log
 log = Log("rabbitvcs.util.helper")
@@ -198,6 +199,28 @@ def get_home_folder():
         os.makedirs(config_home, 0o700)
 
     return config_home
+
+def get_cache_folder():
+    """
+    Returns the location of the folder we use for cached data that can be
+    thrown away at any time, like blame results and repository logs.
+    
+    @rtype:     string
+    @return:    The location of our cache folder.
+    
+    """
+    
+    # $XDG_CACHE_HOME if set, by default ~/.cache
+    xdg_cache_home = os.environ.get(
+        "XDG_CACHE_HOME",
+        os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    cache_home = os.path.join(xdg_cache_home, "rabbitvcs")
+    
+    if not os.path.isdir(cache_home):
+        os.makedirs(cache_home, 0o700)
+
+    return cache_home
     
 def get_user_path():
     """
@@ -768,31 +791,12 @@ def pretty_timedelta(time1, time2, resolution=None):
         r = age_s / (3600 * 24 * 365)
         return ngettext("%i year", "%i years",r) % r
 
-def _commonpath(l1, l2, common=[]):
-    """
-    Helper method for the get_relative_path method
-    """
-    if len(l1) < 1: return (common, l1, l2)
-    if len(l2) < 1: return (common, l1, l2)
-    if l1[0] != l2[0]: return (common, l1, l2)
-    return _commonpath(l1[1:], l2[1:], common+[l1[0]])
-    
 def get_relative_path(from_path, to_path):
     """
     Method that returns the relative path between the specified paths
     """
-    
-    nice_path1 = from_path.rstrip(os.path.sep).split(os.path.sep)
-    nice_path2 = to_path.rstrip(os.path.sep).split(os.path.sep)
-    
-    (common,l1,l2) = _commonpath(nice_path1, nice_path2)
-    
-    p = []
-    if len(l1) > 0:
-        p = ['..'] * len(l1)
-    p = p + l2
-    
-    return os.sep.join(p)
+
+    return rabbitvcs.util.paths.get_relative_path(from_path, to_path)
 
 def launch_repo_browser(uri):
     sm = rabbitvcs.util.settings.SettingsManager()
@@ -0,0 +1,111 @@
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+
+Relative path computation shared by the helper module and the VCS backends.
+
+This module only depends on the standard library, so that the backend
+libraries (gittyup) can use it too.
+
+"""
+from __future__ import absolute_import
+
+import os
+import os.path
+
+# Number of base directories (typically repository roots) to remember
+MAX_CACHED_BASES = 32
+
+# Normalized absolute base directory, its prefix and its parts, by base
+# directory
+_bases = {}
+
+def _normalize(path):
+    # Only pay for normpath() when the path actually needs it
+    if (os.sep + os.sep in path or os.sep + "." in path and
+            ("." in path.split(os.sep) or ".." in path.split(os.sep))):
+        return os.path.normpath(path)
+    elif len(path) > 1:
+        return path.rstrip(os.sep)
+    return path
+
+def _get_base(from_dir):
+    try:
+        return _bases[from_dir]
+    except KeyError:
+        pass
+
+    normalized = _normalize(from_dir)
+    prefix = normalized
+    if not prefix.endswith(os.sep):
+        prefix += os.sep
+
+    base = (normalized, prefix, normalized.rstrip(os.sep).split(os.sep))
+    if len(_bases) >= MAX_CACHED_BASES:
+        _bases.clear()
+    _bases[from_dir] = base
+    return base
+
+def _get_relative_parts(base_parts, parts):
+    common = 0
+    for (base_part, part) in zip(base_parts, parts):
+        if base_part != part:
+            break
+        common += 1
+
+    return os.sep.join([".."] * (len(base_parts) - common) + parts[common:])
+
+def get_relative_path(from_dir, path):
+    """
+    Returns path relative to the directory from_dir, going up with ".." if
+    path is not under it.  Returns "" if both are the same.
+
+    Paths under from_dir are the common case (from_dir is usually a
+    repository root) and only cost a string comparison.  Relative paths are
+    compared as they are given rather than resolved against the current
+    directory.
+
+    @type   from_dir: string
+    @param  from_dir: The directory to make path relative to
+
+    @type   path: string
+    @param  path: The path to make relative
+
+    @rtype  string
+    @return The relative path
+
+    """
+
+    if not (os.path.isabs(from_dir) and os.path.isabs(path)):
+        return _get_relative_parts(from_dir.rstrip(os.sep).split(os.sep),
+            path.rstrip(os.sep).split(os.sep))
+
+    (normalized, prefix, base_parts) = _get_base(from_dir)
+    path = _normalize(path)
+
+    if path.startswith(prefix):
+        return path[len(prefix):]
+    elif path == normalized:
+        return ""
+
+    return _get_relative_parts(base_parts, path.rstrip(os.sep).split(os.sep))
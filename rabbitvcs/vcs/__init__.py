@@ -22,6 +22,10 @@ from __future__ import absolute_import
 #
 
 import os.path
+import time
+import threading
+from collections import OrderedDict
+
 from rabbitvcs import gettext
 _ = gettext.gettext
 
@@ -40,37 +44,129 @@ VCS_GIT = 'git'
 VCS_MERCURIAL = 'mercurial'
 VCS_DUMMY = 'unknown'
 
+# Set by the UI processes to run repository reads in the checker service
+use_session_broker = False
+
 VCS_FOLDERS = {}
 if not settings.get("HideItem", "svn"):
     VCS_FOLDERS[".svn"] = VCS_SVN
 if not settings.get("HideItem", "git"):
     VCS_FOLDERS[".git"] = VCS_GIT
+if not settings.get("HideItem", "hg"):
+    VCS_FOLDERS[".hg"] = VCS_MERCURIAL
+
+# The HideItem setting of each VCS
+HIDE_ITEM_KEYS = {
+    VCS_SVN: "svn",
+    VCS_GIT: "git",
+    VCS_MERCURIAL: "hg"
+}
+
+# Number of paths whose _guess() result is remembered
+GUESS_CACHE_SIZE = 10000
+
+# Seconds to trust that a path is not in any working copy
+GUESS_NEGATIVE_TTL = 5
+
+# _guess() results by path, as (vcs, root, admin folder, stamp).  The stamp
+# is the modification time of the admin folder (.svn, .git...) of the root,
+# or for paths outside any working copy, the time they were checked.
+_guess_cache = {}
+
+def _get_admin_stamp(root, folder):
+    try:
+        return os.stat(os.path.join(root, folder)).st_mtime
+    except OSError:
+        return None
 
 def _guess(path):
     # Determine the VCS instance based on the path
-    if path:
-        path_to_check = path.split("@")[0]
-
-        while path_to_check != "/" and path_to_check != "":
-            for folder, client in list(VCS_FOLDERS.items()):
-                if os.path.isdir(os.path.join(path_to_check, folder)):
-                    cache = {
-                        "vcs": client,
-                        "repo_path": path_to_check
-                    }
-                    return cache                
-            path_to_check = os.path.split(path_to_check)[0]
-  
+    if not path:
+        return {
+            "vcs": VCS_DUMMY,
+            "repo_path": path
+        }
+
+    path_to_check = path.split("@")[0]
+
+    try:
+        (vcs, root, folder, stamp) = _guess_cache[path_to_check]
+    except KeyError:
+        pass
+    else:
+        if folder is None:
+            if time.time() - stamp < GUESS_NEGATIVE_TTL:
+                return {"vcs": VCS_DUMMY, "repo_path": path}
+        elif _get_admin_stamp(root, folder) == stamp:
+            return {"vcs": vcs, "repo_path": root}
+
+    # Walk up to the working copy root, remembering the answer for every
+    # directory passed on the way
+    checked = []
+    entry = None
+    while path_to_check != "/" and path_to_check != "":
+        cached = _guess_cache.get(path_to_check)
+        if cached is not None and cached[2] is not None and \
+                _get_admin_stamp(cached[1], cached[2]) == cached[3]:
+            entry = cached
+            break
+
+        checked.append(path_to_check)
+        for folder, client in list(VCS_FOLDERS.items()):
+            if os.path.isdir(os.path.join(path_to_check, folder)):
+                entry = (client, path_to_check, folder,
+                    _get_admin_stamp(path_to_check, folder))
+                break
+
+        if entry is not None:
+            break
+        path_to_check = os.path.split(path_to_check)[0]
+
+    if entry is None:
+        entry = (VCS_DUMMY, None, None, time.time())
+    elif entry[3] is None:
+        # The admin folder vanished while looking, do not remember this
+        checked = []
+
+    if len(_guess_cache) + len(checked) > GUESS_CACHE_SIZE:
+        _guess_cache.clear()
+    for checked_path in checked:
+        _guess_cache[checked_path] = entry
+
+    if entry[0] == VCS_DUMMY:
+        return {
+            "vcs": VCS_DUMMY,
+            "repo_path": path
+        }
+
     return {
-        "vcs": VCS_DUMMY,
-        "repo_path": path
+        "vcs": entry[0],
+        "repo_path": entry[1]
     }
 
+def invalidate_guess_cache(path=None):
+    """
+    Forget the detected VCS of path and everything under it, or of all paths.
+    Needed when a working copy is created inside another one, since that does
+    not touch the admin folder of the outer working copy.
+
+    """
+
+    if path is None:
+        _guess_cache.clear()
+        return
+
+    prefix = path.rstrip("/") + "/"
+    for cached_path in list(_guess_cache.keys()):
+        if cached_path == path or cached_path.startswith(prefix):
+            _guess_cache.pop(cached_path, None)
+
 # Override the standard guessing method to ensure we
 # can return a dummy object if needed
 def guess(path):
     obj = _guess(path)
-    if obj["vcs"] != VCS_DUMMY and settings.get("HideItem", obj["vcs"]):
+    if obj["vcs"] != VCS_DUMMY and settings.get("HideItem",
+            HIDE_ITEM_KEYS[obj["vcs"]]):
         return {"vcs": VCS_DUMMY, "repo_path": path}
     else:
         return obj
@@ -78,6 +174,12 @@ def guess(path):
 class VCS:
     clients = {}
     exclude_paths = []
+
+    # Git and Mercurial clients by (vcs, repository root), least recently
+    # used first
+    MAX_REPOSITORY_CLIENTS = 10
+    repository_clients = OrderedDict()
+    repository_clients_lock = threading.RLock()
     
     def __init__(self):
         self.exclude_paths = get_exclude_paths()
@@ -111,73 +213,95 @@ class VCS:
         if settings.get("HideItem", "git"):
             return self.dummy()
 
-        if VCS_GIT in self.clients:
-            git = self.clients[VCS_GIT]
-            if git.__class__.__name__ == "Dummy":
-                return self.dummy()
-
-            if path:
-                if is_repo_path:
-                    git.set_repository(path)
-                else:
-                    repo_path = git.find_repository_path(path)
-                    git.set_repository(repo_path)
-
-            return git
-        else:
+        if VCS_GIT not in self.clients:
             try:
                 from rabbitvcs.vcs.git import Git
-                git = Git()
-
-                if path:
-                    if is_repo_path:
-                        git.set_repository(path)
-                    else:
-                        repo_path = git.find_repository_path(path)
-                        git.set_repository(repo_path)
-                
-                self.clients[VCS_GIT] = git
-                return self.clients[VCS_GIT]
+                self.clients[VCS_GIT] = Git()
             except Exception as e:
                 logger.debug("Unable to load Git module: %s" % e)
                 logger.exception(e)
                 self.clients[VCS_GIT] = self.dummy()
-                return self.clients[VCS_GIT]
+
+        git = self.clients[VCS_GIT]
+        if git.__class__.__name__ == "Dummy" or not path:
+            return git
+
+        if not is_repo_path:
+            path = git.find_repository_path(path)
+
+        return self.repository_client(VCS_GIT, path, git.__class__)
 
     def mercurial(self, path=None, is_repo_path=False):
         if settings.get("HideItem", "hg"):
             return self.dummy()
 
-        if VCS_MERCURIAL in self.clients:
-            mercurial = self.clients[VCS_MERCURIAL]
-
-            if path:
-                if is_repo_path:
-                    mercurial.set_repository(path)
-                else:
-                    repo_path = mercurial.find_repository_path(path)
-                    mercurial.set_repository(repo_path)
-
-            return mercurial
-        else:
+        if VCS_MERCURIAL not in self.clients:
             try:
-                from rabbitvcs.vcs.mercurial import Mercurial
-                mercurial = Mercurial()
-
-                if path:
-                    if is_repo_path:
-                        mercurial.set_repository(path)
-                    else:
-                        repo_path = mercurial.find_repository_path(path)
-                        mercurial.set_repository(repo_path)
-
-                self.clients[VCS_MERCURIAL] = mercurial
-                return self.clients[VCS_MERCURIAL]
+                if settings.get("general", "hg_command_server"):
+                    from rabbitvcs.vcs.mercurial.cmdserver import \
+                        MercurialCommandServer as Mercurial
+                else:
+                    from rabbitvcs.vcs.mercurial import Mercurial
+                self.clients[VCS_MERCURIAL] = Mercurial()
             except Exception as e:
                 logger.debug("Unable to load Mercurial module: %s" % e)
                 logger.exception(e)
                 self.clients[VCS_MERCURIAL] = self.dummy()
-                return self.clients[VCS_MERCURIAL]
+
+        mercurial = self.clients[VCS_MERCURIAL]
+        if mercurial.__class__.__name__ == "Dummy" or not path:
+            return mercurial
+
+        if not is_repo_path:
+            path = mercurial.find_repository_path(path)
+
+        return self.repository_client(VCS_MERCURIAL, path, mercurial.__class__)
+
+    def repository_client(self, vcs, repo_path, client_class):
+        """
+        Returns the client for the repository at repo_path, creating it if
+        needed.  Each repository keeps its own client (and so its own open
+        repository and status cache), so switching between repositories does
+        not reopen them.  Only the MAX_REPOSITORY_CLIENTS most recently used
+        are kept.
+
+        @type   vcs: string
+        @param  vcs: VCS_GIT or VCS_MERCURIAL
+
+        @type   repo_path: string
+        @param  repo_path: The root of the repository
+
+        @type   client_class: class
+        @param  client_class: The client class, which must have a
+                              set_repository() method
+
+        """
+
+        key = (vcs, repo_path)
+        with self.repository_clients_lock:
+            client = self.repository_clients.pop(key, None)
+            if client is not None:
+                self.repository_clients[key] = client
+                return client
+
+        # Opening a repository can be slow, so lookups for other
+        # repositories are not held up while it happens
+        new_client = client_class()
+        new_client.set_repository(repo_path)
+
+        with self.repository_clients_lock:
+            # Another thread may have created one in the meantime
+            client = self.repository_clients.pop(key, None)
+            if client is None:
+                client = new_client
+
+            # Evicted clients are not closed, since callers may still be
+            # using them.  They release what they hold once garbage collected.
+            self.repository_clients[key] = client
+            while len(self.repository_clients) > self.MAX_REPOSITORY_CLIENTS:
+                self.repository_clients.popitem(last=False)
+
+        return client
 
     def client(self, path, vcs=None):
         if self.should_exclude(path):
@@ -219,10 +343,65 @@ class VCS:
         client = self.client(path)
         return client.statuses(path, recurse=recurse, invalidate=invalidate)
     
+    def cached_statuses(self, path, recurse=True):
+        """
+        Like statuses(), but reuses the cached statuses of path when its
+        freshness token shows they are still current, and otherwise only
+        refreshes path.
+
+        """
+
+        client = self.client(path)
+        cache = getattr(client, "cache", None)
+        token = self.get_status_token(path)
+        if cache is None or token is None:
+            return client.statuses(path, recurse=recurse, invalidate=True)
+
+        statuses = client.statuses(path, recurse=recurse,
+            invalidate=not cache.is_fresh(path, token))
+        cache.set_token(path, token)
+        return statuses
+
+    def get_status_token(self, path):
+        """
+        Returns a value that changes whenever the working copy holding path
+        is changed by the VCS (its admin folder is written to) or path itself
+        changes.  Changes further down are caught by the status cache, which
+        forgets the tokens above every item invalidated.
+
+        @rtype:         tuple
+        @return:        The token, or None if path is not in a working copy
+
+        """
+
+        guess = _guess(path)
+        for (folder, vcs) in VCS_FOLDERS.items():
+            if vcs == guess["vcs"]:
+                break
+        else:
+            return None
+
+        admin_stamp = _get_admin_stamp(guess["repo_path"], folder)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        if admin_stamp is None:
+            return None
+
+        return (admin_stamp, st.st_mtime, st.st_size)
+
     def status(self, path, summarize=True, invalidate=False):
         client = self.client(path)
         return client.status(path, summarize, invalidate)
 
+    def fast_status(self, path, summarize=True, invalidate=False):
+        client = self.client(path)
+        if hasattr(client, "fast_status"):
+            return client.fast_status(path, summarize, invalidate)
+        return client.status(path, summarize, invalidate)
+
     def is_working_copy(self, path):
         client = self.client(path)
         return client.is_working_copy(path)
@@ -240,6 +419,23 @@ class VCS:
         client = self.client(path)
         return client.is_locked(path)
 
+    def cache_info(self, paths):
+        """
+        Looks up the working copy information of several paths at once, for
+        the backends that support it, so that the is_* methods above can
+        answer from their cache.
+
+        """
+
+        client_paths = OrderedDict()
+        for path in paths:
+            client = self.client(path)
+            if hasattr(client, "cache_info"):
+                client_paths.setdefault(id(client), (client, []))[1].append(path)
+
+        for (client, paths) in client_paths.values():
+            client.cache_info(paths)
+
     def get_items(self, paths, statuses=[]):
         client = self.client(paths[0])
         return client.get_items(paths, statuses)
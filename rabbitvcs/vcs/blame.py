@@ -0,0 +1,99 @@
+from __future__ import absolute_import
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Shared support for caching annotate (blame) results.
+
+Blame results are lists of dicts with at least "line" and "number" keys, in
+the format each backend's annotate() method returns.  They are stored in a
+DiskCache keyed by repository, path and a revision identifying the content.
+"""
+
+import difflib
+
+from rabbitvcs.util.cache import DiskCache
+
+# 20MB
+BLAME_CACHE_SIZE = 20 * 1024 * 1024
+
+_blame_cache = None
+
+def get_blame_cache():
+    """
+    Returns the blame cache shared by all backends in this process
+    """
+
+    global _blame_cache
+    if _blame_cache is None:
+        _blame_cache = DiskCache("blame", BLAME_CACHE_SIZE)
+    return _blame_cache
+
+def reblame(parent_blame, lines, make_entry):
+    """
+    Builds the blame for a revision from the blame of the revision before it.
+
+    Lines that are unchanged since the parent revision keep the parent's
+    annotation.  Every other line was introduced by the revision itself, so it
+    gets the entry returned by make_entry(line).  Line numbers are
+    renumbered, keeping the type and starting value the parent used.
+
+    @type   parent_blame: list
+    @param  parent_blame: The cached annotation of the previous revision
+
+    @type   lines: list
+    @param  lines: The lines of the file at the new revision
+
+    @type   make_entry: callable
+    @param  make_entry: Returns an annotation dict for a new line
+
+    @rtype  list
+    @return The annotation of the new revision
+
+    """
+
+    # Backends differ in whether they keep carriage returns, so compare
+    # lines without line endings
+    parent_lines = [item["line"].rstrip("\r\n") for item in parent_blame]
+    new_lines = [line.rstrip("\r\n") for line in lines]
+
+    number_type = str
+    first_number = 1
+    if parent_blame:
+        number_type = type(parent_blame[0]["number"])
+        first_number = int(parent_blame[0]["number"])
+
+    matcher = difflib.SequenceMatcher(None, parent_lines, new_lines)
+
+    blame = []
+    for (tag, i1, i2, j1, j2) in matcher.get_opcodes():
+        if tag == "equal":
+            for i in range(i1, i2):
+                blame.append(dict(parent_blame[i]))
+        else:
+            for j in range(j1, j2):
+                blame.append(make_entry(lines[j]))
+
+    for (index, item) in enumerate(blame):
+        item["number"] = number_type(first_number + index)
+
+    return blame
@@ -36,6 +36,7 @@ import rabbitvcs.util.helper
 import rabbitvcs.vcs
 import rabbitvcs.vcs.status
 import rabbitvcs.vcs.log
+import rabbitvcs.vcs.blame
 from rabbitvcs.vcs.branch import BranchEntry
 from rabbitvcs.util.log import Log
 import six
@@ -858,7 +859,100 @@ class Git:
         
         """
 
-        return self.client.annotate(path, revision_obj.primitive())
+        return list(self.annotate_iter(path, revision_obj))
+
+    def annotate_iter(self, path, revision_obj=Revision("head")):
+        """
+        Yields annotation lines for a specified file as they are produced.
+        Results are served from and saved to the blame cache.
+            
+        @type   path: string
+        @param  path: The absolute path to a tracked file
+        
+        @type   revision: string
+        @param  revision: HEAD or a sha1 hash
+        
+        """
+
+        (key, commit, blame) = self._get_cached_annotation(path,
+            revision_obj.primitive())
+
+        if blame is not None:
+            for item in blame:
+                yield item
+            return
+
+        blame = []
+        for item in self.client.annotate_iter(path, commit):
+            blame.append(item)
+            yield item
+
+        if key is not None:
+            rabbitvcs.vcs.blame.get_blame_cache().set(key, blame)
+
+    def _get_blame_cache_key(self, path, blob_id):
+        return ("git", self.client.get_repository(),
+            self.client.get_relative_path(path), blob_id)
+
+    def _get_cached_annotation(self, path, revision):
+        """
+        Looks up the annotation of a file in the blame cache.
+
+        The cache is keyed by the file's blob id, which is read in-process
+        from the revision's tree, so commits that do not touch the file share
+        one entry and a hit runs no git commands.  On a miss, the cached
+        annotation of the previous change is reused for every line that did
+        not change since.
+
+        @rtype  tuple
+        @return (cache key or None, commit to annotate, annotation or None)
+
+        """
+
+        blob_id = self.client.get_blob_id(path, revision)
+        if blob_id is None:
+            return (None, revision, None)
+
+        cache = rabbitvcs.vcs.blame.get_blame_cache()
+        key = self._get_blame_cache_key(path, blob_id)
+
+        blame = cache.get(key)
+        if blame is not None:
+            return (key, revision, blame)
+
+        history = self.client.get_path_history(path, revision)
+        if not history:
+            return (key, revision, None)
+
+        # Merges can take lines from either side, so only single parent
+        # commits are re-blamed from the previous annotation
+        (commit, parents) = history[0]
+        if len(parents) != 1 or len(history) < 2:
+            return (key, commit, None)
+
+        parent_blob_id = self.client.get_blob_id(path, parents[0])
+        if parent_blob_id is None:
+            return (key, commit, None)
+
+        parent_blame = cache.get(self._get_blame_cache_key(path, parent_blob_id))
+        if parent_blame is None:
+            return (key, commit, None)
+
+        text = self.client.show(path, commit)
+        lines = []
+        if text:
+            lines = text.split("\n")
+
+        author = self.client.get_commit_author(commit)
+
+        def make_entry(line):
+            entry = dict(author)
+            entry["line"] = line
+            return entry
+
+        blame = rabbitvcs.vcs.blame.reblame(parent_blame, lines, make_entry)
+        cache.set(key, blame)
+        return (key, commit, blame)
 
     def show(self, path, revision_obj):
         """
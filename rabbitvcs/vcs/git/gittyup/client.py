@@ -9,7 +9,6 @@ import os.path
 import re
 import shutil
 import fnmatch
-import time
 from datetime import datetime
 from mimetypes import guess_type
 
@@ -26,6 +25,9 @@ from .exceptions import *
 from . import util
 from .objects import *
 from .command import GittyupCommand
+from .hashing import BlobHasher
+from .mappedindex import open_mapped_index
+from .treecache import tree_index_cache
 
 import Tkinter
 import tkMessageBox
@@ -82,6 +84,8 @@ class GittyupClient:
         self.numberOfCommandStages = 0
         self.numberOfCommandStagesExecuted = 0
 
+        self.blob_hasher = BlobHasher()
+
         if path:
             try:
                 self.repo = dulwich.repo.Repo(path)
@@ -116,6 +120,22 @@ class GittyupClient:
             self._initialize_index()
         
         return self.repo.open_index()
+
+    def _get_index_view(self):
+        """
+        Returns a read-only view of the index for lookups.  The view is
+        memory-mapped and shared between calls until the index file changes.
+        Use _get_index() when the index needs to be modified.
+
+        """
+
+        if not self.repo.has_index():
+            self._initialize_index()
+
+        try:
+            return open_mapped_index(self.repo.index_path())
+        except IndexFormatError:
+            return self.repo.open_index()
     
     def _get_tree_at_head(self):
         try:
@@ -132,11 +152,11 @@ class GittyupClient:
         if tree is None:
             tree = self._get_tree_at_head()
 
-        tree_index = {}
+        # The flattened tree is shared with the cache, so callers must treat
+        # it as read-only
         if tree:
-            for item in self.repo.object_store.iter_tree_contents(tree.id):
-                tree_index[item[0]] = (item[1], item[2])
-        return tree_index
+            return tree_index_cache.flatten(self.repo.object_store, tree.id)
+        return {}
 
     def _get_git_version(self):
         """
@@ -481,6 +501,14 @@ class GittyupClient:
         if type(paths) in (str, six.text_type):
             paths = [paths]
 
+        # Hash every file that may need comparing against HEAD in one batch
+        to_hash = []
+        for path in paths:
+            relative_path = self.get_relative_path(path)
+            if relative_path in index and relative_path in tree:
+                to_hash.append(path)
+        blob_ids = self.blob_hasher.hash_files(to_hash)
+
         for path in paths:
             relative_path = self.get_relative_path(path)
             if relative_path in index:
@@ -491,8 +519,7 @@ class GittyupClient:
                     # If the file is locally modified, set these vars to 0
                     # I'm not sure yet why this needs to happen, but it does
                     # in order for the file to appear modified and not normal
-                    blob = self._get_blob_from_file(path)
-                    if blob.id != blob_id:
+                    if blob_ids[path] != blob_id:
                         ctime = 0
                         mtime = 0
                         dev = 0
@@ -538,7 +565,7 @@ class GittyupClient:
 
         staged = []
         tree = self._get_tree_at_head()
-        index = self._get_index()
+        index = self._get_index_view()
 
         if len(tree) > 0:
             for item in index.changes_from_tree(self.repo.object_store, tree.id):
@@ -1497,7 +1524,7 @@ class GittyupClient:
 
     def status_dulwich(self, path):
         tree = self._get_tree_index()        
-        index = self._get_index()
+        index = self._get_index_view()
         
         if os.path.isdir(path):
             (files, directories) = self._read_directory_tree(path)
@@ -1510,6 +1537,21 @@ class GittyupClient:
             files_hash[file] = True
         
         statuses = []
+
+        # Hash all cached files present on disk up front so the work can be
+        # spread over the hasher's pool
+        to_hash = []
+        for name in tree:
+            try:
+                index[name]
+            except KeyError:
+                continue
+
+            absolute_path = self.get_absolute_path(name)
+            if os.path.isfile(absolute_path):
+                to_hash.append(absolute_path)
+        blob_ids = self.blob_hasher.hash_files(to_hash)
+
         # Calculate statuses for files in the current HEAD
         modified_files = []
         for name in tree:
@@ -1521,10 +1563,9 @@ class GittyupClient:
 
             if inIndex:
                 absolute_path = self.get_absolute_path(name)
-                if os.path.isfile(absolute_path):
+                if absolute_path in blob_ids:
                     # Cached, determine if modified or not
-                    blob = self._get_blob_from_file(absolute_path)
-                    if blob.id == tree[name][1]:
+                    if blob_ids[absolute_path] == tree[name][1]:
                         statuses.append(NormalStatus(name))
                     else:
                         modified_files.append(name)
@@ -1717,38 +1758,192 @@ class GittyupClient:
         
         """
 
+        return list(self.annotate_iter(path, revision_obj))
+
+    def annotate_iter(self, path, revision_obj="HEAD"):
+        """
+        Same as annotate(), but yields one line at a time while git blame is
+        still running so callers can display results progressively.
+
+        Uses the blame porcelain format, which only prints the commit
+        details the first time a commit is seen.  Those details (including
+        the parsed date) are kept per commit, so a long file only parses as
+        many dates as it has distinct commits.
+        
+        @type   path: string
+        @param  path: The absolute path to a tracked file
+        
+        @type   revision: string
+        @param  revision: HEAD or a sha1 hash
+        
+        """
+
         relative_path = self.get_relative_path(path)
 
-        cmd = ["git", "annotate", "-l", revision_obj, relative_path]
+        cmd = ["git", "blame", "--porcelain", revision_obj, "--", relative_path]
+
+        commits = {}
+        commit = None
+        number = None
 
+        # The raw porcelain lines are of no use to notify callbacks, so only
+        # cancellation is passed on
+        command = GittyupCommand(cmd, cwd=self.repo.path,
+            cancel=self.get_cancel)
         try:
-            (status, stdout, stderr) = GittyupCommand(cmd, cwd=self.repo.path, notify=self.notify, cancel=self.get_cancel).execute()
+            for line in command.iter_lines():
+                if line.startswith("\t"):
+                    # The line content ends each entry
+                    if commit is None:
+                        continue
+
+                    if "date" not in commit:
+                        commit["date"] = self._get_blame_date(commit)
+
+                    yield {
+                        "revision": commit["revision"],
+                        "author": commit.get("author", ""),
+                        "date": commit["date"],
+                        "line": line[1:],
+                        "number": number
+                    }
+                    commit = None
+                    continue
+
+                (key, sep, value) = line.partition(" ")
+                if commit is None:
+                    # Entry header: <sha1> <orig line> <final line> [<count>]
+                    parts = value.split(" ")
+                    if len(key) != 40 or len(parts) < 2:
+                        continue
+
+                    commit = commits.setdefault(key, {"revision": key})
+                    number = parts[1]
+                elif key in ("author", "author-time", "author-tz"):
+                    commit[key] = value
         except GittyupCommandError as e:
             self.callback_notify(e)
-            stdout = []
 
-        returner = []
-        for line in stdout:
-            components = re.split("\t", line, 3)
-            if len(components) < 4:
-                continue
+    def _get_blame_date(self, commit):
+        # Show the time as the author saw it, like git annotate does
+        try:
+            timestamp = int(commit["author-time"])
+            tz = commit.get("author-tz", "+0000")
+            offset = (int(tz[1:3]) * 3600 + int(tz[3:5]) * 60)
+            if tz.startswith("-"):
+                offset = -offset
+            return datetime.utcfromtimestamp(timestamp + offset)
+        except (KeyError, ValueError):
+            return datetime(1970, 1, 1)
+
+    def _rev_parse(self, name):
+        cmd = ["git", "rev-parse", "--verify", "-q", name]
+        try:
+            (status, stdout, stderr) = GittyupCommand(cmd, cwd=self.repo.path).execute()
+        except GittyupCommandError:
+            return None
 
-            dt = datetime(*time.strptime(components[2][:-6],"%Y-%m-%d %H:%M:%S")[:-2])
+        if len(stdout) == 1 and len(stdout[0]) == 40:
+            return stdout[0]
+        return None
 
-            message = components[3].split(")", 1)
-            code = message[1]
-            if len(components) == 5:
-                code = components[4]
-                
-            returner.append({
-                "revision": components[0],
-                "author": components[1][1:],
-                "date": dt,
-                "line": code,
-                "number": message[0]
-            })
+    def get_blob_id(self, path, revision_obj="HEAD"):
+        """
+        Returns the blob id of a file at a given revision, or None if the
+        file does not exist there
         
-        return returner
+        @type   path: string
+        @param  path: The absolute path to a file
+
+        @type   revision_obj: string
+        @param  revision_obj: HEAD or a sha1 hash
+
+        """
+
+        relative_path = self.get_relative_path(path)
+
+        # HEAD and commit ids are looked up in the cached trees without
+        # running git, anything else is left to rev-parse
+        tree = None
+        try:
+            if revision_obj == "HEAD":
+                tree = self._get_tree_at_head()
+            elif len(revision_obj) == 40:
+                tree = self._get_tree_from_sha1(revision_obj)
+        except (KeyError, AttributeError, TypeError):
+            tree = None
+
+        if tree is not None:
+            entry = self._get_tree_index(tree).get(relative_path)
+            if entry is None:
+                return None
+            return entry[1]
+
+        return self._rev_parse("%s:%s" % (revision_obj, relative_path))
+
+    def get_path_history(self, path, revision_obj="HEAD", limit=2):
+        """
+        Returns the most recent commits that changed a file, newest first
+        
+        @type   path: string
+        @param  path: The absolute path to a file
+
+        @type   revision_obj: string
+        @param  revision_obj: The revision to start from
+
+        @rtype  list
+        @return A list of (sha1, [parent sha1s]) tuples
+
+        """
+
+        relative_path = self.get_relative_path(path)
+
+        cmd = ["git", "log", "-%d" % limit, "--format=%H %P", revision_obj,
+            "--", relative_path]
+        try:
+            (status, stdout, stderr) = GittyupCommand(cmd, cwd=self.repo.path).execute()
+        except GittyupCommandError:
+            return []
+
+        history = []
+        for line in stdout:
+            parts = line.split()
+            if not parts or len(parts[0]) != 40:
+                return []
+            history.append((parts[0], parts[1:]))
+
+        return history
+
+    def get_commit_author(self, sha):
+        """
+        Returns the author and author date of a commit, in the format used
+        by annotate()
+
+        @type   sha: string
+        @param  sha: A commit sha1
+
+        @rtype  dict
+        @return A dict with "revision", "author" and "date" keys
+
+        """
+
+        cmd = ["git", "log", "-1", "--format=%an%x00%ad", "--date=raw", sha]
+        try:
+            (status, stdout, stderr) = GittyupCommand(cmd, cwd=self.repo.path).execute()
+        except GittyupCommandError:
+            stdout = []
+
+        commit = {"revision": sha, "author": ""}
+        if stdout and "\0" in stdout[0]:
+            (author, date) = stdout[0].split("\0", 1)
+            commit["author"] = author
+            commit["author-time"], sep, commit["author-tz"] = date.partition(" ")
+
+        return {
+            "revision": sha,
+            "author": commit["author"],
+            "date": self._get_blame_date(commit)
+        }
 
     def show(self, path, revision_obj):
         """
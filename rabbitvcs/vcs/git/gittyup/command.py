@@ -7,6 +7,7 @@ import subprocess
 import fcntl
 import select
 import os
+import threading
 
 from .exceptions import GittyupCommandError
 
@@ -68,3 +69,66 @@ class GittyupCommand:
                 proc.kill()
 
         return (0, stdout, None)
+
+    def iter_lines(self):
+        """
+        Same as execute(), but yields each line of output as it arrives
+        instead of collecting them, so callers can process long output
+        progressively.
+
+        Error output is kept apart from the yielded lines.  If the command
+        exits with an error, GittyupCommandError is raised with that output
+        once all the lines have been yielded.
+
+        """
+
+        env = os.environ.copy()
+        env["LANG"] = "C";
+        proc = subprocess.Popen(self.command,
+                                cwd=self.cwd,
+                                stdin=None,
+                                stderr=subprocess.PIPE,
+                                stdout=subprocess.PIPE,
+                                env=env,
+                                close_fds=True,
+                                preexec_fn=os.setsid,
+                                universal_newlines=True)
+
+        # Drain stderr alongside stdout so neither pipe can fill up and
+        # stall the command
+        stderr = []
+        stderr_reader = threading.Thread(target=self._read_stderr,
+            args=(proc.stderr, stderr))
+        stderr_reader.daemon = True
+        stderr_reader.start()
+
+        finished = False
+        try:
+            while True:
+                line = proc.stdout.readline()
+
+                if line == '':
+                    finished = True
+                    break
+
+                line = line.rstrip('\n')
+                self.notify(line)
+                yield line
+
+                if self.get_cancel():
+                    break
+        finally:
+            # Stop the process if the caller cancelled or stopped iterating
+            if not finished and proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            returncode = proc.wait()
+            stderr_reader.join()
+            proc.stderr.close()
+
+        if finished and returncode != 0:
+            raise GittyupCommandError("".join(stderr).rstrip("\n"))
+
+    def _read_stderr(self, stream, lines):
+        for line in iter(stream.readline, ''):
+            lines.append(line)
@@ -13,3 +13,9 @@ class GittyupCommandError(Exception):
 
     def __init__(self, *args, **kwargs):
         Exception.__init__(self, *args, **kwargs)
+
+class IndexFormatError(Exception):
+    """Indicates an index file could not be read by the mapped index reader"""
+
+    def __init__(self, *args, **kwargs):
+        Exception.__init__(self, *args, **kwargs)
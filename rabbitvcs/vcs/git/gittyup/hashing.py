@@ -0,0 +1,155 @@
+from __future__ import absolute_import
+#
+# hashing.py
+#
+
+import os
+import hashlib
+import functools
+import threading
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+# Files are read in chunks of this size so memory use stays constant no matter
+# how large the working tree files are
+CHUNK_SIZE = 64 * 1024
+
+# Below this many files the pool start-up costs more than it saves
+MIN_POOL_BATCH = 8
+
+def get_default_workers():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 2
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_shared_pool():
+    """
+    Returns the thread pool shared by every BlobHasher using the default
+    number of thread workers, so each client does not start its own.  It is
+    created the first time it is needed and lives as long as the process.
+
+    """
+
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ThreadPool(get_default_workers())
+        return _shared_pool
+
+def hash_blob_file(path, chunk_size=CHUNK_SIZE):
+    """
+    Compute the git blob id of a file without loading it into memory.
+
+    This gives the same result as dulwich.objects.Blob.from_string(data).id,
+    i.e. the sha1 of "blob <size>\\0" followed by the file contents.
+
+    @type   path: string
+    @param  path: An absolute path to a file
+
+    @rtype  string
+    @return The hex sha1 of the blob, or None if the file cannot be read
+
+    """
+
+    try:
+        file = open(path, "rb")
+    except (IOError, OSError):
+        return None
+
+    try:
+        size = os.fstat(file.fileno()).st_size
+        sha = hashlib.sha1()
+        sha.update(("blob %d\0" % size).encode("ascii"))
+
+        read = 0
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            sha.update(chunk)
+            read += len(chunk)
+    except (IOError, OSError):
+        return None
+    finally:
+        file.close()
+
+    # The file changed size while we were reading it, so the header we hashed
+    # is wrong.  Treat it as unreadable rather than returning a bogus id.
+    if read != size:
+        return None
+
+    return sha.hexdigest().encode("ascii")
+
+class BlobHasher:
+    """
+    Hashes working tree files into git blob ids using a pool of workers.
+
+    By default the work runs on a thread pool shared by all hashers.  Both
+    file reads and sha1 updates on large buffers release the GIL, so threads
+    already spread the work across cores.  A process pool can be requested
+    for hosts where that is not enough.  Such hashers, and ones given a
+    number of workers, have a pool of their own that close() stops.
+
+    Usage:
+        hasher = BlobHasher()
+        ids = hasher.hash_files(["/repo/a.txt", "/repo/b.txt"])
+        ids["/repo/a.txt"]
+
+    """
+
+    def __init__(self, workers=None, use_processes=False, chunk_size=CHUNK_SIZE):
+        # Only hashers with their own pool need to be closed
+        self.shared = (not workers and not use_processes)
+        if not workers:
+            workers = get_default_workers()
+
+        self.workers = workers
+        self.use_processes = use_processes
+        self.chunk_size = chunk_size
+        self.pool = None
+
+    def _get_pool(self):
+        if self.shared:
+            return get_shared_pool()
+
+        if self.pool is None:
+            if self.use_processes:
+                self.pool = multiprocessing.Pool(self.workers)
+            else:
+                self.pool = ThreadPool(self.workers)
+
+        return self.pool
+
+    def hash_file(self, path):
+        return hash_blob_file(path, self.chunk_size)
+
+    def hash_files(self, paths):
+        """
+        Hash a list of files
+
+        @type   paths: list
+        @param  paths: A list of absolute file paths
+
+        @rtype  dict
+        @return A dict of path -> blob id (None for unreadable files)
+
+        """
+
+        paths = list(paths)
+        if len(paths) < MIN_POOL_BATCH or self.workers < 2:
+            return dict((path, self.hash_file(path)) for path in paths)
+
+        chunksize = max(1, len(paths) // (self.workers * 4))
+        func = functools.partial(hash_blob_file, chunk_size=self.chunk_size)
+        ids = self._get_pool().map(func, paths, chunksize)
+        return dict(zip(paths, ids))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
@@ -0,0 +1,182 @@
+from __future__ import absolute_import
+#
+# mappedindex.py
+#
+
+import os
+import mmap
+import struct
+import threading
+from bisect import bisect_left
+from binascii import hexlify
+
+import six
+
+from .exceptions import IndexFormatError
+
+# ctime, ctime_ns, mtime, mtime_ns, dev, ino, mode, uid, gid, size, sha, flags
+ENTRY_FORMAT = ">LLLLLLLLLL20sH"
+ENTRY_SIZE = struct.calcsize(ENTRY_FORMAT)
+FLAG_EXTENDED = 0x4000
+SUPPORTED_VERSIONS = (2, 3)
+
+class MappedIndex:
+    """
+    A read-only view of a git index file backed by mmap.
+
+    Only the entry names are scanned when the view is created; the stat data
+    and sha of an entry are unpacked the first time that entry is looked up.
+    Lookups binary-search the (sorted) name list.
+
+    Entries are returned in the same tuple layout dulwich uses:
+        (ctime, mtime, dev, ino, mode, uid, gid, size, sha, flags)
+
+    Index versions 2 and 3 are supported.  Version 4 uses prefix-compressed
+    names and raises IndexFormatError so callers can fall back to dulwich.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = None
+        self._names = []
+        self._offsets = []
+        self._entries = {}
+        self._load()
+
+    def _load(self):
+        file = open(self.path, "rb")
+        try:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return
+            self._map = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+        finally:
+            file.close()
+
+        buf = self._map
+        if buf[:4] != b"DIRC":
+            raise IndexFormatError("Invalid index signature in %s" % self.path)
+
+        (version, count) = struct.unpack(">LL", buf[4:12])
+        if version not in SUPPORTED_VERSIONS:
+            raise IndexFormatError("Unsupported index version %d" % version)
+
+        offset = 12
+        names = self._names
+        offsets = self._offsets
+        for i in six.moves.range(count):
+            (flags, ) = struct.unpack(">H", buf[offset + ENTRY_SIZE - 2:offset + ENTRY_SIZE])
+            name_start = offset + ENTRY_SIZE
+            if version >= 3 and flags & FLAG_EXTENDED:
+                name_start += 2
+
+            name_end = buf.find(b"\0", name_start)
+            if name_end == -1:
+                raise IndexFormatError("Truncated index entry in %s" % self.path)
+
+            names.append(buf[name_start:name_end])
+            offsets.append(offset)
+
+            # Entries are NUL padded to a multiple of eight bytes
+            offset += (name_end - offset + 8) & ~7
+
+    def _find(self, name):
+        if isinstance(name, six.text_type):
+            name = name.encode("utf-8")
+
+        i = bisect_left(self._names, name)
+        if i < len(self._names) and self._names[i] == name:
+            return i
+        return -1
+
+    def _decode(self, i):
+        try:
+            return self._entries[i]
+        except KeyError:
+            pass
+
+        (ctime, ctime_ns, mtime, mtime_ns, dev, ino, mode, uid, gid, size, sha,
+            flags) = struct.unpack_from(ENTRY_FORMAT, self._map, self._offsets[i])
+
+        entry = ((ctime, ctime_ns), (mtime, mtime_ns), dev, ino, mode, uid,
+            gid, size, hexlify(sha), flags & ~0xfff)
+        self._entries[i] = entry
+        return entry
+
+    def __getitem__(self, name):
+        i = self._find(name)
+        if i == -1:
+            raise KeyError(name)
+        return self._decode(i)
+
+    def __contains__(self, name):
+        return self._find(name) != -1
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def paths(self):
+        return iter(self._names)
+
+    def get_sha1(self, name):
+        return self[name][8]
+
+    def get_mode(self, name):
+        return self[name][4]
+
+    def iterblobs(self):
+        for i, name in enumerate(self._names):
+            entry = self._decode(i)
+            yield (name, entry[8], entry[4])
+
+    def changes_from_tree(self, object_store, tree, want_unchanged=False):
+        """
+        Same as dulwich.index.Index.changes_from_tree
+        """
+        from dulwich.index import changes_from_tree
+
+        def lookup_entry(path):
+            entry = self[path]
+            return (entry[8], entry[4])
+
+        return changes_from_tree(self._names, lookup_entry, object_store, tree,
+            want_unchanged=want_unchanged)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def open_mapped_index(path):
+    """
+    Returns a MappedIndex for the given index file, reusing a previously
+    opened view as long as the file has not been rewritten.  Git replaces
+    the index by renaming a new file over it, so the inode, mtime and size
+    together identify a version of the file.
+
+    @type   path: string
+    @param  path: The path to a git index file
+
+    @rtype  MappedIndex
+
+    """
+
+    st = os.stat(path)
+    key = (st.st_ino, st.st_mtime, st.st_size)
+
+    with _cache_lock:
+        try:
+            (cached_key, index) = _cache[path]
+            if cached_key == key:
+                return index
+        except KeyError:
+            pass
+
+    index = MappedIndex(path)
+
+    with _cache_lock:
+        _cache[path] = (key, index)
+
+    return index
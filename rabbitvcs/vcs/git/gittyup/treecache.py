@@ -0,0 +1,101 @@
+from __future__ import absolute_import
+#
+# treecache.py
+#
+
+import stat
+import threading
+from collections import OrderedDict
+
+# Upper bound on the number of path entries held across all cached trees
+MAX_CACHED_ENTRIES = 500000
+
+class TreeIndexCache:
+    """
+    Flattens git trees into {path: (mode, sha)} dicts and remembers the result
+    for every tree and subtree by its sha.
+
+    Since a tree id covers its whole contents, a commit that only touches one
+    directory produces new ids for that directory and its parents only.  Only
+    those are flattened again, each from the cached dicts of its unchanged
+    subtrees, without reading any of their objects.
+
+    The returned dicts are shared between callers and must not be modified.
+    Lookups on them are plain dict lookups and need no locking.
+
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_ENTRIES):
+        self.max_entries = max_entries
+        self.trees = OrderedDict()
+        self.size = 0
+        self.lock = threading.RLock()
+
+    def _get(self, tree_id):
+        flattened = self.trees.pop(tree_id)
+        self.trees[tree_id] = flattened
+        return flattened
+
+    def _set(self, tree_id, flattened):
+        self.trees[tree_id] = flattened
+        self.size += len(flattened)
+
+    def _evict(self):
+        # The most recently flattened tree is always kept, even when it is
+        # bigger than the limit on its own
+        while self.size > self.max_entries and len(self.trees) > 1:
+            (old_id, old) = self.trees.popitem(last=False)
+            self.size -= len(old)
+
+    def _flatten(self, object_store, tree_id):
+        try:
+            return self._get(tree_id)
+        except KeyError:
+            pass
+
+        flattened = {}
+        for (name, mode, sha) in object_store[tree_id].iteritems():
+            if stat.S_ISDIR(mode):
+                if isinstance(name, bytes):
+                    prefix = name + b"/"
+                else:
+                    prefix = name + "/"
+
+                for (path, value) in self._flatten(object_store, sha).items():
+                    flattened[prefix + path] = value
+            else:
+                flattened[name] = (mode, sha)
+
+        self._set(tree_id, flattened)
+        return flattened
+
+    def flatten(self, object_store, tree_id):
+        """
+        Returns the flattened contents of a tree
+
+        @type   object_store: dulwich.object_store.BaseObjectStore
+        @param  object_store: The store holding the tree and its subtrees
+
+        @type   tree_id: string
+        @param  tree_id: The sha of the tree
+
+        @rtype  dict
+        @return A dict of path -> (mode, sha)
+
+        """
+
+        with self.lock:
+            flattened = self._flatten(object_store, tree_id)
+
+            # Evicting only once the whole tree is done keeps the subtrees
+            # it was built from, which the next commit will mostly share
+            self._evict()
+            return flattened
+
+    def clear(self):
+        with self.lock:
+            self.trees.clear()
+            self.size = 0
+
+# Tree ids are content hashes, so one cache can safely serve every repository
+tree_index_cache = TreeIndexCache()
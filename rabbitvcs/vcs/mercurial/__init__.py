@@ -28,8 +28,6 @@ from __future__ import absolute_import
 import os.path
 from datetime import datetime
 
-from mercurial import commands, ui, hg
-
 import rabbitvcs.util.helper
 
 import rabbitvcs.vcs
@@ -122,19 +120,58 @@ class Mercurial:
         "added"
     ]
 
+    # The statuses that repository.status() lists items under, in order
+    STATUS_LIST_ORDER = [
+        "modified",
+        "added",
+        "removed",
+        "missing",
+        "unknown",
+        "ignored",
+        "clean"
+    ]
+
+    # The statuses a directory can get from the items in it, lowest
+    # precedence first
+    DIRECTORY_PRECEDENCE = [
+        "unknown",
+        "clean",
+        "added",
+        "modified"
+    ]
+
     def __init__(self, repo=None):
         self.vcs = rabbitvcs.vcs.VCS_MERCURIAL
         self.interface = "mercurial"
 
-        self.ui = ui.ui()
+        self.ui = None
         self.repository = None
-        if repo:
-            self.repository_path = repo
-            self.repository = hg.repository(self.ui, self.repository_path)
+        self.repository_path = None
+        self.load_library()
 
         self.cache = rabbitvcs.vcs.status.StatusCache()
 
+        # Paths whose statuses (and those of everything under them) are in
+        # the cache, valid while the dirstate matches status_stamp
+        self.status_scopes = set()
+        self.status_stamp = None
+
+        if repo:
+            self.set_repository(repo)
+
+    def load_library(self):
+        """
+        Imports the Mercurial library.  This is done here rather than when
+        the module is loaded, so that backends which do not need it (see
+        rabbitvcs.vcs.mercurial.cmdserver) do not pay for the import.
+
+        """
+
+        from mercurial import ui
+        self.ui = ui.ui()
+
     def set_repository(self, path):
+        from mercurial import hg
         self.repository_path = path
         self.repository = hg.repository(self.ui, self.repository_path)
 
@@ -161,53 +198,174 @@ class Mercurial:
         return os.path.join(self.repository_path, path).rstrip("/")
     
     def statuses(self, path, recurse=True, invalidate=False):
-        mercurial_statuses = self.repository.status(clean=True, unknown=True)
+        """
+        Generates a list of MercurialStatus objects for the specified path.
 
-        # the status method returns a series of tuples filled with files matching
-        # the statuses below
-        tuple_order = ["modified", "added", "removed", "missing", "unknown", "ignored", "clean"]
-        
-        # go through each tuple (each of which has a defined status), and
-        # generate a flat list of rabbitvcs statuses
-        statuses = []
-        index = 0
-        directories = {}
-        for status_tuple in mercurial_statuses:
-            content = tuple_order[index]
-            for item in status_tuple:
-                st_path = self.get_absolute_path(item)
-                
-                rabbitvcs_status = rabbitvcs.vcs.status.MercurialStatus({
+        Only path and the items under it are looked up.  The results are
+        kept in the status cache until the dirstate changes or invalidate is
+        passed.
+
+        @type   path: string
+        @param  path: The file or directory to look up
+
+        @type   recurse: boolean
+        @param  recurse: Whether to return everything under a directory, or
+            only the items directly under it
+
+        """
+
+        if invalidate:
+            self._invalidate_status_scopes(path)
+        elif self._find_status_scope(path) is not None:
+            return self.cache.find_path_statuses(path)
+
+        contents = self._update_statuses(path)
+
+        path_statuses = []
+        for st_path in sorted(contents):
+            if (st_path == path or recurse or
+                    os.path.dirname(st_path) == path):
+                path_statuses.append(rabbitvcs.vcs.status.MercurialStatus({
                     "path": st_path,
-                    "content": content
-                })
-                statuses.append(rabbitvcs_status)
-                
-                # determine the statuses of the parent folders
-                dir_content = content
-                if content in self.STATUSES_FOR_REVERT:
-                    dir_content = "modified"
-                
+                    "content": contents[st_path]
+                }))
+
+        if not path_statuses:
+            return [rabbitvcs.vcs.status.Status.status_unknown(path)]
+
+        return path_statuses
+
+    def _get_dirstate_stamp(self):
+        try:
+            st = os.stat(os.path.join(self.repository_path, ".hg", "dirstate"))
+        except OSError:
+            return None
+
+        return (st.st_mtime, st.st_size)
+
+    def _find_status_scope(self, path):
+        """
+        Returns the path whose cached statuses cover path, or None.  All
+        cached statuses are dropped once the dirstate has changed.
+
+        """
+
+        stamp = self._get_dirstate_stamp()
+        if stamp != self.status_stamp:
+            self.status_scopes = set()
+            self.status_stamp = stamp
+            return None
+
+        path_to_check = path
+        while True:
+            if path_to_check in self.status_scopes:
+                return path_to_check
+
+            if (path_to_check == self.repository_path or
+                    path_to_check in ("/", "")):
+                return None
+
+            path_to_check = os.path.dirname(path_to_check)
+
+    def _invalidate_status_scopes(self, path):
+        prefix = path.rstrip("/") + "/"
+        for scope in list(self.status_scopes):
+            if (scope == path or scope.startswith(prefix) or
+                    path.startswith(scope.rstrip("/") + "/")):
+                self.status_scopes.discard(scope)
+
+    def _update_statuses(self, path):
+        """
+        Looks up the statuses of path and everything under it, and replaces
+        what the status cache has for them.
+
+        @rtype  dict
+        @return The Mercurial content status ("clean", "modified"...) of
+                every item, directories included, by absolute path
+
+        """
+
+        stamp = self._get_dirstate_stamp()
+
+        mercurial_statuses = self.get_status_lists(path)
+
+        # Every directory up to path gets the highest ranking status of the
+        # items under it.  A parent always ranks at least as high as its
+        # children, so climbing stops at the first one that already does.
+        contents = {}
+        directory_ranks = {}
+        for (content, items) in zip(self.STATUS_LIST_ORDER, mercurial_statuses):
+            dir_content = content
+            if content in self.STATUSES_FOR_REVERT:
+                dir_content = "modified"
+
+            rank = 0
+            if dir_content in self.DIRECTORY_PRECEDENCE:
+                rank = self.DIRECTORY_PRECEDENCE.index(dir_content)
+
+            for item in items:
+                st_path = self.get_absolute_path(item)
+                contents[st_path] = content
+
                 path_to_check = os.path.dirname(st_path)
-                while True:
-                    if path_to_check not in directories or directories[path_to_check] not in self.STATUSES_FOR_COMMIT:
-                        rabbitvcs_status = rabbitvcs.vcs.status.MercurialStatus({
-                            "path": path_to_check,
-                            "content": dir_content
-                        })
-                        statuses.append(rabbitvcs_status)
-                        directories[path_to_check] = dir_content
-                    
-                    if path_to_check == "" or path_to_check == self.repository_path:
+                while path_to_check.startswith(path):
+                    if directory_ranks.get(path_to_check, -1) >= rank:
+                        break
+
+                    directory_ranks[path_to_check] = rank
+
+                    if path_to_check == path or path_to_check == self.repository_path:
                         break
 
-                    path_to_check = os.path.split(path_to_check)[0]
+                    path_to_check = os.path.dirname(path_to_check)
+
+        for (dir_path, rank) in directory_ranks.items():
+            contents[dir_path] = self.DIRECTORY_PRECEDENCE[rank]
 
-            index += 1
+        content_status_map = rabbitvcs.vcs.status.MercurialStatus.content_status_map
+        self.cache.remove_path_statuses(path)
+        self.cache.update_contents(dict([(st_path, content_status_map.get(content))
+            for (st_path, content) in contents.items()]))
 
-        return statuses
+        if stamp != self.status_stamp:
+            self.status_scopes = set()
+            self.status_stamp = stamp
+        self.status_scopes.add(path)
+
+        return contents
     
+    def get_status_lists(self, path):
+        """
+        Runs a Mercurial status for path and everything under it.
+
+        @rtype  tuple
+        @return Lists of the paths (relative to the repository root) with each
+                of the statuses in STATUS_LIST_ORDER
+
+        """
+
+        from mercurial import scmutil
+
+        match = None
+        relative_path = self.get_relative_path(path)
+        if relative_path:
+            match = scmutil.match(self.repository[None],
+                ["path:%s" % relative_path])
+
+        return self.repository.status(match=match, clean=True, unknown=True)
+
     def status(self, path, summarize=True, invalidate=False):
+        if not invalidate and self._find_status_scope(path) is not None:
+            if path in self.cache:
+                st = self.cache[path]
+            else:
+                # Looked up, but not reported by hg (ignored, for example)
+                st = rabbitvcs.vcs.status.Status.status_unknown(path)
+
+            if summarize:
+                st.summary = st.single
+            return st
+
         all_statuses = self.statuses(path, invalidate=invalidate)
 
         if summarize:
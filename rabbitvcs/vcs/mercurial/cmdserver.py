@@ -0,0 +1,348 @@
+from __future__ import absolute_import
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+A Mercurial backend that talks to "hg serve --cmdserver pipe".
+
+Each repository gets one long-lived hg process, started the first time the
+repository is used, and requests are sent to it over its stdin and stdout.
+The process that uses this backend never imports the Mercurial library, and
+the repository is only opened once, by the server.
+
+The protocol is described at https://www.mercurial-scm.org/wiki/CommandServer
+"""
+
+import os
+import os.path
+import struct
+import subprocess
+import threading
+from datetime import datetime
+
+import simplejson
+import six
+
+import rabbitvcs.vcs.log
+from rabbitvcs.vcs.mercurial import Mercurial, Revision
+
+from rabbitvcs.util.log import Log
+log = Log("rabbitvcs.vcs.mercurial.cmdserver")
+
+from rabbitvcs import gettext
+_ = gettext.gettext
+
+# The status letters of "hg status", in STATUS_LIST_ORDER
+STATUS_CODES = "MAR!?IC"
+
+class CommandServerError(Exception):
+    pass
+
+class CommandServer:
+    """
+    A running "hg serve --cmdserver pipe" process for one repository.
+
+    run_commands() writes every request before reading the first result, so
+    a batch of commands costs a single round trip through the pipes.  The
+    server is thread-safe; batches from different threads are serialized.
+
+    """
+
+    def __init__(self, repository_path, hg="hg"):
+        self.repository_path = repository_path
+        self.lock = threading.Lock()
+
+        env = dict(os.environ)
+        env["HGPLAIN"] = "1"
+        env["HGENCODING"] = "UTF-8"
+
+        self.process = subprocess.Popen(
+            [hg, "serve", "--cmdserver", "pipe", "--config", "ui.interactive=False"],
+            cwd=repository_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env,
+            close_fds=True
+        )
+
+        # The server starts by saying hello on the output channel
+        (channel, data) = self._read_message()
+        capabilities = []
+        for line in data.decode("utf-8", "replace").splitlines():
+            if line.startswith("capabilities:"):
+                capabilities = line.split(":", 1)[1].split()
+
+        if channel != b"o" or "runcommand" not in capabilities:
+            self.close()
+            raise CommandServerError("Unexpected hello from the hg command server")
+
+    def _read_message(self):
+        header = self.process.stdout.read(5)
+        if len(header) < 5:
+            raise CommandServerError("The hg command server exited")
+
+        (channel, length) = struct.unpack(">cI", header)
+
+        # Upper case channels are required; the input channels ask for at
+        # most length bytes rather than sending them
+        if channel in (b"I", b"L"):
+            return (channel, length)
+
+        data = self.process.stdout.read(length)
+        return (channel, data)
+
+    def run_commands(self, commands):
+        """
+        Runs a batch of hg commands.
+
+        @type   commands: list
+        @param  commands: The arguments of each command, without "hg"
+
+        @rtype  list
+        @return A (return code, output, error output) tuple for each command
+
+        """
+
+        with self.lock:
+            try:
+                for args in commands:
+                    data = b"\0".join([six.text_type(arg).encode("utf-8")
+                        for arg in args])
+                    self.process.stdin.write(b"runcommand\n")
+                    self.process.stdin.write(struct.pack(">I", len(data)))
+                    self.process.stdin.write(data)
+                self.process.stdin.flush()
+
+                return [self._read_result() for args in commands]
+            except (IOError, OSError, struct.error) as e:
+                self.close()
+                raise CommandServerError(str(e))
+            except CommandServerError:
+                self.close()
+                raise
+
+    def _read_result(self):
+        output = []
+        errors = []
+        while True:
+            (channel, data) = self._read_message()
+            if channel == b"o":
+                output.append(data)
+            elif channel == b"e":
+                errors.append(data)
+            elif channel == b"r":
+                return (struct.unpack(">i", data)[0], b"".join(output),
+                    b"".join(errors))
+            elif channel in (b"I", b"L"):
+                # Nothing to give, which commands see as end of input
+                self.process.stdin.write(struct.pack(">I", 0))
+                self.process.stdin.flush()
+            elif channel.isupper():
+                raise CommandServerError("Unsupported required channel %s" % channel)
+
+    def run(self, args):
+        """
+        Runs a single hg command, raising CommandServerError if it fails
+
+        @rtype  bytes
+        @return The output of the command
+
+        """
+
+        (code, output, errors) = self.run_commands([args])[0]
+        if code != 0:
+            raise CommandServerError(errors.decode("utf-8", "replace").strip())
+        return output
+
+    def is_running(self):
+        return self.process.poll() is None
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait()
+        except (IOError, OSError):
+            pass
+
+class MercurialCommandServer(Mercurial):
+    """
+    The Mercurial backend, running its commands through a CommandServer
+    instead of the Mercurial library.  The hg process stops when close() is
+    called, or when this object is garbage collected and its pipes are
+    closed.
+
+    """
+
+    def load_library(self):
+        self.server = None
+
+    def close(self):
+        """
+        Stops the command server.  A new one is started if the client is
+        used again.
+
+        """
+
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+    def set_repository(self, path):
+        if self.server is not None and path != self.repository_path:
+            self.server.close()
+            self.server = None
+
+        self.repository_path = path
+
+    def get_server(self):
+        if self.server is None or not self.server.is_running():
+            self.server = CommandServer(self.repository_path)
+        return self.server
+
+    def _get_pattern(self, path):
+        relative_path = self.get_relative_path(path)
+        if relative_path:
+            return "path:%s" % relative_path
+        return "path:."
+
+    def get_status_lists(self, path):
+        output = self.get_server().run(["status", "--modified", "--added",
+            "--removed", "--deleted", "--unknown", "--clean", "--print0",
+            "--", self._get_pattern(path)])
+
+        lists = tuple([[] for code in STATUS_CODES])
+        for entry in output.decode("utf-8", "replace").split("\0"):
+            if len(entry) > 2 and entry[0] in STATUS_CODES:
+                lists[STATUS_CODES.index(entry[0])].append(entry[2:])
+
+        return lists
+
+    def _get_revision_argument(self, revision):
+        if revision is None or revision.kind == "HEAD" or not revision.value:
+            return "."
+        return six.text_type(revision.value)
+
+    def log(self, path=None, limit=None, revision=None):
+        """
+        Returns the history of the repository, or of path
+
+        @type   path: string
+        @param  path: Only return the changesets that touch this path
+
+        @type   limit: int
+        @param  limit: The most changesets to return
+
+        @type   revision: Revision
+        @param  revision: Start from this changeset instead of the working
+                          directory parent
+
+        @rtype  list
+        @return A list of rabbitvcs.vcs.log.Log objects, newest first
+
+        """
+
+        args = ["log", "--template", "json", "--debug",
+            "--rev", "reverse(::%s)" % self._get_revision_argument(revision)]
+        if limit:
+            args += ["--limit", str(limit)]
+        if path:
+            args += ["--", self._get_pattern(path)]
+
+        items = simplejson.loads(self.get_server().run(args).decode("utf-8"))
+
+        returner = []
+        for item in items:
+            changed_paths = []
+            for (key, action) in (("modified", "M"), ("added", "A"),
+                    ("removed", "R")):
+                for changed_path in item.get(key, []):
+                    changed_paths.append(rabbitvcs.vcs.log.LogChangedPath(
+                        changed_path, action, "", ""))
+
+            author = item.get("user") or _("(no author)")
+            pos = author.find("<")
+            if pos > 0:
+                author = author[0:pos].strip()
+
+            returner.append(rabbitvcs.vcs.log.Log(
+                datetime.fromtimestamp(item["date"][0]),
+                Revision("hash", item["node"]),
+                author,
+                item.get("desc", ""),
+                changed_paths,
+                [Revision("hash", parent) for parent in item.get("parents", [])
+                    if parent.strip("0")]
+            ))
+
+        return returner
+
+    def annotate(self, path, revision=None):
+        """
+        Returns an annotation for a specified file
+
+        @type   path: string
+        @param  path: The absolute path to a tracked file
+
+        @type   revision: Revision
+        @param  revision: The changeset to annotate at, by default the working
+                          directory parent
+
+        @rtype  list
+        @return A dict with "revision", "author", "date", "line" and "number"
+                keys for each line
+
+        """
+
+        output = self.get_server().run(["annotate", "--template", "json",
+            "--user", "--date", "--changeset", "--number",
+            "--rev", self._get_revision_argument(revision),
+            "--", self._get_pattern(path)])
+
+        lines = []
+        for item in simplejson.loads(output.decode("utf-8")):
+            # Newer versions group the lines by file
+            lines.extend(item.get("lines", [item]))
+
+        annotation = []
+        for (number, line) in enumerate(lines):
+            date = line.get("date")
+            if date:
+                date = datetime.fromtimestamp(date[0])
+
+            annotation.append({
+                "revision": line.get("node", six.text_type(line.get("rev", ""))),
+                "author": line.get("user", ""),
+                "date": date,
+                "line": line.get("line", "").rstrip("\n"),
+                "number": number + 1
+            })
+
+        return annotation
+
+    def run_batch(self, commands):
+        """
+        Sends several hg commands to the server at once.  See
+        CommandServer.run_commands.
+
+        """
+
+        return self.get_server().run_commands(commands)
@@ -84,9 +84,15 @@ class StatusCache(object):
     authors = []
     revisions = []
 
+    MAX_TOKENS = 1000
+
     def __init__(self):
         self.cache = {}
 
+        # Freshness tokens of the paths whose statuses were looked up as a
+        # whole.  Changing anything under a path forgets its token.
+        self.tokens = {}
+
     def __setitem__(self, path, status):
         try:
             content_index = self.keys.index(status.simple_content_status())
@@ -129,6 +135,7 @@ class StatusCache(object):
             log.debug(e)
 
     def __delitem__(self, path):
+        self._remove_tokens(path)
         try:
             del self.cache[path]
         except KeyError as e:
@@ -149,6 +156,83 @@ class StatusCache(object):
             
         return statuses
 
+    def update_contents(self, contents):
+        """
+        Caches the statuses of many items at once, for backends that only
+        know the content status of their items.
+
+        @type   contents: dict
+        @param  contents: Simple content statuses (status_normal,
+                          status_modified...) by path
+
+        """
+
+        content_indexes = dict([(key, index)
+            for (index, key) in enumerate(self.keys)])
+
+        if None not in self.revisions:
+            self.revisions.append(None)
+        if None not in self.authors:
+            self.authors.append(None)
+        revision_index = self.revisions.index(None)
+        author_index = self.authors.index(None)
+
+        for (path, content) in contents.items():
+            if content not in content_indexes:
+                log.debug("Unknown content status %s for %s" % (content, path))
+                continue
+
+            self.cache[path] = (content_indexes[content], 0, revision_index,
+                author_index, None)
+
+    def remove_path_statuses(self, path):
+        """
+        Removes the cached statuses of path and everything under it
+        """
+
+        prefix = path.rstrip("/") + "/"
+        for key in list(self.cache.keys()):
+            if key == path or key.startswith(prefix):
+                del self.cache[key]
+
+        self._remove_tokens(path)
+        for key in list(self.tokens.keys()):
+            if key.startswith(prefix):
+                del self.tokens[key]
+
+    def set_token(self, path, token):
+        """
+        Remembers that the statuses of path, and of everything under it,
+        were looked up when its freshness token was token.
+
+        """
+
+        if len(self.tokens) >= self.MAX_TOKENS:
+            self.tokens.clear()
+        self.tokens[path] = token
+
+    def is_fresh(self, path, token):
+        """
+        Whether the cached statuses of path can still be used: they were
+        looked up as a whole with the same token, and nothing under path was
+        invalidated since.
+
+        """
+
+        return token is not None and self.tokens.get(path) == token
+
+    def _remove_tokens(self, path):
+        # The statuses of path are part of those of every directory above it
+        if not self.tokens:
+            return
+
+        while True:
+            self.tokens.pop(path, None)
+            parent = os.path.dirname(path)
+            if parent == path or not parent:
+                break
+            path = parent
+
 class Status(object):
 
     @staticmethod
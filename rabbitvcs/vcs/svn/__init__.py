@@ -28,6 +28,12 @@ import subprocess
 import os
 import shutil
 import os.path
+import sys
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
 from os.path import isdir, isfile, dirname, islink, realpath
 from datetime import datetime
 
@@ -36,7 +42,11 @@ import pysvn
 import rabbitvcs.vcs
 import rabbitvcs.vcs.status
 import rabbitvcs.vcs.log
+import rabbitvcs.vcs.blame
+import rabbitvcs.vcs.svn.wcdb
+import rabbitvcs.vcs.svn.logcache
 import rabbitvcs.util.helper
+from rabbitvcs.util.cache import FileCache
 from rabbitvcs.util.log import Log
 from six.moves import map
 import six
@@ -50,6 +60,12 @@ _ = gettext.gettext
 # Extra "action" for "commit completed"
 commit_completed = "commit_completed"
 
+# Number of log entries fetched per request by SVN.log_pages()
+LOG_PAGE_SIZE = 100
+
+# Number of directory entries per page yielded by SVN.list_pages()
+LIST_PAGE_SIZE = 500
+
 class Revision:
     """
     Implements a simple revision object as a wrapper around the pysvn revision
@@ -111,6 +127,148 @@ class Revision:
     def primitive(self):
         return self.__revision
 
+class ClientPool:
+    """
+    A pool of pysvn.Client objects.
+
+    A pysvn client can only run one operation at a time, so every operation
+    checks a client out of the pool and returns it when done.  At most
+    max_clients are handed out at once and further callers wait for one to
+    be returned, except for a thread that already holds a client: it gets
+    another one, so a callback that makes another call cannot deadlock.  At
+    most max_idle clients are kept around between calls.
+
+    Attributes set on the pool (i.e. callbacks) are applied to every client
+    it hands out.
+
+    """
+
+    def __init__(self, max_clients=8, max_idle=4):
+        self.max_clients = max_clients
+        self.max_idle = max_idle
+        self.lock = threading.Condition()
+        self.idle = []
+        self.count = 0
+        self.holders = {}
+        self.attributes = {}
+        self.capabilities = {}
+
+    def checkout(self):
+        thread_id = threading.current_thread().ident
+        with self.lock:
+            while (not self.idle and self.count >= self.max_clients and
+                    thread_id not in self.holders):
+                self.lock.wait()
+
+            if self.idle:
+                client = self.idle.pop()
+            else:
+                client = None
+                self.count += 1
+
+            self.holders[thread_id] = self.holders.get(thread_id, 0) + 1
+            attributes = list(self.attributes.items())
+
+        if client is None:
+            try:
+                client = pysvn.Client()
+            except:
+                self._release(thread_id, None)
+                raise
+
+        for name, value in attributes:
+            setattr(client, name, value)
+        return client
+
+    def checkin(self, client):
+        self._release(threading.current_thread().ident, client)
+
+    def _release(self, thread_id, client):
+        with self.lock:
+            held = self.holders.pop(thread_id, 1) - 1
+            if held > 0:
+                self.holders[thread_id] = held
+
+            if client is not None and len(self.idle) < self.max_idle:
+                self.idle.append(client)
+            else:
+                self.count -= 1
+
+            self.lock.notify()
+
+    @contextmanager
+    def client(self):
+        client = self.checkout()
+        try:
+            yield client
+        finally:
+            self.checkin(client)
+
+    def set_attribute(self, name, value):
+        with self.lock:
+            self.attributes[name] = value
+
+    def get_attribute(self, name):
+        return self.attributes.get(name)
+
+    def has_method(self, name):
+        if name not in self.capabilities:
+            with self.client() as client:
+                self.capabilities[name] = hasattr(client, name)
+        return self.capabilities[name]
+
+class PooledClient(object):
+    """
+    Stands in for a single pysvn.Client, running each method call on a
+    client checked out of a ClientPool.
+
+    """
+
+    def __init__(self, pool):
+        object.__setattr__(self, "pool", pool)
+
+    def __getattr__(self, name):
+        if name.startswith("callback_"):
+            return self.pool.get_attribute(name)
+
+        if not self.pool.has_method(name):
+            raise AttributeError(name)
+
+        pool = self.pool
+        def call(*args, **kwargs):
+            with pool.client() as client:
+                return getattr(client, name)(*args, **kwargs)
+
+        return call
+
+    def __setattr__(self, name, value):
+        self.pool.set_attribute(name, value)
+
+    def status_batch(self, paths, **kwargs):
+        """
+        Runs status() on each of paths in turn with one client, so the calls
+        share its repository connection and credentials.  A failure only
+        affects the path it happened on.
+
+        @type   paths: list
+        @param  paths: The paths to look up
+
+        @rtype  list
+        @return A (path, pysvn statuses) tuple for each path, or
+                (path, exception) if the call failed
+
+        """
+
+        results = []
+        with self.pool.client() as client:
+            for path in paths:
+                try:
+                    results.append((path, client.status(path, **kwargs)))
+                except Exception as e:
+                    results.append((path, e))
+
+        return results
+
 class SVN:
     """
 
@@ -235,23 +393,102 @@ class SVN:
         pysvn.node_kind.unknown: "unknown"
     }
 
+    # Used to compare how much of a tree a status call covered
+    DEPTH_ORDER = {
+        pysvn.depth.empty:      0,
+        pysvn.depth.files:      1,
+        pysvn.depth.immediates: 2,
+        pysvn.depth.infinity:   3
+    }
+
+    INFO_CACHE_SIZE = 10000
+
+    # Seconds that remote status results are reused for
+    REMOTE_STATUS_TTL = 30
+
+    MAX_CACHED_LISTINGS = 20
+
+    # Seconds that listings of HEAD (or any other revision that can move)
+    # are reused for.  Listings of a revision number never change.
+    LISTING_TTL = 30
+
+    # Bytes of exported file revisions and of diff text to keep
+    EXPORT_CACHE_SIZE = 100 * 1024 * 1024
+    DIFF_CACHE_SIZE = 20 * 1024 * 1024
+
+    NOT_VERSIONED_INFO = {
+        "versioned": False,
+        "locked": False,
+        "url": None,
+        "repos_root_url": None
+    }
+
     def __init__(self):
-        self.client = pysvn.Client()
+        self.client = PooledClient(ClientPool())
+        if rabbitvcs.vcs.use_session_broker:
+            import rabbitvcs.vcs.svn.broker
+            self.client = rabbitvcs.vcs.svn.broker.create_brokered_client(
+                self.client)
         self.interface = "pysvn"
         self.vcs = rabbitvcs.vcs.VCS_SVN
         self.cache = rabbitvcs.vcs.status.StatusCache()
 
-    def statuses(self, path, recurse=True, update=False, invalidate=False):
+        # The depth each cached status call was made with, and the summary
+        # status of directories walked to full depth
+        self.cache_depths = {}
+        self.summaries = {}
+
+        # Working copy information for the is_* predicates, and the
+        # working copy root each path belongs to
+        self.info_cache = {}
+        self.repository_paths = {}
+
+        # Remote status results by the tuple of paths they were asked for
+        self.remote_updates = {}
+
+        # (timestamp, sorted directory listing) by (url, revision kind,
+        # revision value)
+        self.listings = OrderedDict()
+        self.listings_lock = threading.Lock()
+
+        # Exported file revisions and diffs, created when first used
+        self.exports = None
+        self.diffs = None
+
+        # Working copy databases for fast_status(), by working copy root
+        self.wc_databases = None
+        if rabbitvcs.vcs.svn.wcdb.is_available():
+            self.wc_databases = {}
+
+        # The wc.db stamp each fast_status() read was made against, and
+        # whether it covered the whole subtree, by path
+        self.fast_stamps = {}
+
+    def statuses(self, path, recurse=True, update=False, invalidate=False,
+            depth=None):
         """
 
         Look up the status for path.
 
+        Only as much of the tree as is needed is walked: the whole subtree
+        when recursing, otherwise the item and (for a directory) its
+        immediate children.  A specific pysvn.depth can also be passed.
+
         """
-        
+
+        if depth is None:
+            if recurse:
+                depth = pysvn.depth.infinity
+            elif isdir(path):
+                depth = pysvn.depth.immediates
+            else:
+                depth = pysvn.depth.empty
+
         if path in self.cache:
             if invalidate:
                 del self.cache[path]
-            else:
+                self._invalidate_summaries(path)
+            elif self._is_cached_to_depth(path, depth):
                 return self.cache.find_path_statuses(path)
 
         on_error = rabbitvcs.vcs.status.Status.status_unknown(path)
@@ -261,7 +498,7 @@ class SVN:
 
         try:
             pysvn_statuses = self.client.status(path,
-                                                depth=pysvn.depth.infinity,
+                                                depth=depth,
                                                 update=update)
             if not len(pysvn_statuses):
                 # This is NOT in the PySVN documentation, but sometimes it
@@ -279,6 +516,10 @@ class SVN:
                     rabbitvcs_status = rabbitvcs.vcs.status.SVNStatus(st)
                     self.cache[st.path] = rabbitvcs_status
                     statuslist.append(rabbitvcs_status)
+
+                self.cache_depths[path] = self.DEPTH_ORDER[depth]
+                if depth == pysvn.depth.infinity:
+                    self._update_summaries(path, statuslist)
                     
                 return statuslist
         except pysvn.ClientError as ex:
@@ -288,66 +529,477 @@ class SVN:
             log.exception(ex)
             return [on_error]
 
+    def _is_cached_to_depth(self, path, depth):
+        """
+        Determines whether the cached statuses under path came from a status
+        call at least as deep as the one requested.
+
+        """
+
+        wanted = self.DEPTH_ORDER[depth]
+        if wanted == self.DEPTH_ORDER[pysvn.depth.empty]:
+            return True
+
+        if self.cache_depths.get(path, -1) >= wanted:
+            return True
+
+        # Anything under a directory walked to full depth is covered too
+        infinity = self.DEPTH_ORDER[pysvn.depth.infinity]
+        path_to_check = os.path.dirname(path)
+        while path_to_check != "/" and path_to_check != "":
+            if self.cache_depths.get(path_to_check) == infinity:
+                return True
+            path_to_check = os.path.dirname(path_to_check)
+
+        return False
+
+    def _update_summaries(self, path, statuslist):
+        """
+        Works out the summary status of every directory under path from a
+        full-depth status list, in a single pass.
+
+        Each directory records whether anything at or below it is
+        complicated or modified.  A flag stops travelling up the tree at
+        the first directory that already has it, so every directory is
+        visited at most once per flag.
+
+        """
+
+        complicated = set()
+        modified = set()
+        singles = {}
+        for st in statuslist:
+            singles[st.path] = st.single
+
+            if st.single == rabbitvcs.vcs.status.status_complicated:
+                flagged = complicated
+            elif st.single in rabbitvcs.vcs.status.MODIFIED_CHILD_STATUSES:
+                flagged = modified
+            else:
+                continue
+
+            path_to_check = st.path
+            while path_to_check not in flagged:
+                flagged.add(path_to_check)
+                if path_to_check == path or not path_to_check.startswith(path):
+                    break
+                path_to_check = os.path.dirname(path_to_check)
+
+        # Only summaries that differ from the item's own status are kept
+        for summary_path in list(self.summaries.keys()):
+            if summary_path == path or summary_path.startswith(path + "/"):
+                del self.summaries[summary_path]
+
+        for st in statuslist:
+            if st.path in complicated:
+                summary = rabbitvcs.vcs.status.status_complicated
+            elif st.single in ["added", "modified", "deleted"]:
+                summary = st.single
+            elif st.path in modified:
+                summary = rabbitvcs.vcs.status.status_modified
+            else:
+                summary = st.single
+
+            if summary != st.single:
+                self.summaries[st.path] = summary
+
+    def _invalidate_summaries(self, path):
+        # A change under path makes the summaries of its parents stale
+        path_to_check = path
+        while path_to_check != "/" and path_to_check != "":
+            self.summaries.pop(path_to_check, None)
+            self.cache_depths.pop(path_to_check, None)
+            self.fast_stamps.pop(path_to_check, None)
+            path_to_check = os.path.dirname(path_to_check)
+
     def client_info(self, path):
         if islink(path):
             path = realpath(path)
         return self.client.info(path)
 
     def find_repository_path(self, path):
+        try:
+            root = self.repository_paths[path]
+            if isdir(os.path.join(root, ".svn")):
+                return root
+            del self.repository_paths[path]
+        except KeyError:
+            pass
+
         path_to_check = path
         while path_to_check != "/" and path_to_check != "":
             if os.path.isdir(os.path.join(path_to_check, ".svn")):
+                if len(self.repository_paths) > self.INFO_CACHE_SIZE:
+                    self.repository_paths.clear()
+                self.repository_paths[path] = path_to_check
                 return path_to_check
-            
+
             path_to_check = os.path.split(path_to_check)[0]
-        
+
         return None
 
+    def _get_wc_database(self, path):
+        if self.wc_databases is None:
+            return None
+
+        if isdir(path):
+            root = self.find_repository_path(path)
+        else:
+            root = self.find_repository_path(os.path.dirname(path))
+
+        if root is None or not isfile(os.path.join(root, ".svn", "wc.db")):
+            return None
+
+        try:
+            return self.wc_databases[root]
+        except KeyError:
+            database = rabbitvcs.vcs.svn.wcdb.WCDatabase(root)
+            self.wc_databases[root] = database
+            return database
+
+    def fast_status(self, path, summarize=True, invalidate=False):
+        """
+        Look up the status of path for display purposes, e.g. emblems.
+
+        The working copy's wc.db is read directly and files are only
+        compared by size and modification time.  pysvn is asked about the
+        items that leaves undecided, and about everything when wc.db cannot
+        be used (older working copies or no sqlite3 URI support).
+
+        The results go into the status cache and are reused until wc.db
+        changes on disk or the path is invalidated.
+
+        """
+
+        database = self._get_wc_database(path)
+        if database is None:
+            return self.status(path, summarize, invalidate)
+
+        if invalidate:
+            if path in self.cache:
+                del self.cache[path]
+            self._invalidate_summaries(path)
+
+        recurse = summarize and isdir(path)
+
+        try:
+            stamp = database.get_stamp()
+            if path in self.cache and self._is_fast_cached(path, stamp, recurse):
+                st = self.cache[path]
+                if recurse:
+                    st.summary = self.summaries.get(path, st.single)
+                else:
+                    st.summary = st.single
+                return st
+
+            (statuses, ambiguous) = database.statuses(path, recurse=recurse)
+        except Exception as e:
+            log.debug("Unable to read %s: %s" % (database.db_path, e))
+            return self.status(path, summarize, invalidate)
+
+        statuses += self._get_ambiguous_statuses(ambiguous)
+
+        for st in statuses:
+            if st.path == path:
+                path_status = st
+                break
+        else:
+            # Unversioned or ignored, which only pysvn can tell apart
+            return self.status(path, summarize, invalidate)
+
+        for st in statuses:
+            self.cache[st.path] = st
+
+        if recurse:
+            self._update_summaries(path, statuses)
+            path_status.summary = self.summaries.get(path, path_status.single)
+        else:
+            path_status.summary = path_status.single
+
+        if len(self.fast_stamps) > self.INFO_CACHE_SIZE:
+            self.fast_stamps.clear()
+        self.fast_stamps[path] = (stamp, recurse)
+
+        return path_status
+
+    def _is_fast_cached(self, path, stamp, recurse):
+        """
+        Determines whether the cached status of path was read from wc.db as
+        it is now, either on its own or as part of a subtree.
+
+        """
+
+        cached = self.fast_stamps.get(path)
+        if cached is not None and cached[0] == stamp and (cached[1] or not recurse):
+            return True
+
+        path_to_check = os.path.dirname(path)
+        while path_to_check != "/" and path_to_check != "":
+            if self.fast_stamps.get(path_to_check) == (stamp, True):
+                return True
+            path_to_check = os.path.dirname(path_to_check)
+
+        return False
+
+    def _get_ambiguous_statuses(self, paths):
+        """
+        Asks pysvn about the items wc.db could not decide.  Items sharing a
+        directory are looked up with one status call on that directory, so
+        the cost is bounded by the number of directories involved rather
+        than by a walk of the whole tree.
+
+        """
+
+        by_directory = {}
+        for path in paths:
+            by_directory.setdefault(os.path.dirname(path), []).append(path)
+
+        statuses = []
+        for (directory, items) in by_directory.items():
+            if len(items) == 1:
+                (target, depth) = (items[0], pysvn.depth.empty)
+            else:
+                (target, depth) = (directory, pysvn.depth.immediates)
+
+            wanted = set(items)
+            try:
+                for st in self.client.status(target, depth=depth):
+                    if st.path in wanted:
+                        statuses.append(rabbitvcs.vcs.status.SVNStatus(st))
+                        wanted.discard(st.path)
+            except pysvn.ClientError as e:
+                log.debug("Exception occured in SVN.status() for %s" % target)
+                log.exception(e)
+
+            for item in wanted:
+                statuses.append(rabbitvcs.vcs.status.Status.status_unknown(item))
+
+        return statuses
+
     def status(self, path, summarize=True, invalidate=False):
         if path in self.cache:
             if invalidate:
                 del self.cache[path]
-            else:
+                self._invalidate_summaries(path)
+            elif not summarize:
+                return self.cache[path]
+            elif (not isdir(path) or
+                    self._is_cached_to_depth(path, pysvn.depth.infinity)):
                 st = self.cache[path]
-                if summarize:
-                    st.summary = st.single
+                st.summary = self.summaries.get(path, st.single)
                 return st
 
-        all_statuses = self.statuses(path, recurse=summarize)
+        if not summarize:
+            return self.statuses(path, recurse=False,
+                depth=pysvn.depth.empty)[0]
 
-        if summarize:
-            path_status = None
-            for st in all_statuses:
-                if st.path == path:
-                    path_status = st
-                    break
-            
-            path_status.make_summary(all_statuses)
+        if isdir(path):
+            return self._summarize_directory(path)
+
+        st = self.statuses(path, recurse=False, depth=pysvn.depth.empty)[0]
+        st.summary = st.single
+        return st
+
+    def _summarize_directory(self, path):
+        """
+        Works out the summary status of a directory that has not been walked
+        to full depth.
+
+        The directory and its immediate children come from one immediates
+        status call.  Each child directory then contributes its cached
+        summary, and only the ones without a cached summary are walked.
+
+        """
+
+        statuslist = self.statuses(path, recurse=False,
+            depth=pysvn.depth.immediates)
+
+        path_status = None
+        aggregates = set()
+        for st in statuslist:
+            if st.path == path:
+                path_status = st
+                aggregates.add(st.single)
+                continue
+
+            aggregate = st.single
+            if (isdir(st.path) and st.single not in (
+                    rabbitvcs.vcs.status.status_unversioned,
+                    rabbitvcs.vcs.status.status_ignored)):
+                if not (st.path in self.cache and
+                        self._is_cached_to_depth(st.path, pysvn.depth.infinity)):
+                    self.statuses(st.path, recurse=True)
+                aggregate = self.summaries.get(st.path, st.single)
+
+            aggregates.add(aggregate)
+
+        if path_status is None:
+            return statuslist[0]
+
+        # The same rules _update_summaries() applies to a full walk
+        if rabbitvcs.vcs.status.status_complicated in aggregates:
+            summary = rabbitvcs.vcs.status.status_complicated
+        elif path_status.single in ["added", "modified", "deleted"]:
+            summary = path_status.single
+        elif aggregates & set(rabbitvcs.vcs.status.MODIFIED_CHILD_STATUSES):
+            summary = rabbitvcs.vcs.status.status_modified
         else:
-            path_status = all_statuses[0]
+            summary = path_status.single
+
+        if summary != path_status.single:
+            self.summaries[path] = summary
+        else:
+            self.summaries.pop(path, None)
+
+        # Everything under path is now cached to full depth
+        self.cache_depths[path] = self.DEPTH_ORDER[pysvn.depth.infinity]
 
+        path_status.summary = summary
         return path_status
 
-    def is_working_copy(self, path):
+    def _get_admin_stamp(self, path):
+        """
+        Returns a value that changes whenever the working copy metadata
+        covering path changes: the path and mtime of the nearest wc.db (SVN
+        1.7+) or entries file (older working copies).  Returns None if path
+        is not inside a working copy.
+
+        """
+
+        if isdir(path):
+            directory = path
+        else:
+            directory = os.path.dirname(path)
+
+        root = self.find_repository_path(directory)
+        if root is None:
+            return None
+        admin_dir = os.path.join(root, ".svn")
+
+        for name in ("wc.db", "entries"):
+            try:
+                return (admin_dir, os.stat(os.path.join(admin_dir, name)).st_mtime)
+            except OSError:
+                pass
+
+        return None
+
+    def _get_wc_info(self, path):
+        """
+        Returns cached working copy information for path.  The result is
+        reused until the working copy metadata (wc.db) changes.
+
+        @rtype:         dict
+        @return:        A dict with "versioned", "locked", "url" and
+                        "repos_root_url" keys
+
+        """
+
+        stamp = self._get_admin_stamp(path)
+        if stamp is None:
+            return self.NOT_VERSIONED_INFO
+
         try:
-            # when a versioned directory is removed and replaced with a
-            # non-versioned directory (one that doesn't have a working copy
-            # administration area, or .svn directory) you can't do a status
-            # call on that item itself (results in an exception).
-            #
-            # Note that this is not a conflict, it's more of a corruption.
-            # And it's associated with the status "obstructed". The only
-            # way to make sure that we're dealing with a working copy
-            # is by verifying the SVN administration area exists.
-            if (isdir(path) and
-                    self.client_info(path) and
-                    isdir(os.path.join(path, ".svn"))):
-                return True
-            return False
+            (cached_stamp, info) = self.info_cache[path]
+            if cached_stamp == stamp:
+                return info
+        except KeyError:
+            pass
+
+        info = dict(self.NOT_VERSIONED_INFO)
+        try:
+            info_path = path
+            if islink(info_path):
+                info_path = realpath(info_path)
+
+            entry = self.client.info2(info_path, recurse=False)[0][1]
+            info = self._make_wc_info(entry)
+        except pysvn.ClientError as e:
+            # info2 fails for unversioned items
+            pass
         except Exception as e:
-            # FIXME: ClientError client in use on another thread
-            #~ log.debug("EXCEPTION in is_working_copy(): %s" % str(e))
-            return False
+            log.exception("_get_wc_info exception for %s" % path)
+            return info
+
+        if len(self.info_cache) > self.INFO_CACHE_SIZE:
+            self.info_cache.clear()
+        self.info_cache[path] = (stamp, info)
+        return info
+
+    def _make_wc_info(self, entry):
+        return {
+            "versioned": True,
+            "locked": entry["lock"] is not None,
+            "url": entry["URL"],
+            "repos_root_url": entry["repos_root_URL"]
+        }
+
+    def cache_info(self, paths):
+        """
+        Fills the working copy information cache for several paths at once.
+        Paths that share a parent directory are looked up with a single
+        info2 call on that directory; the others are left to _get_wc_info.
+
+        @type   paths: list
+        @param  paths: A list of paths
+
+        """
+
+        by_directory = {}
+        for path in paths:
+            if islink(path):
+                continue
+
+            stamp = self._get_admin_stamp(path)
+            if stamp is None:
+                continue
+
+            cached = self.info_cache.get(path)
+            if cached is not None and cached[0] == stamp:
+                continue
+
+            by_directory.setdefault(os.path.dirname(path), []).append(
+                (path, stamp))
+
+        for (directory, items) in by_directory.items():
+            if len(items) < 2:
+                continue
+
+            try:
+                entries = self.client.info2(directory,
+                    depth=pysvn.depth.immediates)
+            except pysvn.ClientError as e:
+                # An unversioned directory, its items are not versioned
+                # either but _get_wc_info will find that out
+                continue
+            except Exception as e:
+                log.exception("cache_info exception for %s" % directory)
+                continue
+
+            infos = {}
+            for (entry_path, entry) in entries:
+                infos[os.path.abspath(entry_path)] = self._make_wc_info(entry)
+
+            if len(self.info_cache) + len(items) > self.INFO_CACHE_SIZE:
+                self.info_cache.clear()
+            for (path, stamp) in items:
+                # Unversioned items are not listed
+                info = infos.get(path, self.NOT_VERSIONED_INFO)
+                self.info_cache[path] = (stamp, info)
+
+    def is_working_copy(self, path):
+        # when a versioned directory is removed and replaced with a
+        # non-versioned directory (one that doesn't have a working copy
+        # administration area, or .svn directory) you can't do a status
+        # call on that item itself (results in an exception).
+        #
+        # Note that this is not a conflict, it's more of a corruption.
+        # And it's associated with the status "obstructed". The only
+        # way to make sure that we're dealing with a working copy
+        # is by verifying the SVN administration area exists.
+        return (isdir(path) and
+            isdir(os.path.join(path, ".svn")) and
+            self._get_wc_info(path)["versioned"])
 
     def is_in_a_or_a_working_copy(self, path):
         if self.is_working_copy(path):
@@ -356,18 +1008,7 @@ class SVN:
         return (self.find_repository_path(os.path.split(path)[0]) != "")
 
     def is_versioned(self, path):
-        if self.is_working_copy(path):
-            return True
-        else:
-            try:
-                # info will return nothing for an unversioned file inside a working copy
-                if (self.is_in_a_or_a_working_copy(path) and
-                        self.client_info(path)):
-                    return True
-            except Exception as e:
-                log.exception("is_versioned exception for %s" % path)
-                
-            return False
+        return self._get_wc_info(path)["versioned"]
 
     def is_status(self, path, status_kind):
         try:
@@ -389,14 +1030,7 @@ class SVN:
         return False
 
     def is_locked(self, path):
-        is_locked = False
-        try:
-            is_locked = self.client.info2(path, recurse=False)[0][1].lock is not None
-        except pysvn.ClientError as e:
-            return False
-            #log.exception("is_locked exception for %s" % path)
-
-        return is_locked
+        return self._get_wc_info(path)["locked"]
 
     def get_items(self, paths, statuses=[]):
         """
@@ -424,29 +1058,107 @@ class SVN:
 
         return items
 
-    def get_remote_updates(self, paths):
-        if paths is None:
-            return []
-        
+    def get_remote_updates(self, paths, invalidate=False):
         items = []
-        for path in paths:
-            try:
-                sts = self.statuses(path, update=True, invalidate=True)
-            except Exception as e:
-                log.exception(e)
-                continue
+        for group_items in self.iter_remote_updates(paths, invalidate):
+            items += group_items
 
-            for st in sts:
-                        
-                if st.remote_content is None and st.remote_metadata is None:
+        return items
+
+    def iter_remote_updates(self, paths, invalidate=False):
+        """
+        Yields the items under paths that have changed in the repository,
+        one working copy at a time.
+
+        The paths of one working copy are checked in one batch on a single
+        client, so they share its repository session.  Each path gets its
+        own remote status call, so nothing outside the selection is
+        checked, and a path that fails does not affect the others.  Results
+        are reused for REMOTE_STATUS_TTL seconds unless invalidate is set.
+
+        @type   paths: list
+        @param  paths: A list of working copy paths
+
+        @type   invalidate: boolean
+        @param  invalidate: Whether to ignore cached results
+
+        """
+
+        if paths is None:
+            return
+
+        for group in self._group_paths_by_working_copy(paths):
+            key = tuple(group)
+            if not invalidate and key in self.remote_updates:
+                (timestamp, items) = self.remote_updates[key]
+                if time.time() - timestamp < self.REMOTE_STATUS_TTL:
+                    yield items
                     continue
 
-                if st.remote_content == "none" and st.remote_metadata == "none":
+            # Items that only changed in the repository are still returned
+            # without get_all
+            items = []
+            failed = False
+            for (path, pysvn_statuses) in self.client.status_batch(group,
+                    depth=pysvn.depth.infinity, get_all=False, update=True):
+                if isinstance(pysvn_statuses, Exception):
+                    log.debug("Unable to check %s for remote updates: %s" %
+                        (path, pysvn_statuses))
+                    failed = True
                     continue
 
-                items.append(st)
+                for pysvn_status in pysvn_statuses:
+                    st = rabbitvcs.vcs.status.SVNStatus(pysvn_status)
+                    if st.remote_content is None and st.remote_metadata is None:
+                        continue
 
-        return items
+                    if st.remote_content == "none" and st.remote_metadata == "none":
+                        continue
+
+                    items.append(st)
+
+            # Incomplete results are shown but asked for again next time
+            if failed:
+                self.remote_updates.pop(key, None)
+                yield items
+                continue
+
+            self.remote_updates[key] = (time.time(), items)
+            yield items
+
+    def _group_paths_by_working_copy(self, paths):
+        """
+        Drops paths that are inside other given paths, then groups the rest
+        by the working copy they belong to.
+
+        """
+
+        top_level = []
+        for path in sorted(set([path.rstrip("/") or "/" for path in paths])):
+            if self._is_under_paths(path, top_level):
+                continue
+            top_level.append(path)
+
+        groups = {}
+        roots = []
+        for path in top_level:
+            if isdir(path):
+                root = self.find_repository_path(path)
+            else:
+                root = self.find_repository_path(os.path.dirname(path))
+
+            if root not in groups:
+                groups[root] = []
+                roots.append(root)
+            groups[root].append(path)
+
+        return [groups[root] for root in roots]
+
+    def _is_under_paths(self, path, parents):
+        for parent in parents:
+            if path == parent or path.startswith(parent.rstrip("/") + "/"):
+                return True
+        return False
 
     def get_repo_url(self, path):
         """
@@ -493,6 +1205,11 @@ class SVN:
 
         """
 
+        if not self.is_path_repository_url(path):
+            info = self._get_wc_info(path)
+            if info["versioned"]:
+                return info["repos_root_url"]
+
         info = self.client.info2(path, recurse=False)
         returner = ""
         try:
@@ -576,29 +1293,120 @@ class SVN:
         from_branch = from_branch.rstrip('/')
 
         merge_info = self.propget(to_path, "svn:mergeinfo")
+        merged_ranges = self._get_merged_ranges(merge_info, from_branch)
+
+        # Below the point where one branch was copied from the other, both
+        # logs hold the same revisions, so none of them can be candidates
+        lower_bound = 0
+        to_branch = self.get_repo_url(to_path).replace(from_url_root, '')
+        to_branch = to_branch.rstrip('/')
+        for (url_or_path, source_branch) in ((to_path, from_branch),
+                (from_url, to_branch)):
+            copy_source = self._get_copy_source(url_or_path)
+            if copy_source and copy_source[0].rstrip('/') == source_branch:
+                lower_bound = max(lower_bound, copy_source[1])
+
+        from_revisions = self._get_log_revision_numbers(from_url, lower_bound + 1)
+        to_revisions = set(self._get_log_revision_numbers(to_path, lower_bound + 1))
+
+        candidate_revisions = []
+        for revision in from_revisions:
+            if (revision not in to_revisions and
+                    not self._in_ranges(merged_ranges, revision)):
+                candidate_revisions.append(revision)
+
+        return candidate_revisions
+
+    def _get_merged_ranges(self, merge_info, branch):
+        """
+        Reads the revision ranges merged from branch out of an svn:mergeinfo
+        value, as a sorted list of non-overlapping (start, end) tuples.
 
-        merged_revisions = []
-        for branch in merge_info.split('\n'):
-            if not branch.startswith(from_branch + ':'):
+        """
+
+        ranges = []
+        for line in merge_info.split('\n'):
+            if not line.startswith(branch + ':'):
                 continue
-            revisions = branch.split(':')[1]  # branch:rev,rev-rev,...
-            for rev in revisions.split(','):
+
+            # branch:rev,rev-rev,... with a * marking non-inheritable ranges
+            for rev in line.split(':')[1].split(','):
+                rev = rev.strip().rstrip('*')
+                if not rev:
+                    continue
                 if rev.find('-') != -1:
                     (rev_s, rev_e) = rev.split('-')
-                    merged_revisions += list(range(int(rev_s), int(rev_e) + 1))
+                    ranges.append((int(rev_s), int(rev_e)))
                 else:
-                    merged_revisions.append(int(rev))
+                    ranges.append((int(rev), int(rev)))
 
-        from_log = self.log(from_url, strict_node_history=False)
-        from_revisions = [ int(l.revision.short()) for l in from_log ]
+        ranges.sort()
+        merged = []
+        for (start, end) in ranges:
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
 
-        to_log = self.log(to_path, strict_node_history=False)
-        to_revisions = [ int(l.revision.short()) for l in to_log ]
+        return merged
 
-        candidate_revisions = list(set(from_revisions) - set(to_revisions) - set(merged_revisions))
+    def _in_ranges(self, ranges, revision):
+        i = bisect.bisect_right(ranges, (revision, sys.maxsize))
+        return i > 0 and ranges[i - 1][1] >= revision
 
-        return candidate_revisions
+    def _get_copy_source(self, url_or_path):
+        """
+        Returns the (path, revision) a branch was copied from, or None if its
+        history does not start with a copy.
 
+        """
+
+        try:
+            info = self.client.info2(url_or_path, recurse=False)[0][1]
+            repos_path = info["URL"][len(info["repos_root_URL"]):]
+
+            # The first revision of the node, not following copies
+            entries = self._fetch_log_entries(url_or_path,
+                pysvn.Revision(pysvn.opt_revision_kind.number, 0),
+                pysvn.Revision(pysvn.opt_revision_kind.head),
+                1, strict_node_history=True)
+        except pysvn.ClientError as e:
+            log.debug("Unable to find the copy source of %s: %s" % (url_or_path, e))
+            return None
+
+        if not entries:
+            return None
+
+        for (path, action, copy_from_path, copy_from_revision) in entries[0][4]:
+            if path == repos_path and copy_from_path:
+                return (copy_from_path, copy_from_revision)
+
+        return None
+
+    def _get_log_revision_numbers(self, url_or_path, end):
+        """
+        Returns the revision numbers in the log of url_or_path from HEAD down
+        to end, from the log cache when it already covers them.
+
+        """
+
+        try:
+            location = self._get_log_location(url_or_path, True)
+        except pysvn.ClientError as e:
+            location = None
+
+        if location is not None:
+            (cache, repos_path, head) = location
+            known = cache.get_range(repos_path)
+            if known and known[0] >= head and known[1] <= end:
+                return cache.get_revision_numbers(repos_path, head, end)
+
+        numbers = []
+        for page in self.log_pages(url_or_path,
+                revision_end=self.revision("number", number=end)):
+            numbers += [int(item.revision.short()) for item in page]
+
+        return numbers
 
     #
     # properties
@@ -844,6 +1652,20 @@ class SVN:
         self.client.revpropset(prop_name, prop_value, url,
             revision=rev.primitive())
 
+        # Keep the log cache in line with the edited revision
+        if prop_name in ("svn:log", "svn:author") and rev.kind == "number":
+            try:
+                info = self.client.info2(url, recurse=False)[0][1]
+                cache = rabbitvcs.vcs.svn.logcache.get_log_cache(info["repos_UUID"])
+            except pysvn.ClientError as e:
+                cache = None
+
+            if cache is not None:
+                if prop_name == "svn:log":
+                    cache.update_revision(int(rev.value), message=prop_value)
+                else:
+                    cache.update_revision(int(rev.value), author=prop_value)
+
     def revproplist(self, url, rev=None):
         """
         Retrieves a dictionary of properties for a url.
@@ -1177,50 +1999,205 @@ class SVN:
 
         """
 
-        log = self.client.log(url_or_path, revision_start.primitive(),
-            revision_end.primitive(), discover_changed_paths,
-            strict_node_history, limit)
-
         returner = []
-        for item in log:
-            revision = Revision(pysvn.opt_revision_kind.number, item.revision.number)
-            date = datetime.fromtimestamp(item.date) if hasattr(item, "date") else datetime(1900, 1, 1)
-            
-            author = _("(no author)")
-            if hasattr(item, "author"):
-                author = item["author"]        
+        for page in self.log_pages(url_or_path, revision_start, revision_end,
+                limit, discover_changed_paths, strict_node_history):
+            returner += page
 
-            message = ""
-            if hasattr(item, "message"):
-                message = item["message"]
-        
+        return returner
+
+    def log_pages(self, url_or_path, revision_start=Revision("head"),
+            revision_end=Revision("number", 0), limit=0,
+            discover_changed_paths=True, strict_node_history=False,
+            page_size=LOG_PAGE_SIZE):
+        """
+        Same as log(), but yields the log items a page at a time, newest
+        first, so callers can show them while the rest is being fetched.
+
+        Logs with changed paths are kept in the repository's log cache.
+        Revisions the cache already has are served from it, and only the
+        rest is asked from the server.
+
+        """
+
+        location = None
+        if (discover_changed_paths and not strict_node_history and
+                revision_start.kind in ("head", "number") and
+                revision_end.kind == "number"):
+            try:
+                location = self._get_log_location(url_or_path,
+                    revision_start.kind == "head")
+            except pysvn.ClientError as e:
+                log.debug("Unable to use the log cache for %s: %s" % (url_or_path, e))
+
+        if location is None:
+            pages = self._fetch_log_pages(url_or_path, revision_start.primitive(),
+                revision_end.primitive(), limit, discover_changed_paths,
+                strict_node_history, page_size)
+        else:
+            (cache, repos_path, head) = location
+            start = head
+            if revision_start.kind == "number":
+                start = int(revision_start.value)
+            pages = self._cached_log_pages(cache, repos_path, url_or_path,
+                start, int(revision_end.value or 0), limit, page_size)
+
+        for entries in pages:
+            yield [self._make_log_item(entry) for entry in entries]
+
+    def _get_log_location(self, url_or_path, resolve_head):
+        """
+        Returns the log cache, repository path and (if asked for) HEAD
+        revision number of a path, or None if there is no cache for it.
+
+        """
+
+        info = self.client.info2(url_or_path, recurse=False)[0][1]
+        cache = rabbitvcs.vcs.svn.logcache.get_log_cache(info["repos_UUID"])
+        if cache is None:
+            return None
+
+        repos_path = info["URL"][len(info["repos_root_URL"]):] or "/"
+
+        head = None
+        if resolve_head:
+            head = self.client.info2(info["URL"],
+                revision=pysvn.Revision(pysvn.opt_revision_kind.head),
+                recurse=False)[0][1]["rev"].number
+
+        return (cache, repos_path, head)
+
+    def _fetch_log_entries(self, url_or_path, revision_start, revision_end,
+            limit, discover_changed_paths=True, strict_node_history=False):
+        entries = []
+        for item in self.client.log(url_or_path, revision_start, revision_end,
+                discover_changed_paths, strict_node_history, limit):
             changed_paths = []
-            for changed_path in item.changed_paths:
-                copy_from_rev = ""
+            for changed_path in (item.changed_paths or []):
+                copy_from_revision = None
                 if hasattr(changed_path.copyfrom_revision, "number"):
-                    copy_from_rev = self.revision("number", changed_path.copyfrom_revision.number)
-            
-                copy_from_path = ""
-                if hasattr(changed_path, "copy_from_path"):
-                    copy_from_path = changed_path.copy_from_path
-                    
-                changed_paths.append(rabbitvcs.vcs.log.LogChangedPath(
+                    copy_from_revision = changed_path.copyfrom_revision.number
+
+                changed_paths.append((
                     changed_path.path,
                     changed_path.action,
-                    copy_from_path,
-                    copy_from_rev                    
+                    getattr(changed_path, "copyfrom_path", None),
+                    copy_from_revision
                 ))
-        
-            returner.append(rabbitvcs.vcs.log.Log(
-                date,
-                revision,
-                author,
-                message,
-                changed_paths,
-                None
+
+            entries.append((
+                item.revision.number,
+                getattr(item, "author", None),
+                getattr(item, "date", None),
+                getattr(item, "message", None),
+                changed_paths
             ))
-        
-        return returner
+
+        return entries
+
+    def _fetch_log_pages(self, url_or_path, revision_start, revision_end,
+            limit, discover_changed_paths, strict_node_history, page_size):
+        remaining = limit
+        while True:
+            count = page_size
+            if limit:
+                count = min(page_size, remaining)
+
+            entries = self._fetch_log_entries(url_or_path, revision_start,
+                revision_end, count, discover_changed_paths,
+                strict_node_history)
+            if entries:
+                yield entries
+
+            remaining -= len(entries)
+            if len(entries) < count or (limit and remaining <= 0):
+                break
+
+            # Continue below the oldest revision of this page
+            next_start = entries[-1][0] - 1
+            if next_start < 0:
+                break
+            revision_start = pysvn.Revision(pysvn.opt_revision_kind.number,
+                next_start)
+
+    def _cached_log_pages(self, cache, repos_path, url_or_path, start, end,
+            limit, page_size):
+        remaining = limit
+        current = start
+        while current >= end and not (limit and remaining <= 0):
+            count = page_size
+            if limit:
+                count = min(page_size, remaining)
+
+            known = cache.get_range(repos_path)
+            if known and known[1] <= current <= known[0]:
+                bottom = max(known[1], end)
+                entries = cache.get_entries(repos_path, current, bottom, count)
+                if len(entries) < count:
+                    current = bottom - 1
+                else:
+                    current = entries[-1][0] - 1
+            else:
+                # Only fetch down to the newest cached revision
+                stop = end
+                if known and known[0] < current:
+                    stop = max(end, known[0] + 1)
+
+                entries = self._fetch_log_entries(url_or_path,
+                    pysvn.Revision(pysvn.opt_revision_kind.number, current),
+                    pysvn.Revision(pysvn.opt_revision_kind.number, stop),
+                    count)
+
+                # A short page means there is nothing else down to stop
+                bottom = stop
+                if len(entries) == count:
+                    bottom = entries[-1][0]
+
+                cache.add(repos_path, entries, current, bottom)
+                current = bottom - 1
+
+            if entries:
+                remaining -= len(entries)
+                yield entries
+
+    def _make_log_item(self, entry):
+        (number, author, date, message, changed_paths) = entry
+
+        revision = Revision(pysvn.opt_revision_kind.number, number)
+
+        if date is not None:
+            date = datetime.fromtimestamp(date)
+        else:
+            date = datetime(1900, 1, 1)
+
+        if author is None:
+            author = _("(no author)")
+
+        if message is None:
+            message = ""
+
+        log_changed_paths = []
+        for (path, action, copy_from_path, copy_from_revision) in changed_paths:
+            if copy_from_revision is not None:
+                copy_from_revision = self.revision("number", copy_from_revision)
+            else:
+                copy_from_revision = ""
+
+            log_changed_paths.append(rabbitvcs.vcs.log.LogChangedPath(
+                path,
+                action,
+                copy_from_path or "",
+                copy_from_revision
+            ))
+
+        return rabbitvcs.vcs.log.Log(
+            date,
+            revision,
+            author,
+            message,
+            log_changed_paths,
+            None
+        )
 
     def export(self, src_url_or_path, dest_path, revision=Revision("head"),
             recurse=True, ignore_externals=False, force=False, native_eol=None):
@@ -1249,6 +2226,67 @@ class SVN:
         self.client.export(src_url_or_path, dest_path, force,
             revision.primitive(), native_eol, ignore_externals, recurse)
 
+    def export_file(self, url_or_path, dest_path, revision=Revision("head")):
+
+        """
+        Export a file revision, like export(), keeping a copy of files in
+        the export cache.  Exporting the same contents again, from any URL or
+        working copy path that leads to them, is then a local copy.
+
+        @type   url_or_path: string
+        @param  url_or_path: The file to export
+
+        @type   dest_path: string
+        @param  dest_path: The path to export to
+
+        @type   revision: rabbitvcs.vcs.svn.Revision
+        @param  revision: The revision to export
+
+        """
+
+        content_id = self._get_content_id(url_or_path, revision)
+        if content_id is None:
+            self.export(url_or_path, dest_path, revision)
+            return
+
+        exports = self._get_content_caches()[0]
+        if exports.get_file(content_id, dest_path):
+            return
+
+        self.export(url_or_path, dest_path, revision)
+        exports.add_file(content_id, dest_path)
+
+    def _get_content_caches(self):
+        if self.exports is None:
+            self.diffs = FileCache("svndiff", self.DIFF_CACHE_SIZE)
+            self.exports = FileCache("svnexport", self.EXPORT_CACHE_SIZE)
+
+        return (self.exports, self.diffs)
+
+    def _get_content_id(self, url_or_path, revision):
+        """
+        Identifies the contents of a file at a revision, as the repository,
+        URL and revision the file was last changed in.  Returns None for
+        working copy contents, directories and anything info2 fails on.
+
+        """
+
+        if revision.kind == "working":
+            return None
+
+        try:
+            info = self.client.info2(url_or_path, revision=revision.primitive(),
+                recurse=False)[0][1]
+        except pysvn.ClientError as e:
+            log.debug("Unable to identify %s: %s" % (url_or_path, e))
+            return None
+
+        if info["kind"] != pysvn.node_kind.file:
+            return None
+
+        return ("svn", info["repos_UUID"], info["URL"],
+            info["last_changed_rev"].number)
+
     def import_(self, path, url, log_message, ignore=False):
 
         """
@@ -1465,10 +2503,106 @@ class SVN:
         @type   to_revision: pysvn.Revision
         @param  to_revision: Revision to (def: HEAD)
 
+        Results are cached, keyed by the revision that last changed the
+        file, and a new revision is built from the cached annotation of the
+        previous change when one is available.
+
         """
 
-        return self.client.annotate(url_or_path, from_revision.primitive(),
-            to_revision.primitive())
+        info = None
+        try:
+            info = self.client.info2(url_or_path,
+                revision=to_revision.primitive(), recurse=False)[0][1]
+        except pysvn.ClientError as e:
+            log.exception(e)
+
+        if info is None or info["last_changed_rev"] is None:
+            return self.client.annotate(url_or_path, from_revision.primitive(),
+                to_revision.primitive())
+
+        url = info["URL"]
+        last_changed = info["last_changed_rev"].number
+        cache = rabbitvcs.vcs.blame.get_blame_cache()
+        key = self._get_blame_cache_key(info, from_revision, last_changed)
+
+        blame = cache.get(key)
+        if blame is None:
+            blame = self._reblame(url, info, from_revision, last_changed)
+
+        if blame is None:
+            to_revision = Revision("number", last_changed)
+            blame = [{
+                "author": item.get("author", ""),
+                "date": item.get("date", ""),
+                "line": item["line"],
+                "number": item["number"],
+                "revision": item["revision"].number
+            } for item in self.client.annotate(url, from_revision.primitive(),
+                to_revision.primitive(), peg_revision=to_revision.primitive())]
+
+        cache.set(key, blame)
+
+        for item in blame:
+            item["revision"] = pysvn.Revision(pysvn.opt_revision_kind.number,
+                item["revision"])
+
+        return blame
+
+    def _get_blame_cache_key(self, info, from_revision, revision):
+        return ("svn", info["repos_UUID"], info["URL"],
+            six.text_type(from_revision), revision)
+
+    def _reblame(self, url, info, from_revision, revision):
+        """
+        Build the annotation of a revision from the cached annotation of the
+        previous revision that changed the file.  Returns None if there is no
+        such cached annotation.
+
+        """
+
+        peg = pysvn.Revision(pysvn.opt_revision_kind.number, revision)
+        try:
+            history = self.client.log(url, revision_start=peg,
+                revision_end=from_revision.primitive(),
+                discover_changed_paths=False, strict_node_history=False,
+                limit=2, peg_revision=peg)
+        except pysvn.ClientError as e:
+            log.exception(e)
+            return None
+
+        if len(history) < 2 or history[0].revision.number != revision:
+            return None
+
+        parent_blame = rabbitvcs.vcs.blame.get_blame_cache().get(
+            self._get_blame_cache_key(info, from_revision,
+                history[1].revision.number))
+        if parent_blame is None:
+            return None
+
+        content = self.client.cat(url, revision=peg, peg_revision=peg)
+        if six.PY3 and isinstance(content, bytes):
+            content = content.decode("utf-8", "replace")
+
+        commit = history[0]
+        date = ""
+        if hasattr(commit, "date"):
+            date = time.strftime("%Y-%m-%dT%H:%M:%S.000000Z",
+                time.gmtime(commit.date))
+
+        author = ""
+        if hasattr(commit, "author"):
+            author = commit["author"]
+
+        def make_entry(line):
+            return {
+                "author": author,
+                "date": date,
+                "line": line,
+                "revision": revision
+            }
+
+        return rabbitvcs.vcs.blame.reblame(parent_blame, content.splitlines(),
+            make_entry)
 
     def merge_ranges(self, source, ranges_to_merge, peg_revision,
             target_wcpath, notice_ancestry=False, force=False, dry_run=False,
@@ -1622,10 +2756,37 @@ class SVN:
 
         """
 
-        return self.client.diff(tmp_path, url_or_path, revision1.primitive(),
+        # Diffs between two fixed file revisions never change
+        key = None
+        content_id1 = self._get_content_id(url_or_path, revision1)
+        if content_id1 is not None:
+            content_id2 = self._get_content_id(url_or_path2, revision2)
+            if content_id2 is not None:
+                # The headers of the diff name the paths as they were given
+                key = (content_id1, content_id2, url_or_path, url_or_path2,
+                    recurse, ignore_ancestry, diff_deleted, ignore_content_type)
+
+        if key is not None:
+            data = self._get_content_caches()[1].get_data(key)
+            if data is not None:
+                # Stored with a marker of the type pysvn returned
+                if data[:1] == b"u":
+                    return data[1:].decode("utf-8")
+                return data[1:]
+
+        diff_text = self.client.diff(tmp_path, url_or_path, revision1.primitive(),
             url_or_path2, revision2.primitive(), recurse, ignore_ancestry,
             diff_deleted, ignore_content_type)
 
+        if key is not None:
+            if isinstance(diff_text, six.text_type):
+                data = b"u" + diff_text.encode("utf-8")
+            else:
+                data = b"b" + diff_text
+            self._get_content_caches()[1].set_data(key, data)
+
+        return diff_text
+
     def diff_summarize(self, url_or_path1, revision1, url_or_path2, revision2,
             recurse=True, ignore_ancestry=False):
         """
@@ -1662,6 +2823,73 @@ class SVN:
         return self.client.list(url_or_path, revision=revision.primitive(),
             recurse=recurse)
 
+    def get_listing(self, url_or_path, revision=Revision("HEAD"),
+            invalidate=False):
+        """
+        Returns the (non-recursive) listing of a repository directory, the
+        directory itself first, then folders and then files, each sorted by
+        path.
+
+        Listings are kept per URL and revision for the most recently listed
+        MAX_CACHED_LISTINGS directories.  Listings of a revision number are
+        reused until they are evicted, while those of HEAD and other moving
+        revisions are only reused for LISTING_TTL seconds.  Pass invalidate
+        after changing the directory in the repository.
+
+        @type   url_or_path: string
+        @param  url_or_path: A repository URL or working copy path
+
+        @type   revision: rabbitvcs.vcs.svn.Revision
+        @param  revision: The revision to list
+
+        @type   invalidate: boolean
+        @param  invalidate: Whether to ignore a cached listing
+
+        @rtype  list
+        @return A list of (PysvnList, PysvnLock) tuples, as list() returns
+
+        """
+
+        key = (rabbitvcs.util.helper.urlize(url_or_path), revision.kind,
+            revision.value)
+
+        with self.listings_lock:
+            if not invalidate and key in self.listings:
+                (timestamp, listing) = self.listings.pop(key)
+                if (revision.kind == "number" or
+                        time.time() - timestamp < self.LISTING_TTL):
+                    self.listings[key] = (timestamp, listing)
+                    return listing
+
+        listing = self.list(url_or_path, revision, recurse=False)
+        listing.sort(key=self._get_listing_sort_key)
+
+        with self.listings_lock:
+            self.listings.pop(key, None)
+            self.listings[key] = (time.time(), listing)
+            while len(self.listings) > self.MAX_CACHED_LISTINGS:
+                self.listings.popitem(last=False)
+
+        return listing
+
+    def list_pages(self, url_or_path, revision=Revision("HEAD"),
+            page_size=LIST_PAGE_SIZE, invalidate=False):
+        """
+        Same as get_listing(), but yields the listing page_size items at a
+        time so large directories can be shown progressively.
+
+        """
+
+        listing = self.get_listing(url_or_path, revision, invalidate)
+        for start in range(0, len(listing), page_size):
+            yield listing[start:start + page_size]
+
+    def _get_listing_sort_key(self, item):
+        # Folders before files.  The listed directory itself sorts first
+        # since its path is a prefix of all the others.
+        entry = item[0]
+        return (self.NODE_KINDS_REVERSE[entry.kind] != "dir", entry.repos_path)
+
     def mkdir(self, url_or_path, log_message):
         """
         Make a new directory in the repository or working copy
@@ -0,0 +1,264 @@
+from __future__ import absolute_import
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Runs read-only repository operations in the checker service.
+
+Every dialog is a short-lived process with its own pysvn clients, so each
+one would have to connect and authenticate to the repository again.  The
+checker service lives for the whole session, so its clients keep their
+connections warm and their credentials cached.  UI processes wrap their
+client in a BrokeredClient, which sends log, list, info2 and cat calls on
+repository URLs to the service over D-Bus.
+
+Arguments and results cross D-Bus as JSON.  pysvn revisions, enums and
+result objects are converted to and from tagged JSON objects.  If the service
+cannot run a call (it is not running, or the repository needs credentials
+it does not have), the call is run locally as before.
+"""
+
+import base64
+
+import simplejson
+import six
+import pysvn
+
+from rabbitvcs.util.log import Log
+log = Log("rabbitvcs.vcs.svn.broker")
+
+# Read-only calls that talk to the repository
+BROKERED_METHODS = ("log", "list", "info2", "cat")
+
+# The enums that appear in their arguments and results
+ENUMS = {
+    "node_kind": pysvn.node_kind,
+    "opt_revision_kind": pysvn.opt_revision_kind,
+    "depth": pysvn.depth,
+    "wc_schedule": pysvn.wc_schedule
+}
+
+class BrokerUnavailable(Exception):
+    """
+    Raised when the checker service cannot be reached at all
+    """
+    pass
+
+class BrokeredDict(dict):
+    """
+    Stands in for the pysvn result dicts (PysvnLog, PysvnList, PysvnInfo...),
+    which allow their keys to be read as attributes.
+
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @property
+    def data(self):
+        # pysvn result objects expose their values as .data too
+        return self
+
+def _get_result_dict(value):
+    """
+    Returns the values of a pysvn result object (a PysvnDictBase, which is
+    not a dict but keeps its values in .data) or of a plain dict, or None
+    for anything else.
+
+    """
+
+    if isinstance(value, dict):
+        return value
+
+    data = getattr(value, "data", None)
+    if isinstance(data, dict) and hasattr(value, "keys"):
+        return data
+
+    return None
+
+def encode(value):
+    """
+    Converts pysvn arguments and results into JSON-compatible values
+    """
+
+    if isinstance(value, pysvn.Revision):
+        return {"__revision__": [
+            str(value.kind),
+            getattr(value, "number", None),
+            getattr(value, "date", None)
+        ]}
+    elif isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    elif isinstance(value, six.binary_type):
+        # File contents need not be valid UTF-8, and on Python 2 they come
+        # back from cat() as str
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    elif value is None or isinstance(value,
+            (bool, float, six.integer_types, six.text_type)):
+        return value
+
+    result = _get_result_dict(value)
+    if result is not None:
+        return {"__dict__": dict([(key, encode(item))
+            for (key, item) in result.items()])}
+
+    name = str(value)
+    for (enum_name, enum) in ENUMS.items():
+        member = getattr(enum, name, None)
+        if type(member) is type(value) and member == value:
+            return {"__enum__": [enum_name, name]}
+
+    raise TypeError("Unable to broker a %s" % type(value).__name__)
+
+def decode(value):
+    """
+    Converts values produced by encode() back
+    """
+
+    if isinstance(value, dict):
+        if "__revision__" in value:
+            (kind, number, date) = value["__revision__"]
+            kind = getattr(pysvn.opt_revision_kind, kind)
+            if kind == pysvn.opt_revision_kind.number:
+                return pysvn.Revision(kind, number)
+            elif kind == pysvn.opt_revision_kind.date:
+                return pysvn.Revision(kind, date)
+            return pysvn.Revision(kind)
+        elif "__enum__" in value:
+            (enum, name) = value["__enum__"]
+            return getattr(ENUMS[enum], name)
+        elif "__bytes__" in value:
+            return base64.b64decode(value["__bytes__"])
+        elif "__dict__" in value:
+            return BrokeredDict([(key, decode(item))
+                for (key, item) in value["__dict__"].items()])
+    elif isinstance(value, list):
+        return [decode(item) for item in value]
+
+    return value
+
+def execute(client, method, json_args):
+    """
+    Runs a brokered call on a pysvn client.  This is the service side.
+
+    @type   client: pysvn.Client
+    @param  client: The client to run the call on
+
+    @type   method: string
+    @param  method: One of BROKERED_METHODS
+
+    @type   json_args: string
+    @param  json_args: The encoded [args, kwargs] of the call
+
+    @rtype  string
+    @return The encoded result
+
+    """
+
+    if method not in BROKERED_METHODS:
+        raise ValueError("%s cannot be brokered" % method)
+
+    (args, kwargs) = decode(simplejson.loads(json_args))
+    kwargs = dict([(str(key), value) for (key, value) in kwargs.items()])
+    result = getattr(client, method)(*args, **kwargs)
+    return simplejson.dumps(encode(result))
+
+class BrokeredClient(object):
+    """
+    Wraps a pysvn client (or PooledClient) so that BROKERED_METHODS calls on
+    repository URLs go through the checker service.  Everything else,
+    including setting callbacks, goes straight to the wrapped client.
+
+    """
+
+    def __init__(self, client, call):
+        """
+        @type   client: pysvn.Client
+        @param  client: The client to use locally
+
+        @type   call: callable
+        @param  call: Sends (method, json_args) to the service and returns
+                      the encoded result
+
+        """
+
+        object.__setattr__(self, "client", client)
+        object.__setattr__(self, "call", call)
+        object.__setattr__(self, "enabled", True)
+
+    def __getattr__(self, name):
+        local_method = getattr(self.client, name)
+        if name not in BROKERED_METHODS:
+            return local_method
+
+        def brokered(*args, **kwargs):
+            if (self.enabled and args and
+                    isinstance(args[0], six.string_types) and "://" in args[0]):
+                try:
+                    json_args = simplejson.dumps(encode([list(args), kwargs]))
+                    return decode(simplejson.loads(self.call(name, json_args)))
+                except BrokerUnavailable as e:
+                    log.debug("Not using the checker service: %s" % e)
+                    self.disable()
+                except Exception as e:
+                    log.debug("Running %s locally: %s" % (name, e))
+
+            return local_method(*args, **kwargs)
+
+        return brokered
+
+    def __setattr__(self, name, value):
+        setattr(self.client, name, value)
+
+    def disable(self):
+        object.__setattr__(self, "enabled", False)
+
+class CheckerServiceCall:
+    """
+    Sends brokered calls to the checker service.  The connection is only made
+    on the first call, so processes that never touch a repository URL do not
+    start the service.
+
+    """
+
+    def __init__(self):
+        self.stub = None
+
+    def __call__(self, method, json_args):
+        if self.stub is None:
+            try:
+                from rabbitvcs.services.checkerservice import StatusCheckerStub
+                self.stub = StatusCheckerStub()
+            except Exception as e:
+                raise BrokerUnavailable(str(e))
+
+        return self.stub.call_svn_client(method, json_args)
+
+def create_brokered_client(client):
+    """
+    Wraps client so that repository reads go through the checker service
+    """
+
+    return BrokeredClient(client, CheckerServiceCall())
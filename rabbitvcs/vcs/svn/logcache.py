@@ -0,0 +1,251 @@
+from __future__ import absolute_import
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+A persistent cache of SVN log entries, one SQLite database per repository.
+
+Revisions never change once committed (revision properties aside), so every
+log entry fetched from a repository is kept.  For each path in the
+repository the cache also remembers which revisions its log returned, and
+the range of revisions that list is known to be complete for.  Only
+revisions outside that range have to be asked from the server.
+
+Log entries are plain tuples:
+    (revision, author, date, message, changed_paths)
+where changed_paths is a list of
+    (path, action, copy_from_path, copy_from_revision)
+"""
+
+import os
+import os.path
+import threading
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+import rabbitvcs.util.helper
+
+from rabbitvcs.util.log import Log
+log = Log("rabbitvcs.vcs.svn.logcache")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS revisions (
+        revision INTEGER PRIMARY KEY,
+        author TEXT,
+        date REAL,
+        message TEXT
+    );
+    CREATE TABLE IF NOT EXISTS changed_paths (
+        revision INTEGER,
+        path TEXT,
+        action TEXT,
+        copy_from_path TEXT,
+        copy_from_revision INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS changed_paths_revision
+        ON changed_paths (revision);
+    CREATE TABLE IF NOT EXISTS path_revisions (
+        path TEXT,
+        revision INTEGER,
+        PRIMARY KEY (path, revision)
+    );
+    CREATE TABLE IF NOT EXISTS path_ranges (
+        path TEXT PRIMARY KEY,
+        top INTEGER,
+        bottom INTEGER
+    );
+"""
+
+class RepositoryLogCache:
+    """
+    The log cache of a single repository, identified by its UUID.
+
+    Paths are repository paths ("/trunk/src") so that every working copy
+    and URL of the same repository shares one cache.
+
+    """
+
+    def __init__(self, uuid):
+        folder = os.path.join(rabbitvcs.util.helper.get_cache_folder(), "svnlog")
+        if not os.path.isdir(folder):
+            os.makedirs(folder, 0o700)
+
+        self.uuid = uuid
+        self.path = os.path.join(folder, "%s.db" % uuid)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+    def get_range(self, path):
+        """
+        Returns the (top, bottom) revisions between which the cached log of
+        path is complete, or None if nothing is cached for it.
+
+        """
+
+        with self.lock:
+            return self.connection.execute(
+                "SELECT top, bottom FROM path_ranges WHERE path = ?",
+                (path, )).fetchone()
+
+    def get_revision_numbers(self, path, start, end):
+        """
+        Returns the cached log revisions of path from start down to end
+        """
+
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT revision FROM path_revisions WHERE path = ? "
+                "AND revision <= ? AND revision >= ? ORDER BY revision DESC",
+                (path, start, end)).fetchall()
+
+        return [row[0] for row in rows]
+
+    def get_entries(self, path, start, end, limit=0):
+        """
+        Returns the cached log entries of path from start down to end,
+        newest first.
+
+        """
+
+        query = ("SELECT r.revision, r.author, r.date, r.message "
+            "FROM path_revisions p JOIN revisions r ON r.revision = p.revision "
+            "WHERE p.path = ? AND p.revision <= ? AND p.revision >= ? "
+            "ORDER BY p.revision DESC")
+        params = (path, start, end)
+        if limit:
+            query += " LIMIT ?"
+            params += (limit, )
+
+        with self.lock:
+            rows = self.connection.execute(query, params).fetchall()
+            if not rows:
+                return []
+
+            changed_paths = {}
+            for (revision, changed_path, action, copy_from_path,
+                    copy_from_revision) in self.connection.execute(
+                    "SELECT revision, path, action, copy_from_path, "
+                    "copy_from_revision FROM changed_paths "
+                    "WHERE revision IN (SELECT revision FROM path_revisions "
+                    "WHERE path = ? AND revision <= ? AND revision >= ?)",
+                    (path, rows[0][0], rows[-1][0])):
+                changed_paths.setdefault(revision, []).append((changed_path,
+                    action, copy_from_path, copy_from_revision))
+
+        return [(revision, author, date, message, changed_paths.get(revision, []))
+            for (revision, author, date, message) in rows]
+
+    def add(self, path, entries, top, bottom):
+        """
+        Stores the log of path between the revisions top and bottom.
+
+        @type   path: string
+        @param  path: The repository path the log was fetched for
+
+        @type   entries: list
+        @param  entries: Every log entry of path from top down to bottom
+
+        @type   top: int
+        @param  top: The revision the log was fetched from
+
+        @type   bottom: int
+        @param  bottom: The oldest revision the entries are complete for
+
+        """
+
+        with self.lock:
+            connection = self.connection
+            for (revision, author, date, message, changed_paths) in entries:
+                if connection.execute("SELECT 1 FROM revisions WHERE revision = ?",
+                        (revision, )).fetchone() is None:
+                    connection.execute("INSERT INTO revisions VALUES (?, ?, ?, ?)",
+                        (revision, author, date, message))
+                    connection.executemany(
+                        "INSERT INTO changed_paths VALUES (?, ?, ?, ?, ?)",
+                        [(revision, ) + tuple(changed_path)
+                            for changed_path in changed_paths])
+
+                connection.execute(
+                    "INSERT OR IGNORE INTO path_revisions VALUES (?, ?)",
+                    (path, revision))
+
+            # Grow the known range when the new one touches it, otherwise
+            # start over from what was just fetched
+            row = connection.execute(
+                "SELECT top, bottom FROM path_ranges WHERE path = ?",
+                (path, )).fetchone()
+            if row and bottom <= row[0] + 1 and top >= row[1] - 1:
+                top = max(top, row[0])
+                bottom = min(bottom, row[1])
+
+            connection.execute(
+                "INSERT OR REPLACE INTO path_ranges VALUES (?, ?, ?)",
+                (path, top, bottom))
+            connection.commit()
+
+    def update_revision(self, revision, author=None, message=None):
+        """
+        Updates a cached revision after its svn:author or svn:log property
+        was changed.
+
+        """
+
+        with self.lock:
+            if author is not None:
+                self.connection.execute(
+                    "UPDATE revisions SET author = ? WHERE revision = ?",
+                    (author, revision))
+            if message is not None:
+                self.connection.execute(
+                    "UPDATE revisions SET message = ? WHERE revision = ?",
+                    (message, revision))
+            self.connection.commit()
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_log_cache(uuid):
+    """
+    Returns the log cache of a repository, or None if it cannot be used
+    """
+
+    if sqlite3 is None or not uuid:
+        return None
+
+    with _caches_lock:
+        try:
+            return _caches[uuid]
+        except KeyError:
+            pass
+
+        try:
+            cache = RepositoryLogCache(uuid)
+        except Exception as e:
+            log.debug("Unable to open the log cache for %s: %s" % (uuid, e))
+            cache = None
+
+        _caches[uuid] = cache
+        return cache
@@ -0,0 +1,333 @@
+from __future__ import absolute_import
+#
+# This is an extension to the Nautilus file manager to allow better
+# integration with the Subversion source control system.
+#
+# Copyright (C) 2006-2008 by Jason Field <jason@jasonfield.com>
+# Copyright (C) 2007-2008 by Bruce van der Kooij <brucevdkooij@gmail.com>
+# Copyright (C) 2008-2010 by Adam Plumb <adamplumb@gmail.com>
+#
+# RabbitVCS is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# RabbitVCS is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with RabbitVCS;  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Fast status lookups that read the wc.db of an SVN 1.8+ working copy directly.
+
+This is used for emblems, where speed matters more than catching every
+corner case.  The recorded size and modification time of each file are
+compared with the file on disk, the same shortcut svn itself takes before
+comparing contents.  Anything that cannot be decided that way is reported as
+ambiguous so the caller can ask pysvn.
+"""
+
+import os
+import os.path
+import threading
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+import rabbitvcs.vcs.status
+
+from rabbitvcs.util.log import Log
+log = Log("rabbitvcs.vcs.svn.wcdb")
+
+# wc.db formats 31 (svn 1.8) and later store conflicts in conflict_data
+MIN_FORMAT = 31
+
+NODES_QUERY = """
+    SELECT local_relpath, op_depth, presence, kind, changed_revision,
+        changed_date, changed_author, translated_size, last_mod_time
+    FROM nodes
+    WHERE wc_id = ? AND %s
+    ORDER BY local_relpath, op_depth
+"""
+
+ACTUAL_QUERY = """
+    SELECT local_relpath, properties, conflict_data
+    FROM actual_node
+    WHERE wc_id = ? AND %s
+"""
+
+# Either the item itself or, when recursing, everything under it.  Children
+# sort between "relpath/" and "relpath0" since "0" follows "/".
+SINGLE_CONDITION = "local_relpath = ?"
+RECURSIVE_CONDITION = ("(local_relpath = ? OR "
+    "(local_relpath > ? || '/' AND local_relpath < ? || '0'))")
+
+# Presences that mean the node is not in the working copy at all
+ABSENT_PRESENCES = ("not-present", "excluded", "server-excluded")
+
+# Seconds to keep retrying while svn holds a write lock on wc.db
+BUSY_TIMEOUT = 1.0
+
+class WCDBStatus(rabbitvcs.vcs.status.SVNStatus):
+    """
+    An SVN status built from wc.db rows rather than a pysvn status
+    """
+
+    def __init__(self, path, content, metadata, revision=None, author=None,
+            date=None):
+        rabbitvcs.vcs.status.Status.__init__(
+            self,
+            path,
+            content=content,
+            metadata=metadata,
+            revision=revision,
+            author=author,
+            date=date
+        )
+
+class WCDatabase:
+    """
+    Read-only access to the wc.db of one working copy.
+
+    The database is opened read-only, and each lookup reads in a single
+    transaction so it sees one consistent state even while svn writes to it.
+    When svn holds a write lock, SQLite retries for up to BUSY_TIMEOUT
+    seconds before giving up with an error.
+
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.db_path = os.path.join(root, ".svn", "wc.db")
+        self.connection = None
+        self.wc_id = None
+        self.lock = threading.Lock()
+
+    def get_stamp(self):
+        """
+        Returns the modification time and size of wc.db, which change
+        whenever svn writes to it.
+
+        """
+
+        st = os.stat(self.db_path)
+        return (st.st_mtime, st.st_size)
+
+    def _connect(self):
+        if self.connection is not None:
+            return self.connection
+
+        # Only Python 3 can pass open flags through a URI.  Transactions are
+        # started explicitly in _query().
+        connection = sqlite3.connect("file:%s?mode=ro" % self.db_path,
+            uri=True, check_same_thread=False, timeout=BUSY_TIMEOUT,
+            isolation_level=None)
+        try:
+            (version, ) = connection.execute("PRAGMA user_version").fetchone()
+            if version < MIN_FORMAT:
+                raise sqlite3.DatabaseError("Unsupported wc.db format %d" % version)
+
+            (self.wc_id, ) = connection.execute(
+                "SELECT id FROM wcroot WHERE local_abspath IS NULL").fetchone()
+        except:
+            connection.close()
+            raise
+
+        self.connection = connection
+        return connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _query(self, relpath, recurse):
+        if recurse:
+            condition = RECURSIVE_CONDITION
+            params = (relpath, relpath, relpath)
+            if relpath == "":
+                # Everything in the working copy is under the root
+                condition = "1"
+                params = ()
+        else:
+            condition = SINGLE_CONDITION
+            params = (relpath, )
+
+        with self.lock:
+            connection = self._connect()
+            try:
+                # Both queries have to see the same state of wc.db
+                connection.execute("BEGIN")
+                try:
+                    nodes = connection.execute(NODES_QUERY % condition,
+                        (self.wc_id, ) + params).fetchall()
+                    actual = connection.execute(ACTUAL_QUERY % condition,
+                        (self.wc_id, ) + params).fetchall()
+                finally:
+                    connection.execute("COMMIT")
+            except:
+                # Start over with a new connection next time
+                self.close()
+                raise
+
+        return (nodes, actual)
+
+    def statuses(self, path, recurse=False):
+        """
+        Look up the status of path, and everything under it if recurse is set.
+
+        @type   path: string
+        @param  path: An absolute path inside this working copy
+
+        @type   recurse: boolean
+        @param  recurse: Whether to include the items under path
+
+        @rtype  tuple
+        @return A list of WCDBStatus objects and a list of paths whose status
+                could not be decided from wc.db alone.  Unversioned items do
+                not appear in either list.
+
+        """
+
+        relpath = os.path.relpath(path, self.root)
+        if relpath == ".":
+            relpath = ""
+
+        (nodes, actual) = self._query(relpath, recurse)
+
+        actual_nodes = {}
+        for (local_relpath, properties, conflict_data) in actual:
+            actual_nodes[local_relpath] = (properties, conflict_data)
+
+        statuses = []
+        ambiguous = []
+
+        base_paths = set([row[0] for row in nodes
+            if row[1] == 0 and row[2] == "normal"])
+
+        # Rows are sorted by path and then op_depth, so the last row of each
+        # path is the one visible in the working copy
+        count = len(nodes)
+        for i in range(count):
+            row = nodes[i]
+            if i + 1 < count and nodes[i + 1][0] == row[0]:
+                continue
+
+            has_base = row[0] in base_paths
+            item_path = self.root
+            if row[0]:
+                item_path = os.path.join(self.root, row[0])
+
+            (properties, conflict_data) = actual_nodes.get(row[0], (None, None))
+            if conflict_data is not None:
+                content = "conflicted"
+            else:
+                content = self._get_content_status(item_path, row, has_base)
+
+            if content is None:
+                ambiguous.append(item_path)
+                continue
+            elif content == "absent":
+                continue
+
+            # The actual properties are only recorded once they have been
+            # edited, and may still match the pristine ones
+            if properties is not None:
+                ambiguous.append(item_path)
+                continue
+
+            (changed_revision, changed_date, changed_author) = row[4:7]
+            date = None
+            if changed_date is not None:
+                # Stored in microseconds
+                date = int(changed_date // 1000000)
+
+            statuses.append(WCDBStatus(item_path, content, "normal",
+                revision=changed_revision, author=changed_author, date=date))
+
+        return (statuses, ambiguous)
+
+    def _get_content_status(self, path, row, has_base):
+        """
+        Returns the pysvn style text status for a node, "absent" if the node
+        should not be reported, or None if it cannot be decided here.
+
+        """
+
+        (op_depth, presence, kind, translated_size, last_mod_time) = (
+            row[1], row[2], row[3], row[7], row[8])
+
+        if presence in ABSENT_PRESENCES:
+            return "absent"
+        elif presence == "base-deleted":
+            return "deleted"
+        elif presence == "incomplete":
+            return "incomplete"
+        elif presence != "normal":
+            return None
+
+        if op_depth > 0:
+            if not os.path.lexists(path):
+                return "missing"
+            elif has_base:
+                return "replaced"
+            return "added"
+
+        if kind == "dir":
+            if os.path.isdir(path):
+                return "normal"
+            elif os.path.lexists(path):
+                return "obstructed"
+            return "missing"
+        elif kind != "file":
+            # Symlinks and the like need the full check
+            return None
+
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return "missing"
+
+        if not os.path.isfile(path):
+            return None
+
+        if translated_size is None or last_mod_time is None:
+            return None
+
+        # The recorded size is that of the translated (eol and keyword
+        # expanded) file, so any size difference is a real modification
+        if st.st_size != translated_size:
+            return "modified"
+
+        mtime = getattr(st, "st_mtime_ns", None)
+        if mtime is not None:
+            mtime = mtime // 1000
+        else:
+            mtime = int(st.st_mtime * 1000000)
+
+        if mtime == last_mod_time:
+            return "normal"
+
+        # Same size but touched since, only the contents can tell
+        return None
+
+def is_available():
+    """
+    Whether wc.db can be read here.  Needs sqlite3 and URI support.
+    """
+
+    if sqlite3 is None:
+        return False
+
+    try:
+        sqlite3.connect(":memory:", uri=True).close()
+    except TypeError:
+        return False
+
+    return True